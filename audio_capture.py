@@ -0,0 +1,173 @@
+# audio_capture.py
+import threading
+
+import numpy as np
+
+
+class CaptureStream:
+    """
+    Long-lived microphone capture writing into a preallocated ring buffer.
+
+    The device is opened once and PyAudio's callback copies every frame into a
+    NumPy int16 ring. Each frame is written twice (at `pos` and `pos + capacity`)
+    so any window of up to `capacity` samples is contiguous and can be sliced
+    out as a view without copying. A noise-floor estimate is updated on every
+    quiet frame, so callers never need a calibration pause.
+
+    Sample positions are absolute (they count every sample since `start`), so
+    a caller can remember `cursor` when a turn starts and slice the utterance
+    out later.
+    """
+    def __init__(self, sample_rate=16000, frame_ms=20, capacity_seconds=90.0, device_index=None,
+                 noise_adapt=0.02, speech_ratio=3.0, initial_noise_floor=100.0):
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.capacity = int(sample_rate * capacity_seconds)
+        self.device_index = device_index
+        self.noise_adapt = noise_adapt
+        self.speech_ratio = speech_ratio
+        self.noise_floor = initial_noise_floor
+
+        self._ring = np.zeros(2 * self.capacity, dtype=np.int16)
+        self._scratch = np.zeros(self.frame_samples, dtype=np.float32)
+        self._total = 0
+        self._condition = threading.Condition()
+        self._audio = None
+        self._stream = None
+        self._continue = 0
+
+    @property
+    def cursor(self):
+        """Absolute index of the next sample to be captured"""
+        return self._total
+
+    @property
+    def is_active(self):
+        return self._stream is not None and self._stream.is_active()
+
+    def start(self):
+        """Open the input device; safe to call more than once"""
+        if self._stream is not None:
+            return self
+        # Imported here so the ring buffer can be used (and tested) without an audio stack
+        import pyaudio
+        self._continue = pyaudio.paContinue
+        self._audio = pyaudio.PyAudio()
+        self._stream = self._audio.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.frame_samples,
+            stream_callback=self._on_audio,
+        )
+        self._stream.start_stream()
+        return self
+
+    def close(self):
+        """Stop capturing and release the device"""
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def write(self, samples):
+        """Append int16 samples to the ring (called from the device callback)"""
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        pos = self._total % self.capacity
+        first = min(n, self.capacity - pos)
+
+        # Primary copy plus the mirror half that keeps windows contiguous
+        self._ring[pos:pos + first] = samples[:first]
+        self._ring[pos + self.capacity:pos + self.capacity + first] = samples[:first]
+        if first < n:
+            rest = n - first
+            self._ring[:rest] = samples[first:]
+            self._ring[self.capacity:self.capacity + rest] = samples[first:]
+
+        self._update_noise_floor(samples)
+        with self._condition:
+            self._total += n
+            self._condition.notify_all()
+
+    def slice(self, start, end=None):
+        """
+        Return samples [start, end) as a zero-copy int16 view.
+        The view is only valid until the ring wraps past `start`.
+        """
+        if end is None:
+            end = self._total
+        if end > self._total or start > end:
+            raise ValueError("Requested audio has not been captured yet")
+        if self._total - start > self.capacity:
+            raise ValueError("Requested audio has already been overwritten")
+        offset = start % self.capacity
+        return self._ring[offset:offset + (end - start)]
+
+    def slice_bytes(self, start, end=None):
+        """Copy samples [start, end) out as LINEAR16 bytes (for APIs that need bytes)"""
+        return self.slice(start, end).tobytes()
+
+    def frames(self, start=None, stop_event=None, max_chunk_samples=None, timeout=0.5):
+        """
+        Yield zero-copy views over newly captured audio, starting at `start`
+        (default: now), in whole frames, until stop_event is set or capture stops
+        """
+        position = self._total if start is None else start
+        max_chunk_samples = max_chunk_samples or 5 * self.frame_samples
+        while stop_event is None or not stop_event.is_set():
+            with self._condition:
+                if self._total - position < self.frame_samples:
+                    self._condition.wait(timeout)
+                available = self._total - position
+            if available < self.frame_samples:
+                if self._stream is None:
+                    return
+                continue
+            if available > self.capacity:
+                # Consumer fell behind; skip to the oldest audio still held
+                position = self._total - self.capacity
+                available = self.capacity
+            take = min(available, max_chunk_samples)
+            take -= take % self.frame_samples
+            yield self.slice(position, position + take)
+            position += take
+
+    def _update_noise_floor(self, samples):
+        frame = samples[-self.frame_samples:]
+        if len(frame) < self.frame_samples:
+            return
+        np.copyto(self._scratch, frame)
+        rms = float(np.sqrt(np.dot(self._scratch, self._scratch) / self.frame_samples))
+        if rms < self.noise_floor:
+            # Follow drops quickly so a quieter room is picked up at once
+            self.noise_floor += 0.5 * (rms - self.noise_floor)
+        elif rms < self.noise_floor * self.speech_ratio:
+            self.noise_floor += self.noise_adapt * (rms - self.noise_floor)
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        self.write(np.frombuffer(in_data, dtype=np.int16))
+        return (None, self._continue)
+
+
+_shared_capture = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_capture(sample_rate=16000):
+    """Return the process-wide capture stream, opening the microphone on first use"""
+    global _shared_capture
+    with _shared_lock:
+        if _shared_capture is None:
+            _shared_capture = CaptureStream(sample_rate=sample_rate).start()
+        return _shared_capture
@@ -0,0 +1,223 @@
+# audio_player.py
+import io
+import time
+import wave
+import threading
+from collections import deque
+
+# Extra time allowed on top of a clip's duration before a wait gives up on a stalled device
+PLAY_TIMEOUT_SLACK = 5.0
+
+
+class Clip:
+    """One queued piece of PCM audio and how much of it has been played"""
+    def __init__(self, pcm, sample_rate, sample_width=2):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.offset = 0
+        self.interrupted = False
+        self.done = threading.Event()
+
+    @property
+    def duration(self):
+        return len(self.pcm) / (self.sample_rate * self.sample_width)
+
+    @property
+    def played_seconds(self):
+        return self.offset / (self.sample_rate * self.sample_width)
+
+    def wait(self, timeout=None):
+        """Block until played or stopped; by default for at most the clip's duration plus slack"""
+        if timeout is None:
+            timeout = self.duration + PLAY_TIMEOUT_SLACK
+        return self.done.wait(timeout)
+
+
+def decode_pcm(audio, default_rate=24000):
+    """
+    Split TTS output into (pcm_bytes, sample_rate). LINEAR16 responses come
+    with a WAV header; headerless data is taken as 16-bit mono at default_rate.
+    """
+    if audio[:4] == b"RIFF":
+        with wave.open(io.BytesIO(audio), "rb") as wav_file:
+            if wav_file.getsampwidth() != 2 or wav_file.getnchannels() != 1:
+                raise ValueError("Only 16-bit mono audio is supported")
+            return wav_file.readframes(wav_file.getnframes()), wav_file.getframerate()
+    return bytes(audio), default_rate
+
+
+def resample(pcm, source_rate, target_rate):
+    """Linear-interpolation resample of 16-bit mono PCM"""
+    if source_rate == target_rate or not pcm:
+        return pcm
+    import numpy as np
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    count = int(len(samples) * target_rate / source_rate)
+    positions = np.linspace(0, len(samples) - 1, count)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16).tobytes()
+
+
+class AudioPlayer:
+    """
+    Plays in-memory LINEAR16 audio through one output stream kept open for
+    the life of the process.
+
+    The backend is resolved once in `start`: a PyAudio callback stream that
+    plays queued clips and outputs silence in between, or, without PyAudio,
+    a pygame mixer channel initialized once. Nothing is written to disk and
+    no player process is spawned per reply.
+    """
+    def __init__(self, sample_rate=24000, frame_ms=20, device_index=None):
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.device_index = device_index
+        self.backend = None
+        # Output volume, lowered while the callee talks over the agent
+        self.gain = 1.0
+        self.clips = deque()
+        self.lock = threading.Lock()
+        self.clip_added = threading.Condition(self.lock)
+        self._audio = None
+        self._stream = None
+        self._channel = None
+        # Clip the pygame mixer loop is playing right now
+        self._current = None
+        self._continue = 0
+
+    def start(self):
+        """Open the output device; safe to call more than once"""
+        if self.backend is not None:
+            return self
+        try:
+            import pyaudio
+            self._audio = pyaudio.PyAudio()
+            self._stream = self._audio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.sample_rate,
+                output=True,
+                output_device_index=self.device_index,
+                frames_per_buffer=self.frame_samples,
+                stream_callback=self._on_audio,
+            )
+            self._stream.start_stream()
+            self._continue = pyaudio.paContinue
+            self.backend = "pyaudio"
+        except Exception as e:
+            print(f"⚠️ PyAudio output unavailable ({e}), falling back to pygame mixer")
+            self._close_pyaudio()
+            from pygame import mixer
+            if mixer.get_init() not in (None, (self.sample_rate, -16, 1)):
+                # pygame.init() opened the mixer with its own format, and init() would keep it
+                mixer.quit()
+            mixer.init(frequency=self.sample_rate, size=-16, channels=1)
+            self._channel = mixer.Channel(0)
+            self.backend = "pygame"
+            threading.Thread(target=self._mixer_loop, name="audio-player", daemon=True).start()
+        return self
+
+    def play(self, audio, wait=True):
+        """
+        Queue LINEAR16/WAV bytes behind anything already playing and return
+        the Clip; with wait=True block until it has finished or was stopped
+        """
+        pcm, rate = decode_pcm(audio, self.sample_rate)
+        clip = Clip(resample(pcm, rate, self.sample_rate), self.sample_rate, self.sample_width)
+        self.start()
+        with self.lock:
+            # Audio still queued ahead of this clip plays first
+            ahead = sum(queued.duration - queued.played_seconds for queued in self.clips)
+            self.clips.append(clip)
+            self.clip_added.notify()
+        if wait and not clip.wait(ahead + clip.duration + PLAY_TIMEOUT_SLACK):
+            print("⚠️ Audio output stalled; stopped waiting for the clip")
+        return clip
+
+    def stop(self):
+        """Cut off the clip that is playing and drop everything queued"""
+        with self.lock:
+            clips = list(self.clips)
+            self.clips.clear()
+            current = self._current
+        for clip in clips:
+            clip.interrupted = True
+            # The mixer loop finishes the playing clip itself, once it knows how much was heard
+            if clip is not current:
+                clip.done.set()
+        if self._channel is not None:
+            self._channel.stop()
+
+    def set_gain(self, gain):
+        """Scale the output volume (0-1) from the next buffer on"""
+        self.gain = gain
+        if self._channel is not None:
+            self._channel.set_volume(gain)
+
+    @property
+    def is_playing(self):
+        with self.lock:
+            return bool(self.clips)
+
+    def close(self):
+        self.stop()
+        self._close_pyaudio()
+        self.backend = None
+
+    def _close_pyaudio(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        needed = frame_count * self.sample_width
+        out = bytearray()
+        with self.lock:
+            while len(out) < needed and self.clips:
+                clip = self.clips[0]
+                chunk = clip.pcm[clip.offset:clip.offset + needed - len(out)]
+                out += chunk
+                clip.offset += len(chunk)
+                if clip.offset >= len(clip.pcm):
+                    self.clips.popleft()
+                    clip.done.set()
+        if self.gain != 1.0 and out:
+            import numpy as np
+            out = (np.frombuffer(bytes(out), dtype=np.int16) * self.gain).astype(np.int16).tobytes()
+        # Silence between clips keeps the stream (and the device) open
+        out = bytes(out) + bytes(needed - len(out))
+        return (out, self._continue)
+
+    def _mixer_loop(self):
+        from pygame import mixer
+        while self.backend == "pygame":
+            with self.lock:
+                while not self.clips:
+                    self.clip_added.wait()
+                clip = self._current = self.clips[0]
+            started = time.perf_counter()
+            try:
+                self._channel.play(mixer.Sound(buffer=clip.pcm))
+                self._channel.set_volume(self.gain)
+                while self._channel.get_busy() and not clip.interrupted:
+                    time.sleep(0.01)
+                if clip.interrupted:
+                    self._channel.stop()
+            except Exception as e:
+                # Skip this clip but keep the loop alive for the next one
+                clip.interrupted = True
+                print(f"❌ Error playing audio: {e}")
+            finally:
+                elapsed = time.perf_counter() - started
+                clip.offset = min(len(clip.pcm), int(elapsed * self.sample_rate) * self.sample_width)
+                with self.lock:
+                    if self.clips and self.clips[0] is clip:
+                        self.clips.popleft()
+                    self._current = None
+                clip.done.set()
+
@@ -0,0 +1,95 @@
+# barge_in.py
+import threading
+import contextvars
+
+import metrics
+from vad import VoiceActivityDetector, VADEvent
+
+# Stricter than end-of-turn detection: the microphone also hears the agent's own
+# playback, so only clearly louder speech counts as an interruption
+BARGE_IN_VAD_SETTINGS = {"energy_ratio": 4.0, "min_energy": 400.0, "start_ms": 100, "hangover_ms": 300}
+
+
+class BargeInMonitor:
+    """
+    Watches the microphone while the agent is speaking and cuts playback when
+    the callee starts talking.
+
+    In "stop" mode the player is stopped as soon as speech starts, which is
+    about 100 ms of speech plus one 20 ms capture frame. In "duck" mode the
+    output is turned down first and only stopped once the speech has lasted
+    `confirm_ms`. A short backchannel ("haan", "ji") then just dips the volume.
+    `speech_start` is the capture position where the interruption began, so
+    the next turn can be recognized from there without losing its first words.
+    """
+    def __init__(self, capture, player, mode="stop", duck_gain=0.25, confirm_ms=300,
+                 on_barge_in=None, **vad_overrides):
+        self.capture = capture
+        self.player = player
+        self.mode = mode
+        self.duck_gain = duck_gain
+        self.confirm_seconds = confirm_ms / 1000.0
+        self.on_barge_in = on_barge_in
+        settings = dict(BARGE_IN_VAD_SETTINGS)
+        settings.update(vad_overrides)
+        self.detector = VoiceActivityDetector(sample_rate=capture.sample_rate, noise_floor=capture.noise_floor, **settings)
+        self.origin = None
+        self.stop_event = threading.Event()
+        self.triggered = threading.Event()
+        self.speech_start = None
+        self.reaction_time = None
+        self.thread = None
+
+    def start(self):
+        self.origin = self.capture.cursor
+        self.thread = threading.Thread(target=contextvars.copy_context().run, args=(self._watch,), name="barge-in")
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop watching (playback finished or the turn is over)"""
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1.0)
+        if self.mode == "duck" and not self.triggered.is_set():
+            self.player.set_gain(1.0)
+
+    def _watch(self):
+        rate = self.capture.sample_rate
+        candidate = None
+        # One frame at a time keeps detection latency to a single capture frame
+        frames = self.capture.frames(start=self.origin, stop_event=self.stop_event,
+                                     max_chunk_samples=self.capture.frame_samples)
+        position = self.origin
+        for chunk in frames:
+            position += len(chunk)
+            for event in self.detector.process(chunk):
+                if event.kind == VADEvent.SPEECH_START:
+                    candidate = self.origin + int(event.stream_time * rate)
+                    if self.mode == "duck":
+                        self.player.set_gain(self.duck_gain)
+                    else:
+                        self._trigger(candidate, position)
+                        return
+                elif event.kind == VADEvent.END_OF_TURN and candidate is not None:
+                    # Too short to be a real turn: bring the agent back up
+                    candidate = None
+                    self.player.set_gain(1.0)
+            # Confirmed only while the callee is still talking; the silence after a backchannel does not count
+            if (candidate is not None and self.detector.silence_run == 0
+                    and (position - candidate) / rate >= self.confirm_seconds):
+                self._trigger(candidate, position)
+                return
+
+    def _trigger(self, speech_start, position):
+        self.player.stop()
+        self.player.set_gain(1.0)
+        self.speech_start = speech_start
+        # Speech already captured when playback was cut, i.e. how long the callee talked over the agent
+        self.reaction_time = (position - speech_start) / self.capture.sample_rate
+        metrics.observe("barge_in", self.reaction_time, mode=self.mode)
+        print(f"✋ Barge-in: playback stopped {self.reaction_time * 1000:.0f} ms after the callee started speaking")
+        self.triggered.set()
+        if self.on_barge_in is not None:
+            self.on_barge_in(self)
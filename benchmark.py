@@ -0,0 +1,359 @@
+# benchmark.py
+"""
+Turn-latency benchmark that runs the real pipeline (utils handlers, streaming
+speaker, caches, slot finder, booking queue, CRM store) against the offline
+fakes, so no Google or OpenAI account is needed.
+
+    python benchmark.py --turns 50 --output bench.json
+    python benchmark.py --llm-first-token-ms 900 --jitter 0.5 --baseline bench.json
+    python benchmark.py --fallback-first-token-ms 300 --hedge-after-ms 800 --jitter 0.8
+
+Latencies are sampled from fakes.LatencyModel; results (p50/p95/p99 per
+metric and stage, per scenario) are written as JSON for comparing commits.
+"""
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import tempfile
+import platform
+import subprocess
+from datetime import datetime
+
+import utils
+from hedging import HedgePolicy
+from fakes import FakeSpeechClient, FakeTTSClient, FakeLLM, FakeCalendarService, LatencyModel
+from system_prompts import SYSTEM_PROMPTS
+from streaming_pipeline import StreamingSpeaker
+from conversation_memory import ConversationMemory
+from crm_store import CRMStore
+from slot_finder import SlotFinder
+from booking_queue import BookingQueue
+from tts_cache import TTSCache
+from response_cache import ResponseCache
+
+# Caller utterances replayed in order for each scenario; a mix of turns the
+# intent fast path answers and turns that need the model
+BENCH_UTTERANCES = {
+    "demo_scheduling": [
+        "haan ji bataiye", "aapka ERP system kya kya karta hai?", "price kitna hoga approximately?",
+        "kaun bol raha hai?", "humare paas already Tally hai, integration ho jayega?",
+        "theek hai, demo schedule kar do", "baad mein call karo",
+    ],
+    "candidate_interviewing": [
+        "haan ji", "maine B.Tech computer science mein kiya hai", "mera last project NLP par tha",
+        "transformers ke saath kaam kiya hai, BERT fine-tune kiya tha", "salary expectation 8 lakh hai",
+        "aap kaun bol rahe hain?", "koi aur question hai?",
+    ],
+    "payment_followup": [
+        "haan ji boliye", "payment next week tak kar dunga", "invoice dobara bhej sakte hain?",
+        "UPI se kar sakta hoon kya?", "kaun bol raha hai?", "thoda discount mil sakta hai?",
+        "abhi busy hoon, baad mein call karna",
+    ],
+}
+
+DEFAULT_REPLIES = [
+    "Ji bilkul, yeh bahut accha sawaal hai. Humara system aapke business ke hisaab se customize ho jata hai. "
+    "Kya mai aapko ek short demo dikha sakta hoon?",
+    "Samajh gaya. Mai aapko saari details email par bhej deta hoon, aur agar koi sawaal ho toh zaroor batayiye.",
+    "Dhanyavaad batane ke liye! Iske baare mein thoda aur bataiye, taaki mai aapki sahi madad kar sakoon.",
+]
+
+# Seconds of speech per character of reply text, for simulated playback
+SPEECH_SECONDS_PER_CHAR = 0.06
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile, q in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values):
+    """Distribution summary in milliseconds"""
+    if not values:
+        return {"count": 0}
+    to_ms = lambda seconds: round(seconds * 1000.0, 3)
+    return {
+        "count": len(values),
+        "mean_ms": to_ms(sum(values) / len(values)),
+        "min_ms": to_ms(min(values)),
+        "p50_ms": to_ms(percentile(values, 50)),
+        "p95_ms": to_ms(percentile(values, 95)),
+        "p99_ms": to_ms(percentile(values, 99)),
+        "max_ms": to_ms(max(values)),
+    }
+
+
+class FakePlayback:
+    """Stands in for utils.play_audio: 'plays' for the duration of the reply, sped up"""
+    def __init__(self, speed=20.0, bytes_per_char=200):
+        self.speed = speed
+        self.bytes_per_char = bytes_per_char
+        self.timings = []
+
+    def __call__(self, audio):
+        # FakeTTSClient audio is 2 header bytes + bytes_per_char per character
+        chars = max(0, len(audio) - 2) / self.bytes_per_char
+        duration = chars * SPEECH_SECONDS_PER_CHAR / self.speed
+        time.sleep(duration)
+        self.timings.append(duration)
+        return True
+
+
+class Benchmark:
+    """
+    Swaps the utils clients for fakes, replays scripted turns per scenario and
+    collects turn-level and per-stage latency distributions.
+    """
+    def __init__(self, turns=30, stt=None, llm_first_token=None, llm_token=None, tts=None, calendar=None,
+                 playback_speed=20.0, caches=False, work_dir=None, fallback_first_token=None, hedge_after=None):
+        self.turns = turns
+        self.stt = stt or LatencyModel(0.3, 0.3)
+        self.llm_first_token = llm_first_token or LatencyModel(0.7, 0.4)
+        self.llm_token = llm_token or LatencyModel(0.02, 0.3)
+        self.tts = tts or LatencyModel(0.25, 0.3)
+        self.calendar = calendar or LatencyModel(0.2, 0.3)
+        self.playback_speed = playback_speed
+        self.caches = caches
+        # A fallback model (and so hedging) is only simulated when its latency is given
+        self.fallback_first_token = fallback_first_token
+        self.hedge_after = hedge_after
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="benchmark_")
+
+    def run(self, scenarios=None):
+        scenarios = scenarios or list(SYSTEM_PROMPTS)
+        saved = self._save_utils()
+        try:
+            return {scenario: self.run_scenario(scenario) for scenario in scenarios}
+        finally:
+            self._restore_utils(saved)
+
+    def run_scenario(self, scenario):
+        speech_client, tts_client, llm, calendar_service, playback = self._install_fakes(scenario)
+        fallback = utils.fallback_llm
+        audio_path = self._silent_wav()
+        utterances = BENCH_UTTERANCES.get(scenario, BENCH_UTTERANCES["demo_scheduling"])
+        memory = ConversationMemory(summarizer=utils.summarize_conversation)
+
+        turn_latency, first_audio, first_token, turn_total, reply_times = [], [], [], [], []
+        for index in range(self.turns):
+            speech_client.transcript = utterances[index % len(utterances)]
+            if index % len(utterances) == 0:
+                # Every pass over the script is a fresh call
+                memory = ConversationMemory(summarizer=utils.summarize_conversation)
+            started = time.perf_counter()
+            user_input = utils.recognize_speech_from_file(audio_path)
+
+            speaker = StreamingSpeaker()
+            token_times = []
+
+            def on_token(token, speaker=speaker, token_times=token_times):
+                if not token_times:
+                    token_times.append(time.perf_counter())
+                speaker.feed(token)
+
+            reply_started = time.perf_counter()
+            utils.handle_turn(scenario, "benchmark@example.com", user_input, on_token=on_token, memory=memory)
+            replied = time.perf_counter()
+            speaker.finish()
+            finished = time.perf_counter()
+
+            turn_latency.append(replied - started)
+            reply_times.append(replied - reply_started)
+            turn_total.append(finished - started)
+            if token_times:
+                first_token.append(token_times[0] - started)
+            if speaker.first_audio_at is not None:
+                first_audio.append(speaker.first_audio_at - started)
+
+        utils.booking_queue.flush(timeout=30)
+        utils.booking_queue.close()
+        utils.crm_store.close()
+        memory.wait_for_summary(timeout=30)
+
+        stream_timings = llm.stream_timings + (fallback.stream_timings if fallback is not None else [])
+        return {
+            "turns": self.turns,
+            "llm_streams": len(stream_timings),
+            "llm_calls": llm.calls,
+            "tts_calls": tts_client.calls,
+            "calendar_round_trips": len(calendar_service.timings),
+            "metrics": {
+                "turn_latency": summarize(turn_latency),
+                "time_to_first_token": summarize(first_token),
+                "time_to_first_audio": summarize(first_audio),
+                "turn_with_playback": summarize(turn_total),
+            },
+            "stages": {
+                "stt": summarize(speech_client.timings),
+                "reply": summarize(reply_times),
+                "llm_first_token": summarize([timing[0] for timing in stream_timings if timing[0] is not None]),
+                "llm_total": summarize([timing[1] for timing in stream_timings]),
+                "tts": summarize(tts_client.timings),
+                "calendar": summarize(calendar_service.timings),
+                "playback": summarize(playback.timings),
+            },
+            "caches": {
+                "tts": utils.tts_cache.stats() if utils.tts_cache is not None else None,
+                "response": utils.response_cache.stats() if utils.response_cache is not None else None,
+            },
+            "hedging": utils.hedge_policy.stats().get(scenario) if utils.hedge_policy is not None else None,
+        }
+
+    def _install_fakes(self, scenario):
+        scenario_dir = os.path.join(self.work_dir, scenario)
+        os.makedirs(scenario_dir, exist_ok=True)
+
+        speech_client = FakeSpeechClient(latency=self.stt)
+        llm = FakeLLM(replies=DEFAULT_REPLIES, first_token_latency=self.llm_first_token, token_latency=self.llm_token)
+        calendar_service = FakeCalendarService(latency=self.calendar)
+        tts_client = FakeTTSClient(latency=self.tts)
+        playback = FakePlayback(self.playback_speed, tts_client.bytes_per_char)
+
+        utils.speech_client = speech_client
+        utils.tts_client = tts_client
+        utils.llm = llm
+        utils.fallback_llm = None
+        utils.hedge_policy = None
+        if self.fallback_first_token is not None:
+            utils.fallback_llm = FakeLLM(replies=DEFAULT_REPLIES, first_token_latency=self.fallback_first_token,
+                                         token_latency=self.llm_token)
+            utils.hedge_policy = HedgePolicy(hedge_after=self.hedge_after, max_hedge_rate=1.0)
+        utils.calendar_service = calendar_service
+        utils.play_audio = playback
+        utils.slot_finder = SlotFinder(calendar_service)
+        utils.booking_queue = BookingQueue(calendar_service, batch_window=0.05)
+        utils.crm_store = CRMStore(db_path=os.path.join(scenario_dir, "crm.sqlite3"))
+        utils.tts_cache = TTSCache(cache_dir=os.path.join(scenario_dir, "tts_cache")) if self.caches else None
+        utils.response_cache = ResponseCache() if self.caches else None
+        return speech_client, tts_client, llm, calendar_service, playback
+
+    def _silent_wav(self):
+        # recognize_speech_from_file reads a real file; the fake ignores its content
+        path = os.path.join(self.work_dir, "utterance.wav")
+        if not os.path.exists(path):
+            with wave.open(path, "wb") as wav_file:
+                wav_file.setnchannels(1)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(16000)
+                wav_file.writeframes(bytes(3200))
+        return path
+
+    @staticmethod
+    def _save_utils():
+        names = ["speech_client", "tts_client", "llm", "fallback_llm", "hedge_policy", "calendar_service", "play_audio", "slot_finder",
+                 "booking_queue", "crm_store", "tts_cache", "response_cache"]
+        return {name: getattr(utils, name) for name in names}
+
+    @staticmethod
+    def _restore_utils(saved):
+        for name, value in saved.items():
+            setattr(utils, name, value)
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline):
+    """Print p50/p95 changes against an earlier benchmark JSON"""
+    for scenario, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        print(f"\n{scenario} vs {baseline.get('commit') or 'baseline'}:")
+        for section in ("metrics", "stages"):
+            for name, summary in current[section].items():
+                before = previous.get(section, {}).get(name, {})
+                for key in ("p50_ms", "p95_ms"):
+                    if summary.get(key) is None or before.get(key) is None:
+                        continue
+                    change = summary[key] - before[key]
+                    percent = f" ({change / before[key] * 100:+.1f}%)" if before[key] else ""
+                    print(f"  {name:22} {key}: {before[key]:9.1f} -> {summary[key]:9.1f}{percent}")
+
+
+def _latency(args, median_ms):
+    return LatencyModel(median_ms / 1000.0, args.jitter, distribution=args.distribution, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline turn-latency benchmark")
+    parser.add_argument("--turns", type=int, default=30, help="turns per scenario")
+    parser.add_argument("--scenarios", nargs="*", default=list(SYSTEM_PROMPTS))
+    parser.add_argument("--stt-ms", type=float, default=300)
+    parser.add_argument("--llm-first-token-ms", type=float, default=700)
+    parser.add_argument("--llm-token-ms", type=float, default=20)
+    parser.add_argument("--fallback-first-token-ms", type=float, help="simulate a fallback model and hedge to it")
+    parser.add_argument("--hedge-after-ms", type=float, help="hedge deadline (default: half the 2 s SLO)")
+    parser.add_argument("--tts-ms", type=float, default=250)
+    parser.add_argument("--calendar-ms", type=float, default=200)
+    parser.add_argument("--distribution", default="lognormal", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--jitter", type=float, default=0.3, help="spread of the latency distribution")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--playback-speed", type=float, default=20.0, help="simulated playback speed-up")
+    parser.add_argument("--caches", action="store_true", help="enable the TTS and response caches")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    benchmark = Benchmark(
+        turns=args.turns,
+        stt=_latency(args, args.stt_ms),
+        llm_first_token=_latency(args, args.llm_first_token_ms),
+        llm_token=_latency(args, args.llm_token_ms),
+        tts=_latency(args, args.tts_ms),
+        calendar=_latency(args, args.calendar_ms),
+        playback_speed=args.playback_speed,
+        caches=args.caches,
+        fallback_first_token=_latency(args, args.fallback_first_token_ms) if args.fallback_first_token_ms else None,
+        hedge_after=args.hedge_after_ms / 1000.0 if args.hedge_after_ms else None,
+    )
+    try:
+        scenarios = benchmark.run(args.scenarios)
+    finally:
+        shutil.rmtree(benchmark.work_dir, ignore_errors=True)
+
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": vars(args),
+        "scenarios": scenarios,
+    }
+    with open(args.output, "w", encoding="utf-8") as out:
+        json.dump(results, out, indent=2)
+
+    for scenario, result in scenarios.items():
+        metrics = result["metrics"]
+        print(f"{scenario}: turn p50 {metrics['turn_latency'].get('p50_ms')} ms, "
+              f"p95 {metrics['turn_latency'].get('p95_ms')} ms, "
+              f"first audio p50 {metrics['time_to_first_audio'].get('p50_ms')} ms "
+              f"({result['llm_streams']}/{result['turns']} turns reached the LLM)")
+        if result["hedging"]:
+            print(f"  hedged {result['hedging']['hedge_rate']:.0%} of LLM requests, "
+                  f"fallback won {result['hedging']['fallback_wins']}, "
+                  f"first-token SLO missed {result['hedging']['slo_miss_rate']:.0%}")
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            compare(results, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# booking_queue.py
+import time
+import atexit
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+
+import metrics
+import rate_limiter
+
+
+def idempotency_key(user_email, start_dt):
+    """Stable key for one customer in one slot"""
+    return f"{user_email.strip().lower()}|{start_dt.isoformat()}"
+
+
+def event_id_for(key):
+    # Calendar event ids use base32hex (0-9, a-v); hex digits are a subset.
+    # A deterministic id makes a retried insert fail with 409 instead of double-booking.
+    return "demo" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+class BookingResult:
+    """Outcome of a queued booking, passed to the submitter's callback"""
+    def __init__(self, key, user_email, status, link=None, error=None, attempts=0):
+        self.key = key
+        self.user_email = user_email
+        self.status = status
+        self.link = link
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def ok(self):
+        return self.status in ("booked", "duplicate")
+
+    def __repr__(self):
+        return f"BookingResult({self.user_email}, {self.status})"
+
+
+class _PendingBooking:
+    def __init__(self, key, user_email, body, callbacks):
+        self.key = key
+        self.user_email = user_email
+        self.body = body
+        self.callbacks = callbacks
+        self.attempts = 0
+        self.not_before = 0.0
+
+
+class BookingQueue:
+    """
+    Background Calendar booking queue.
+
+    `submit` returns at once; a worker thread groups pending bookings into
+    Calendar batch requests (one HTTP round trip for up to `batch_size`
+    inserts), retries failures with jittered backoff and reports each result
+    through the submitter's callback. Bookings are deduplicated by
+    (email, slot) both in memory and through a deterministic event id.
+    Only successful results are remembered (the newest `max_results`), so a
+    booking that failed can be submitted again and is retried.
+    """
+    def __init__(self, calendar_service, calendar_id="primary", batch_size=25, batch_window=0.3,
+                 max_attempts=4, base_backoff=1.0, max_results=10000):
+        self.calendar_service = calendar_service
+        self.calendar_id = calendar_id
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.pending = {}
+        self.results = OrderedDict()
+        self.max_results = max_results
+        self.batches_sent = 0
+        self.condition = threading.Condition()
+        self._stop = False
+        self.worker = threading.Thread(target=self._worker_loop, name="booking-queue")
+        self.worker.daemon = True
+        self.worker.start()
+        # Bookings the caller was already told about must not die with the daemon thread
+        atexit.register(self.close)
+
+    def submit(self, user_email, start_dt, body, callback=None):
+        """
+        Queue an event insert; returns the idempotency key.
+        Repeated submissions for the same email and slot are merged.
+        """
+        key = idempotency_key(user_email, start_dt)
+        with self.condition:
+            if key in self.results:
+                result = self.results[key]
+            elif key in self.pending:
+                if callback:
+                    self.pending[key].callbacks.append(callback)
+                return key
+            else:
+                body = dict(body, id=event_id_for(key))
+                self.pending[key] = _PendingBooking(key, user_email, body, [callback] if callback else [])
+                self.condition.notify()
+                return key
+        # Already finished: report straight away
+        if callback:
+            callback(result)
+        return key
+
+    def results_for(self, user_email):
+        """Remembered successful booking results for a customer"""
+        with self.condition:
+            return [result for result in self.results.values() if result.user_email == user_email]
+
+    def flush(self, timeout=None):
+        """Block until nothing is pending (used at shutdown and in tests)"""
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending, timeout)
+
+    def close(self, timeout=10.0):
+        """Send what is still pending (retries are not held back any longer), then stop the worker"""
+        with self.condition:
+            if self._stop:
+                return
+            for booking in self.pending.values():
+                booking.not_before = 0.0
+            self.condition.notify_all()
+        if not self.flush(timeout):
+            print(f"⚠️ {len(self.pending)} demo bookings were still pending at shutdown")
+        with self.condition:
+            self._stop = True
+            self.condition.notify_all()
+        self.worker.join(timeout=5)
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                while not self._stop and not self._ready():
+                    self.condition.wait(self._next_wait())
+                if self._stop:
+                    return
+            # Let a few more bookings arrive so they share one batch
+            time.sleep(self.batch_window)
+            with self.condition:
+                now = time.monotonic()
+                batch = [booking for booking in self.pending.values() if booking.not_before <= now]
+                batch = batch[:self.batch_size]
+            if batch:
+                self._send(batch)
+
+    def _ready(self):
+        now = time.monotonic()
+        return any(booking.not_before <= now for booking in self.pending.values())
+
+    def _next_wait(self):
+        if not self.pending:
+            return None
+        return max(0.01, min(booking.not_before for booking in self.pending.values()) - time.monotonic())
+
+    def _send(self, batch):
+        guard = rate_limiter.get_guard("calendar")
+        try:
+            guard.admit()
+        except (rate_limiter.CircuitOpenError, rate_limiter.RateLimited) as e:
+            # Calendar is down or throttled: hold the batch without spending an attempt
+            retry_at = time.monotonic() + max(guard.breaker.retry_after(), 1.0)
+            for booking in batch:
+                booking.not_before = retry_at
+            print(f"Booking batch deferred: {e}")
+            return
+
+        outcomes = {}
+
+        def on_response(request_id, response, exception):
+            outcomes[request_id] = (response, exception)
+
+        try:
+            http_batch = self.calendar_service.new_batch_http_request(callback=on_response)
+            for booking in batch:
+                booking.attempts += 1
+                request = self.calendar_service.events().insert(calendarId=self.calendar_id, body=booking.body)
+                http_batch.add(request, request_id=booking.key)
+            with metrics.span("calendar", operation="batch_insert"):
+                http_batch.execute()
+            self.batches_sent += 1
+        except Exception as e:
+            # Whole batch failed (network, auth); every booking gets retried
+            for booking in batch:
+                outcomes.setdefault(booking.key, (None, e))
+
+        provider_errors = [exception for _, exception in outcomes.values()
+                           if exception is not None and rate_limiter.classify(exception) in ("throttled", "server")]
+        if provider_errors:
+            guard.record_failure(provider_errors[0])
+        else:
+            guard.record_success()
+
+        for booking in batch:
+            response, exception = outcomes.get(booking.key, (None, RuntimeError("No response in batch")))
+            if exception is None:
+                self._finish(booking, "booked", link=(response or {}).get("htmlLink"))
+            elif _http_status(exception) == 409:
+                # Event id already exists: an earlier attempt went through
+                self._finish(booking, "duplicate")
+            elif booking.attempts >= self.max_attempts or _http_status(exception) in (400, 403, 404):
+                self._finish(booking, "failed", error=str(exception))
+            else:
+                delay = self.base_backoff * (2 ** (booking.attempts - 1))
+                booking.not_before = time.monotonic() + delay * random.uniform(0.5, 1.5)
+                print(f"Booking for {booking.user_email} failed (attempt {booking.attempts}), retrying: {exception}")
+
+    def _finish(self, booking, status, link=None, error=None):
+        result = BookingResult(booking.key, booking.user_email, status, link=link, error=error,
+                               attempts=booking.attempts)
+        with self.condition:
+            self.pending.pop(booking.key, None)
+            if result.ok:
+                self.results[booking.key] = result
+                self.results.move_to_end(booking.key)
+                while len(self.results) > self.max_results:
+                    self.results.popitem(last=False)
+            self.condition.notify_all()
+        for callback in booking.callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"Error in booking callback: {e}")
+
+
+def _http_status(exception):
+    response = getattr(exception, "resp", None)
+    status = getattr(response, "status", None)
+    return int(status) if status is not None else None
@@ -0,0 +1,200 @@
+# call_session.py
+import os
+import uuid
+import asyncio
+import time
+from abc import ABC, abstractmethod
+
+import utils
+import metrics
+from startup import lazy_module
+from conversation_memory import ConversationMemory
+from system_prompts import INITIAL_GREETINGS, DEFAULT_GREETING
+
+speech = lazy_module("google.cloud.speech")
+texttospeech = lazy_module("google.cloud.texttospeech")
+
+
+class AudioIO(ABC):
+    """
+    Audio endpoints for one call. Subclasses connect a session to a phone line,
+    a socket or a set of files.
+    """
+    @abstractmethod
+    async def capture(self):
+        """Return the next utterance as WAV/LINEAR16 bytes, or None once the call has ended"""
+
+    @abstractmethod
+    async def play(self, audio_content):
+        """Play synthesized LINEAR16 (WAV) bytes to the callee"""
+
+
+class FileAudioIO(AudioIO):
+    """
+    Reads caller utterances from WAV files and writes agent replies to an output folder.
+    Useful for replaying recorded calls offline.
+    """
+    def __init__(self, input_paths, output_dir="session_output"):
+        self.input_paths = list(input_paths)
+        self.output_dir = output_dir
+        self.played = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    async def capture(self):
+        if not self.input_paths:
+            return None
+        path = self.input_paths.pop(0)
+        return await asyncio.to_thread(self._read, path)
+
+    async def play(self, audio_content):
+        output_path = os.path.join(self.output_dir, f"reply_{self.played:03d}.wav")
+        self.played += 1
+        await asyncio.to_thread(self._write, output_path, audio_content)
+
+    @staticmethod
+    def _read(path):
+        with open(path, "rb") as audio_file:
+            return audio_file.read()
+
+    @staticmethod
+    def _write(path, audio_content):
+        with open(path, "wb") as out:
+            out.write(audio_content)
+
+
+class CallSession:
+    """
+    Per-call state: scenario, callee, conversation history and audio endpoints.
+    `history` is the full transcript; `memory` is the token-budgeted view sent to the model.
+    """
+    def __init__(self, scenario, user_email, audio_io, language_code="hi-IN", max_turns=50, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex[:8]
+        self.scenario = scenario
+        self.user_email = user_email
+        self.audio_io = audio_io
+        self.language_code = language_code
+        self.max_turns = max_turns
+        self.history = []
+        # Calendar bookings requested during the call, filled in as the queue reports back
+        self.bookings = []
+        self.memory = ConversationMemory(summarizer=utils.summarize_conversation)
+        self.turns = 0
+        self.started_at = None
+        self.ended_at = None
+        self.error = None
+
+    def add_message(self, role, content):
+        self.history.append({"role": role, "content": content})
+
+
+class CallEngine:
+    """
+    Runs many CallSessions concurrently on one asyncio event loop.
+
+    STT, LLM and TTS waits use the async Google and OpenAI clients, so while one
+    session waits on the network the others keep going. The blocking scenario
+    side effects (calendar booking, CRM logging) run in the default executor.
+
+    `api_limits` caps how many requests each API has in flight across all
+    sessions, e.g. {"stt": 20, "llm": 10, "tts": 20, "side_effects": 8}.
+    """
+    def __init__(self, max_concurrent_sessions=50, api_limits=None):
+        self.max_concurrent_sessions = max_concurrent_sessions
+        self.api_limits = dict(api_limits or {})
+        self.sessions = []
+        self._limits = None
+
+    def _ensure_limits(self):
+        # Semaphores are created inside the running loop
+        if self._limits is None:
+            self._limits = {name: asyncio.Semaphore(limit) for name, limit in self.api_limits.items() if limit}
+
+    async def _call_api(self, name, awaitable):
+        """Await a request, waiting for a free slot of that API first"""
+        semaphore = self._limits.get(name) if self._limits else None
+        if semaphore is None:
+            return await awaitable
+        async with semaphore:
+            return await awaitable
+
+    async def run(self, sessions):
+        """Run all sessions to completion and return them"""
+        self._ensure_async_clients()
+        self._ensure_limits()
+        semaphore = asyncio.Semaphore(self.max_concurrent_sessions)
+
+        async def bounded(session):
+            async with semaphore:
+                await self.run_session(session)
+
+        self.sessions.extend(sessions)
+        await asyncio.gather(*(bounded(session) for session in sessions))
+        return sessions
+
+    async def run_session(self, session):
+        """Drive one call from greeting to hang-up"""
+        session.started_at = time.time()
+        self._ensure_limits()
+        try:
+            greeting = INITIAL_GREETINGS.get(session.scenario, DEFAULT_GREETING)
+            session.add_message("assistant", greeting)
+            session.memory.add_message("assistant", greeting)
+            await self._speak(session, greeting)
+
+            while session.turns < session.max_turns:
+                with metrics.turn(session.scenario, session.session_id):
+                    with metrics.span("capture"):
+                        audio = await session.audio_io.capture()
+                    if audio is None:
+                        break
+
+                    user_input = await self._call_api("stt", utils.arecognize_speech(audio, language_code=session.language_code))
+                    if user_input and user_input.lower() in utils.EXIT_COMMANDS:
+                        break
+
+                    session.turns += 1
+                    session.add_message("user", user_input)
+                    # Same steps as utils.handle_turn: the reply, then the scenario's booking and CRM
+                    # side effects, which also run for an empty utterance
+                    ai_response = await self._call_api(
+                        "llm", utils.aget_ai_response(user_input, scenario=session.scenario, memory=session.memory)
+                    )
+                    ai_response = await self._call_api("side_effects", asyncio.to_thread(
+                        utils.complete_turn, session.scenario, session.user_email, user_input, ai_response,
+                        session.bookings.append
+                    ))
+                    session.add_message("assistant", ai_response)
+                    await self._speak(session, ai_response)
+        except Exception as e:
+            session.error = str(e)
+            print(f"Error in call session {session.session_id}: {e}")
+        finally:
+            session.ended_at = time.time()
+        return session
+
+    async def _speak(self, session, text):
+        audio_content = await self._call_api("tts", utils.asynthesize_audio(text, language_code=session.language_code))
+        if audio_content:
+            with metrics.span("playback"):
+                await session.audio_io.play(audio_content)
+
+    @staticmethod
+    def _ensure_async_clients():
+        # gRPC asyncio channels are bound to the running loop, so they are built here
+        if utils.async_speech_client is None:
+            utils.async_speech_client = speech.SpeechAsyncClient()
+        if utils.async_tts_client is None:
+            utils.async_tts_client = texttospeech.TextToSpeechAsyncClient()
+
+
+def run_sessions(sessions, max_concurrent_sessions=50):
+    """
+    Blocking entry point: runs the sessions on a fresh event loop
+    """
+    engine = CallEngine(max_concurrent_sessions=max_concurrent_sessions)
+    try:
+        return asyncio.run(engine.run(sessions))
+    finally:
+        # The async clients cannot outlive the loop they were created on
+        utils.async_speech_client = None
+        utils.async_tts_client = None
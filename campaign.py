@@ -0,0 +1,218 @@
+# campaign.py
+"""
+Headless outbound campaign: runs a lead list through the CallEngine with a
+bounded pool of workers, no keyboard or window needed.
+
+    python campaign.py leads.csv --workers 20 --results campaign_results.jsonl
+    python campaign.py leads.jsonl --workers 50 --llm-limit 20 --tts-limit 30
+
+Leads are CSV or JSONL rows with `name`, `email` and `scenario` (plus an
+optional `id`, and `audio`: a directory or ';'-separated WAV files the
+default FileAudioIO replays as the callee). Every finished lead is appended
+to the results file straight away. On restart, leads that already have a
+"completed" line are skipped and failed ones are tried again.
+"""
+import os
+import csv
+import json
+import glob
+import time
+import asyncio
+import hashlib
+import argparse
+
+import utils
+from call_session import CallEngine, CallSession, FileAudioIO
+from system_prompts import SYSTEM_PROMPTS
+
+DEFAULT_SCENARIO = "demo_scheduling"
+
+
+def lead_id(lead):
+    """Stable id for checkpointing: the lead's own id, else a hash of email + scenario"""
+    if lead.get("id"):
+        return str(lead["id"])
+    raw = f"{lead.get('email', '').strip().lower()}|{lead.get('scenario', DEFAULT_SCENARIO)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def load_leads(path):
+    """Read leads from a .csv or .jsonl file, filling in the id and default scenario"""
+    leads = []
+    with open(path, "r", encoding="utf-8", newline="") as lead_file:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in lead_file if line.strip())
+        else:
+            rows = csv.DictReader(lead_file)
+        for row in rows:
+            lead = {key.strip(): (value.strip() if isinstance(value, str) else value)
+                    for key, value in row.items() if key}
+            if not lead.get("scenario"):
+                lead["scenario"] = DEFAULT_SCENARIO
+            if lead["scenario"] not in SYSTEM_PROMPTS:
+                print(f"⚠️ Unknown scenario '{lead['scenario']}' for {lead.get('email')}, using {DEFAULT_SCENARIO}")
+                lead["scenario"] = DEFAULT_SCENARIO
+            lead["id"] = lead_id(lead)
+            leads.append(lead)
+    return leads
+
+
+def load_checkpoint(results_path):
+    """Ids of leads that already completed, read from an earlier results file"""
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, "r", encoding="utf-8") as results_file:
+        for line in results_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn last line from an interrupted run
+            if record.get("status") == "completed":
+                completed.add(record["lead_id"])
+    return completed
+
+
+def file_audio_factory(output_root):
+    """Default AudioIO: replay the lead's recorded utterances, write replies under output_root/<lead id>"""
+    def factory(lead):
+        audio = lead.get("audio") or ""
+        if audio and os.path.isdir(audio):
+            inputs = sorted(glob.glob(os.path.join(audio, "*.wav")))
+        else:
+            inputs = [path for path in audio.split(";") if path]
+        return FileAudioIO(inputs, output_dir=os.path.join(output_root, lead["id"]))
+    return factory
+
+
+class CampaignRunner:
+    """
+    Pulls leads from a queue with `workers` concurrent sessions on one event
+    loop. Per-API concurrency caps are enforced by the CallEngine, so adding
+    workers raises throughput until one of the APIs is saturated.
+    """
+    def __init__(self, leads, results_path="campaign_results.jsonl", workers=10, api_limits=None,
+                 audio_factory=None, output_root="campaign_output", max_turns=50):
+        self.leads = leads
+        self.results_path = results_path
+        self.workers = workers
+        self.engine = CallEngine(max_concurrent_sessions=workers, api_limits=api_limits)
+        self.audio_factory = audio_factory or file_audio_factory(output_root)
+        self.max_turns = max_turns
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def run(self):
+        """Blocking entry point; returns a summary dict"""
+        try:
+            return asyncio.run(self._run())
+        finally:
+            # The async clients cannot outlive the loop they were created on
+            utils.async_speech_client = None
+            utils.async_tts_client = None
+
+    async def _run(self):
+        done = load_checkpoint(self.results_path)
+        pending = asyncio.Queue()
+        for lead in self.leads:
+            if lead["id"] in done:
+                self.skipped += 1
+            else:
+                pending.put_nowait(lead)
+        print(f"📋 Campaign: {pending.qsize()} leads to call, {self.skipped} already completed, {self.workers} workers")
+
+        self.engine._ensure_async_clients()
+        started = time.time()
+        with open(self.results_path, "a+", encoding="utf-8", buffering=1) as results_file:
+            if results_file.tell() > 0:
+                results_file.seek(results_file.tell() - 1)
+                if results_file.read(1) != "\n":
+                    # Close off a line cut short by a crash so the next record starts clean
+                    results_file.write("\n")
+            workers = [asyncio.create_task(self._worker(pending, results_file)) for _ in range(self.workers)]
+            await asyncio.gather(*workers)
+        elapsed = time.time() - started
+
+        calls = self.completed + self.failed
+        summary = {
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(elapsed, 1),
+            "calls_per_hour": round(calls * 3600 / elapsed, 1) if elapsed > 0 else None,
+        }
+        print(f"✅ Campaign finished: {summary}")
+        return summary
+
+    async def _worker(self, pending, results_file):
+        while True:
+            try:
+                lead = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            session = CallSession(lead["scenario"], lead.get("email", ""), self.audio_factory(lead),
+                                  max_turns=self.max_turns)
+            await self.engine.run_session(session)
+            self._record(results_file, lead, session)
+
+    def _record(self, results_file, lead, session):
+        status = "failed" if session.error else "completed"
+        if session.error:
+            self.failed += 1
+        else:
+            self.completed += 1
+        record = {
+            "lead_id": lead["id"],
+            "name": lead.get("name"),
+            "email": lead.get("email"),
+            "scenario": lead["scenario"],
+            "session_id": session.session_id,
+            "status": status,
+            "turns": session.turns,
+            "bookings": len(session.bookings),
+            "error": session.error,
+            "started_at": session.started_at,
+            "ended_at": session.ended_at,
+            "duration_seconds": round(session.ended_at - session.started_at, 2),
+        }
+        # One line per lead, written as soon as it finishes, is the checkpoint
+        results_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"📞 {lead.get('name') or lead.get('email')}: {status} after {session.turns} turns")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an outbound calling campaign without the UI")
+    parser.add_argument("leads", help="CSV or JSONL lead list (name, email, scenario)")
+    parser.add_argument("--results", default="campaign_results.jsonl", help="per-lead outcomes, also the checkpoint")
+    parser.add_argument("--workers", type=int, default=10, help="calls in progress at once")
+    parser.add_argument("--stt-limit", type=int, default=20, help="concurrent speech recognition requests")
+    parser.add_argument("--llm-limit", type=int, default=10, help="concurrent LLM requests")
+    parser.add_argument("--tts-limit", type=int, default=20, help="concurrent speech synthesis requests")
+    parser.add_argument("--side-effect-limit", type=int, default=8, help="concurrent calendar/CRM updates")
+    parser.add_argument("--max-turns", type=int, default=50)
+    parser.add_argument("--output-dir", default="campaign_output", help="where replies are written per lead")
+    args = parser.parse_args()
+
+    from main import initialize_services
+    if not initialize_services():
+        print("Failed to initialize services. Exiting...")
+        return
+
+    runner = CampaignRunner(
+        load_leads(args.leads),
+        results_path=args.results,
+        workers=args.workers,
+        api_limits={"stt": args.stt_limit, "llm": args.llm_limit, "tts": args.tts_limit,
+                    "side_effects": args.side_effect_limit},
+        output_root=args.output_dir,
+        max_turns=args.max_turns,
+    )
+    runner.run()
+    if utils.booking_queue is not None:
+        # Let queued calendar inserts land before exiting
+        utils.booking_queue.flush(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# connection_manager.py
+"""
+Long-lived connections for the Google Speech/TTS clients and the LLM.
+
+The manager owns one gRPC channel per Google API, created with keepalive
+pings, and a pooled httpx client for the OpenAI API. A background thread
+checks every connection on an interval. After an idle gap between calls,
+the first request then finds a connection that is already open, and no
+TLS or HTTP/2 setup is left to pay.
+"""
+import time
+import atexit
+import threading
+
+import metrics
+
+
+class ConnectionManager:
+    def __init__(self, keepalive_time_ms=30000, keepalive_timeout_ms=10000,
+                 pool_size=10, keepalive_connections=5, keepalive_expiry=300.0,
+                 health_check_interval=45.0, connect_timeout=10.0,
+                 llm_base_url="https://api.openai.com/v1", llm_api_key=None):
+        self.keepalive_time_ms = keepalive_time_ms
+        self.keepalive_timeout_ms = keepalive_timeout_ms
+        self.pool_size = pool_size
+        self.keepalive_connections = keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.health_check_interval = health_check_interval
+        self.connect_timeout = connect_timeout
+        self.llm_base_url = llm_base_url.rstrip("/")
+        self.llm_api_key = llm_api_key
+
+        self.channels = {}
+        # Per-connection counters: state, checks, failures, reconnects, last check latency
+        self.status = {}
+        self._http_client = None
+        self._async_http_client = None
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._keepalive_thread = None
+        atexit.register(self.close)
+
+    # ---- gRPC channels ---------------------------------------------------
+
+    def grpc_options(self):
+        return [
+            ("grpc.keepalive_time_ms", self.keepalive_time_ms),
+            ("grpc.keepalive_timeout_ms", self.keepalive_timeout_ms),
+            # Keep pinging between calls, when no RPC is in flight
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+            # Same unlimited message sizes the generated transports use by default
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+        ]
+
+    def _channel(self, name, client_class):
+        """Create (once) a keepalive channel for a generated Google client class"""
+        with self.lock:
+            if name in self.channels:
+                return self.channels[name]
+            transport_class = client_class.get_transport_class("grpc")
+            host = transport_class.DEFAULT_HOST
+            if ":" not in host:
+                host += ":443"
+            channel = transport_class.create_channel(host, options=self.grpc_options())
+            self.channels[name] = (channel, transport_class)
+            self.status[name] = {"state": "IDLE", "checks": 0, "failures": 0, "reconnects": 0, "last_check_ms": None}
+        # Outside the lock: gRPC may report the current state right away
+        channel.subscribe(lambda state, name=name: self._on_state(name, state))
+        return channel, transport_class
+
+    def _on_state(self, name, state):
+        state_name = getattr(state, "name", str(state))
+        with self.lock:
+            status = self.status.get(name)
+            if status is None:
+                return
+            if status["state"] in ("TRANSIENT_FAILURE", "IDLE") and state_name == "READY" and status["checks"]:
+                status["reconnects"] += 1
+            status["state"] = state_name
+
+    def speech_client(self):
+        """A SpeechClient sharing the managed channel"""
+        from google.cloud import speech
+        channel, transport_class = self._channel("speech", speech.SpeechClient)
+        return speech.SpeechClient(transport=transport_class(channel=channel))
+
+    def tts_client(self):
+        """A TextToSpeechClient sharing the managed channel"""
+        from google.cloud import texttospeech
+        channel, transport_class = self._channel("tts", texttospeech.TextToSpeechClient)
+        return texttospeech.TextToSpeechClient(transport=transport_class(channel=channel))
+
+    # ---- LLM HTTP pool ---------------------------------------------------
+
+    def _limits(self):
+        import httpx
+        return httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def http_client(self):
+        """Pooled synchronous client, passed to ChatOpenAI as http_client"""
+        import httpx
+        with self.lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(limits=self._limits(), timeout=httpx.Timeout(60.0, connect=self.connect_timeout))
+                self.status["llm"] = {"state": "IDLE", "checks": 0, "failures": 0, "reconnects": 0, "last_check_ms": None}
+            return self._http_client
+
+    def async_http_client(self):
+        """Pooled asyncio client, passed to ChatOpenAI as http_async_client"""
+        import httpx
+        with self.lock:
+            if self._async_http_client is None:
+                self._async_http_client = httpx.AsyncClient(limits=self._limits(), timeout=httpx.Timeout(60.0, connect=self.connect_timeout))
+            return self._async_http_client
+
+    # ---- Health checks ---------------------------------------------------
+
+    def check_health(self):
+        """
+        Open (or confirm) every connection. Returns {name: True/False}.
+        gRPC channels are healthy once READY; the LLM pool once the API
+        answers a lightweight request without a server error.
+        """
+        results = {}
+        for name in list(self.channels):
+            results[name] = self._check(name, self._check_channel)
+        if self._http_client is not None:
+            results["llm"] = self._check("llm", self._check_llm)
+        return results
+
+    def _check(self, name, check):
+        started = time.perf_counter()
+        try:
+            check(name)
+            healthy = True
+        except Exception as e:
+            print(f"⚠️ Connection check failed for {name}: {e}")
+            healthy = False
+        elapsed = time.perf_counter() - started
+        metrics.observe("connection_check", elapsed, target=name, outcome="ok" if healthy else "error")
+        with self.lock:
+            status = self.status[name]
+            status["checks"] += 1
+            status["last_check_ms"] = round(elapsed * 1000.0, 1)
+            if not healthy:
+                status["failures"] += 1
+        return healthy
+
+    def _check_channel(self, name):
+        import grpc
+        channel, _ = self.channels[name]
+        # Blocks until the channel is connected (TLS + HTTP/2 handshake done)
+        grpc.channel_ready_future(channel).result(timeout=self.connect_timeout)
+
+    def _check_llm(self, name):
+        headers = {"Authorization": f"Bearer {self.llm_api_key}"} if self.llm_api_key else {}
+        response = self._http_client.get(f"{self.llm_base_url}/models", headers=headers)
+        if response.status_code >= 500:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        with self.lock:
+            self.status["llm"]["state"] = "READY"
+
+    def start_keepalive(self):
+        """Re-check all connections every health_check_interval seconds in a daemon thread"""
+        if self._keepalive_thread is not None or not self.health_check_interval:
+            return
+        self._keepalive_thread = threading.Thread(target=self._keepalive_loop, name="connection-keepalive")
+        self._keepalive_thread.daemon = True
+        self._keepalive_thread.start()
+
+    def _keepalive_loop(self):
+        while not self._stop_event.wait(self.health_check_interval):
+            self.check_health()
+
+    # ---- Stats -----------------------------------------------------------
+
+    def stats(self):
+        """{name: {...}} with connection state and check counters; the LLM entry adds pool usage"""
+        with self.lock:
+            stats = {name: dict(status) for name, status in self.status.items()}
+        if "llm" in stats:
+            stats["llm"].update(self._pool_stats(self._http_client))
+        return stats
+
+    def _pool_stats(self, client):
+        # httpx keeps its connections in the underlying httpcore pool
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "pool_size": self.pool_size,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+        }
+
+    def format_stats(self):
+        lines = ["Connection pools:"]
+        for name, status in self.stats().items():
+            line = f"  {name:8} {status['state']:18} checks={status['checks']} failures={status['failures']} reconnects={status['reconnects']}"
+            if status["last_check_ms"] is not None:
+                line += f" last_check={status['last_check_ms']:.0f}ms"
+            if "open_connections" in status:
+                line += f" open={status['open_connections']}/{status['pool_size']} idle={status['idle_connections']}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def close(self):
+        self._stop_event.set()
+        with self.lock:
+            channels = [channel for channel, _ in self.channels.values()]
+            self.channels = {}
+            http_client, self._http_client = self._http_client, None
+            # The async client is closed with its event loop
+            self._async_http_client = None
+        for channel in channels:
+            channel.close()
+        if http_client is not None:
+            http_client.close()
@@ -0,0 +1,135 @@
+# conversation_memory.py
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared by all conversations; summaries are small, infrequent LLM calls
+_summary_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="summary")
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate: ~4 Latin characters per token, while Devanagari
+    splits into roughly one token per two characters
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_chars = len(text) - non_ascii
+    return math.ceil(ascii_chars / 4) + math.ceil(non_ascii / 2) + 4
+
+
+class ConversationMemory:
+    """
+    Per-call conversation history kept within a token budget.
+
+    Recent turns are sent to the model verbatim. When they no longer fit, the
+    oldest turns are dropped from the prompt straight away and folded into a
+    running summary by a background summarizer, so the turn that overflowed
+    never waits on it. The prompt therefore stays bounded however long the call runs.
+    """
+    def __init__(self, token_budget=1200, summary_token_budget=250, min_recent_messages=2, summarizer=None):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.min_recent_messages = min_recent_messages
+        # summarizer(previous_summary, messages) -> new summary text
+        self.summarizer = summarizer
+        self.summary = ""
+        self.recent = []
+        self.pending = []
+        self.folded_messages = 0
+        self.lock = threading.Lock()
+        self.folded = threading.Condition(self.lock)
+        self._folding = False
+
+    def add_message(self, role, content):
+        """Append a message and trim the verbatim window to the budget"""
+        with self.lock:
+            self.recent.append({"role": role, "content": content, "tokens": estimate_tokens(content)})
+            self._trim()
+
+    def revise_last(self, role, content):
+        """Replace the newest message of a role, e.g. with the part of a reply the callee actually heard"""
+        with self.lock:
+            for message in reversed(self.recent):
+                if message["role"] == role:
+                    message["content"] = content
+                    message["tokens"] = estimate_tokens(content)
+                    return True
+            return False
+
+    def add_turn(self, user_input, ai_response):
+        self.add_message("user", user_input)
+        self.add_message("assistant", ai_response)
+
+    def messages(self):
+        """Messages to place between the system prompt and the new user input"""
+        with self.lock:
+            messages = []
+            if self.summary:
+                messages.append({"role": "system", "content": f"Ab tak ki baatcheet ka summary: {self.summary}"})
+            messages.extend({"role": m["role"], "content": m["content"]} for m in self.recent)
+            return messages
+
+    def prompt_tokens(self):
+        """Estimated tokens this memory adds to each request"""
+        with self.lock:
+            return estimate_tokens(self.summary) + sum(m["tokens"] for m in self.recent)
+
+    def wait_for_summary(self, timeout=None):
+        """Block until evicted turns have been folded into the summary"""
+        with self.folded:
+            return self.folded.wait_for(lambda: not self._folding and not self.pending, timeout)
+
+    def _recent_budget(self):
+        return self.token_budget - min(estimate_tokens(self.summary), self.summary_token_budget)
+
+    def _trim(self):
+        budget = self._recent_budget()
+        evicted = False
+        while (len(self.recent) > self.min_recent_messages
+               and sum(m["tokens"] for m in self.recent) > budget):
+            self.pending.append(self.recent.pop(0))
+            evicted = True
+        if evicted:
+            self._schedule_fold()
+
+    def _schedule_fold(self):
+        if self._folding or not self.pending:
+            return
+        if self.summarizer is None:
+            # No summarizer configured: older turns are simply forgotten
+            self.folded_messages += len(self.pending)
+            self.pending = []
+            return
+        self._folding = True
+        _summary_executor.submit(self._fold)
+
+    def _fold(self):
+        with self.lock:
+            batch = [{"role": m["role"], "content": m["content"]} for m in self.pending]
+            previous = self.summary
+        try:
+            summary = self.summarizer(previous, batch)
+        except Exception as e:
+            print(f"Error summarizing conversation: {e}")
+            summary = previous
+        with self.lock:
+            self.summary = self._clip(summary or previous)
+            self.pending = self.pending[len(batch):]
+            self.folded_messages += len(batch)
+            self._folding = False
+            # A longer summary leaves less room for verbatim turns
+            self._trim()
+            # Turns evicted while this summary was being written
+            self._schedule_fold()
+            self.folded.notify_all()
+
+    def _clip(self, summary):
+        limit = self.summary_token_budget
+        if estimate_tokens(summary) <= limit:
+            return summary
+        words = summary.split()
+        while words and estimate_tokens(" ".join(words)) > limit:
+            words = words[:-max(1, len(words) // 10)]
+        return " ".join(words)
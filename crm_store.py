@@ -0,0 +1,204 @@
+# crm_store.py
+import os
+import re
+import sys
+import queue
+import atexit
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    name TEXT,
+    email TEXT,
+    scenario TEXT,
+    interaction TEXT,
+    outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_email ON interactions (email, timestamp);
+CREATE INDEX IF NOT EXISTS idx_interactions_scenario ON interactions (scenario, timestamp);
+CREATE INDEX IF NOT EXISTS idx_interactions_timestamp ON interactions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_interactions_outcome ON interactions (outcome, scenario);
+"""
+
+INSERT = ("INSERT INTO interactions (timestamp, name, email, scenario, interaction, outcome) "
+          "VALUES (?, ?, ?, ?, ?, ?)")
+
+# Skips rows already present, so importing the same log twice adds nothing (served by idx_interactions_email)
+INSERT_MISSING = ("INSERT INTO interactions (timestamp, name, email, scenario, interaction, outcome) "
+                  "SELECT ?, ?, ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM interactions "
+                  "WHERE email IS ?3 AND timestamp = ?1 AND scenario IS ?4 AND interaction IS ?5)")
+
+# "<datetime> - <name> (<email>) - <scenario>: <interaction>" as written by the old text log
+LOG_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:\.\d+)?) - (.*?) \(([^()]*)\) - (\w+): (.*)$")
+
+
+class CRMStore:
+    """
+    SQLite-backed CRM log (WAL mode) with a write-behind writer thread.
+
+    `record` only enqueues the row, so callers never wait on disk I/O. The
+    writer drains the queue in batches and commits each batch in a single
+    transaction (group commit). Reads use their own per-thread connections and
+    can run while the writer is active.
+    """
+    def __init__(self, db_path=os.path.join("crm_data", "crm.sqlite3"), batch_size=500, flush_interval=0.2):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue()
+        self.rows_written = 0
+        self.commits = 0
+        self._local = threading.local()
+        self._closed = False
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+
+        self.writer_thread = threading.Thread(target=self._writer_loop, name="crm-writer")
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+        atexit.register(self.close)
+
+    def record(self, name, email, interaction, scenario, outcome=None, timestamp=None):
+        """Queue an interaction for writing; returns immediately"""
+        if self._closed:
+            # The writer thread is gone, so the row would never be written and flush() would hang
+            raise RuntimeError("CRM store is closed")
+        if timestamp is None:
+            timestamp = datetime.now().isoformat(sep=" ")
+        self.queue.put((timestamp, name, email, scenario, interaction, outcome))
+
+    def flush(self):
+        """Block until every queued interaction has been committed"""
+        self.queue.join()
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(None)
+        self.writer_thread.join(timeout=10)
+
+    def interactions_for(self, email, limit=50):
+        """Most recent interactions with a customer, newest first"""
+        rows = self._connect().execute(
+            "SELECT timestamp, name, email, scenario, interaction, outcome FROM interactions "
+            "WHERE email = ? ORDER BY timestamp DESC LIMIT ?",
+            (email, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def last_contact(self, email):
+        """Timestamp of the latest interaction with a customer, or None"""
+        row = self._connect().execute(
+            "SELECT MAX(timestamp) AS last FROM interactions WHERE email = ?", (email,)
+        ).fetchone()
+        return row["last"] if row else None
+
+    def outcomes(self, scenario=None, since=None):
+        """Count of interactions per recorded outcome, optionally per scenario / since a timestamp"""
+        query = "SELECT outcome, COUNT(*) AS total FROM interactions WHERE outcome IS NOT NULL"
+        params = []
+        if scenario:
+            query += " AND scenario = ?"
+            params.append(scenario)
+        if since:
+            query += " AND timestamp >= ?"
+            params.append(since)
+        query += " GROUP BY outcome"
+        return {row["outcome"]: row["total"] for row in self._connect().execute(query, params)}
+
+    def count(self, scenario=None):
+        if scenario:
+            row = self._connect().execute("SELECT COUNT(*) FROM interactions WHERE scenario = ?", (scenario,)).fetchone()
+        else:
+            row = self._connect().execute("SELECT COUNT(*) FROM interactions").fetchone()
+        return row[0]
+
+    def import_text_log(self, path=os.path.join("crm_data", "customer_interactions.txt")):
+        """
+        Import of the old append-only text log. Lines that do not start a new
+        record are treated as continuations of the previous interaction.
+        Interactions already in the store are skipped, so running it again (or
+        on a log that has grown since) only adds what is new.
+        Returns the number of imported interactions.
+        """
+        rows = []
+        with open(path, "r", encoding="utf-8") as log_file:
+            for line in log_file:
+                line = line.rstrip("\n")
+                match = LOG_LINE.match(line)
+                if match:
+                    timestamp, name, email, scenario, interaction = match.groups()
+                    rows.append([timestamp, name, email, scenario, interaction, None])
+                elif rows:
+                    rows[-1][4] += "\n" + line
+
+        connection = self._connect()
+        with connection:
+            before = connection.total_changes
+            connection.executemany(INSERT_MISSING, rows)
+            imported = connection.total_changes - before
+        return imported
+
+    def _connect(self):
+        # sqlite3 connections are per thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _writer_loop(self):
+        connection = self._connect()
+        running = True
+        while running:
+            item = self.queue.get()
+            batch = []
+            if item is None:
+                running = False
+            else:
+                batch.append(item)
+            # Collect whatever else arrives within the flush window
+            while running and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            if batch:
+                try:
+                    with connection:
+                        connection.executemany(INSERT, batch)
+                    self.rows_written += len(batch)
+                    self.commits += 1
+                except sqlite3.Error as e:
+                    print(f"Error writing CRM batch of {len(batch)}: {e}")
+            for _ in range(len(batch) + (0 if running else 1)):
+                self.queue.task_done()
+        connection.close()
+
+
+if __name__ == "__main__":
+    # python crm_store.py [path/to/customer_interactions.txt]
+    log_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("crm_data", "customer_interactions.txt")
+    store = CRMStore()
+    imported = store.import_text_log(log_path)
+    store.close()
+    print(f"Imported {imported} interactions from {log_path} into {store.db_path}")
@@ -0,0 +1,358 @@
+# fakes.py
+"""
+Local stand-ins for the Google and OpenAI clients so the pipeline can be
+exercised offline. They mimic only the parts of each client API used by this project.
+"""
+import time
+import math
+import random
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytz
+
+# Same value as speech.StreamingRecognizeResponse.SpeechEventType.END_OF_SINGLE_UTTERANCE
+END_OF_SINGLE_UTTERANCE = 1
+SPEECH_EVENT_UNSPECIFIED = 0
+
+
+class LatencyModel:
+    """
+    Samples simulated network/service delays in seconds.
+
+    distribution: "fixed" (always `median`), "uniform" (median +/- spread),
+    "normal" (stddev `spread`) or "lognormal" (median `median`, log-space sigma `spread`,
+    which gives the long right tail real API latencies have).
+    """
+    def __init__(self, median=0.0, spread=0.0, distribution="lognormal", minimum=0.0, seed=None):
+        self.median = median
+        self.spread = spread
+        self.distribution = distribution
+        self.minimum = minimum
+        self.random = random.Random(seed)
+
+    def sample(self):
+        if self.distribution == "fixed" or not self.spread:
+            value = self.median
+        elif self.distribution == "uniform":
+            value = self.random.uniform(self.median - self.spread, self.median + self.spread)
+        elif self.distribution == "normal":
+            value = self.random.gauss(self.median, self.spread)
+        elif self.distribution == "lognormal":
+            value = self.median * math.exp(self.random.gauss(0.0, self.spread))
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.distribution}")
+        return max(self.minimum, value)
+
+
+def sample_latency(latency):
+    """Seconds for a latency given as a number or a LatencyModel"""
+    if isinstance(latency, LatencyModel):
+        return latency.sample()
+    return latency or 0.0
+
+
+def _sleep(latency):
+    delay = sample_latency(latency)
+    if delay:
+        time.sleep(delay)
+    return delay
+
+
+def _streaming_response(transcript=None, is_final=False, stability=0.0, speech_event_type=SPEECH_EVENT_UNSPECIFIED):
+    results = []
+    if transcript is not None:
+        results.append(SimpleNamespace(
+            alternatives=[SimpleNamespace(transcript=transcript, confidence=0.9)],
+            is_final=is_final,
+            stability=stability,
+        ))
+    return SimpleNamespace(results=results, speech_event_type=speech_event_type)
+
+
+class FakeSpeechClient:
+    """
+    Offline replacement for speech.SpeechClient.
+
+    `streaming_recognize` consumes the request stream and reveals the scripted
+    transcript one word every `frames_per_word` audio frames as interim results,
+    then sends END_OF_SINGLE_UTTERANCE and the final result once the audio stops
+    (or `end_after_frames` frames have been read, mimicking server-side endpointing).
+    """
+    def __init__(self, transcript="haan ji bataiye", frames_per_word=5,
+                 end_after_frames=None, final_delay=0.0, latency=0.0):
+        self.transcript = transcript
+        self.frames_per_word = frames_per_word
+        self.end_after_frames = end_after_frames
+        self.final_delay = final_delay
+        # Delay of a non-streaming recognize() call
+        self.latency = latency
+        self.frames_received = 0
+        self.calls = 0
+        self.timings = []
+
+    def streaming_recognize(self, config, requests):
+        self.calls += 1
+        self.frames_received = 0
+        words = self.transcript.split()
+        revealed = 0
+
+        for request in requests:
+            if request.audio_content:
+                self.frames_received += 1
+            if self.frames_received % self.frames_per_word == 0 and revealed < len(words):
+                revealed += 1
+                stability = 0.9 if revealed == len(words) else 0.5
+                yield _streaming_response(" ".join(words[:revealed]), stability=stability)
+            if self.end_after_frames and self.frames_received >= self.end_after_frames:
+                break
+
+        yield _streaming_response(speech_event_type=END_OF_SINGLE_UTTERANCE)
+        _sleep(self.final_delay)
+        yield _streaming_response(self.transcript, is_final=True, stability=1.0)
+
+    def recognize(self, config, audio):
+        self.calls += 1
+        self.timings.append(_sleep(self.latency))
+        return _streaming_response(self.transcript, is_final=True, stability=1.0)
+
+
+class FakeAsyncSpeechClient:
+    """
+    Offline replacement for speech.SpeechAsyncClient. The "audio" it is sent is
+    the caller's words as UTF-8, so every scripted session can say something different.
+    """
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    async def recognize(self, config, audio):
+        self.calls += 1
+        await asyncio.sleep(sample_latency(self.latency))
+        return _streaming_response(audio.content.decode("utf-8"), is_final=True, stability=1.0)
+
+
+class _RecognitionConfig(SimpleNamespace):
+    AudioEncoding = SimpleNamespace(LINEAR16=1)
+
+
+# Stand-in for the google.cloud.speech message types StreamingRecognizer builds its requests from
+fake_speech_types = SimpleNamespace(
+    RecognitionAudio=SimpleNamespace,
+    RecognitionConfig=_RecognitionConfig,
+    StreamingRecognitionConfig=SimpleNamespace,
+    StreamingRecognizeRequest=SimpleNamespace,
+    StreamingRecognizeResponse=SimpleNamespace(
+        SpeechEventType=SimpleNamespace(END_OF_SINGLE_UTTERANCE=END_OF_SINGLE_UTTERANCE)),
+)
+
+
+class FakeTTSClient:
+    """
+    Offline replacement for texttospeech.TextToSpeechClient.
+    Returns placeholder audio whose size grows with the text, after a simulated delay.
+    """
+    def __init__(self, latency=0.0, bytes_per_char=200):
+        self.latency = latency
+        self.bytes_per_char = bytes_per_char
+        self.calls = 0
+        self.timings = []
+
+    def synthesize_speech(self, input, voice=None, audio_config=None, **kwargs):
+        self.calls += 1
+        self.timings.append(_sleep(self.latency))
+        text = getattr(input, "text", "") or ""
+        return SimpleNamespace(audio_content=b"\xff\xfb" + bytes(len(text) * self.bytes_per_char))
+
+
+class FakeAsyncTTSClient(FakeTTSClient):
+    """Offline replacement for texttospeech.TextToSpeechAsyncClient"""
+    async def synthesize_speech(self, input, voice=None, audio_config=None, **kwargs):
+        self.calls += 1
+        delay = sample_latency(self.latency)
+        self.timings.append(delay)
+        await asyncio.sleep(delay)
+        text = getattr(input, "text", "") or ""
+        return SimpleNamespace(audio_content=b"\xff\xfb" + bytes(len(text) * self.bytes_per_char))
+
+
+# Stand-in for the google.cloud.texttospeech message types
+fake_tts_types = SimpleNamespace(
+    SsmlVoiceGender=SimpleNamespace(MALE=SimpleNamespace(name="MALE")),
+    AudioEncoding=SimpleNamespace(LINEAR16=SimpleNamespace(name="LINEAR16")),
+    SynthesisInput=SimpleNamespace,
+    VoiceSelectionParams=SimpleNamespace,
+    AudioConfig=SimpleNamespace,
+)
+
+
+class FakeLLM:
+    """
+    Offline replacement for the langchain ChatOpenAI model.
+
+    Replies cycle through `replies`; streaming yields one word at a time after
+    `first_token_latency`, then `token_latency` per further word. Async
+    variants sleep with asyncio so concurrent sessions overlap.
+    """
+    def __init__(self, replies=("Ji bilkul, mai aapki madad kar sakta hoon.",), first_token_latency=0.0,
+                 token_latency=0.0):
+        self.replies = list(replies)
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.calls = 0
+        # (seconds to first token, seconds to last token) per streamed reply
+        self.stream_timings = []
+
+    def _next_reply(self):
+        reply = self.replies[self.calls % len(self.replies)]
+        self.calls += 1
+        return reply
+
+    def _tokens(self, reply):
+        words = reply.split(" ")
+        return [word if index == len(words) - 1 else word + " " for index, word in enumerate(words)]
+
+    def invoke(self, messages):
+        reply = self._next_reply()
+        _sleep(self.first_token_latency)
+        for _ in self._tokens(reply)[1:]:
+            _sleep(self.token_latency)
+        return SimpleNamespace(content=reply)
+
+    def stream(self, messages):
+        reply = self._next_reply()
+        started = time.perf_counter()
+        first_token = None
+        for index, token in enumerate(self._tokens(reply)):
+            _sleep(self.first_token_latency if index == 0 else self.token_latency)
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            yield SimpleNamespace(content=token)
+        self.stream_timings.append((first_token, time.perf_counter() - started))
+
+    async def ainvoke(self, messages):
+        reply = self._next_reply()
+        await asyncio.sleep(sample_latency(self.first_token_latency))
+        for _ in self._tokens(reply)[1:]:
+            await asyncio.sleep(sample_latency(self.token_latency))
+        return SimpleNamespace(content=reply)
+
+    async def astream(self, messages):
+        reply = self._next_reply()
+        for index, token in enumerate(self._tokens(reply)):
+            await asyncio.sleep(sample_latency(self.first_token_latency if index == 0 else self.token_latency))
+            yield SimpleNamespace(content=token)
+
+
+class _Request:
+    """Mimics a googleapiclient HttpRequest: the work happens on execute()"""
+    def __init__(self, func, latency=0.0, timings=None):
+        self.func = func
+        self.latency = latency
+        self.timings = timings
+
+    def execute(self):
+        delay = _sleep(self.latency)
+        if self.timings is not None:
+            self.timings.append(delay)
+        return self.func()
+
+
+class FakeCalendarService:
+    """
+    Offline replacement for the Calendar v3 service returned by `build("calendar", "v3")`.
+    Supports events().insert and freebusy().query; inserted events show up as busy time.
+    """
+    def __init__(self, busy=None, latency=0.0, fail_inserts=0):
+        # busy: {calendar_id: [(start_iso, end_iso), ...]}
+        self.busy = {calendar_id: list(intervals) for calendar_id, intervals in (busy or {}).items()}
+        self.latency = latency
+        # Number of upcoming inserts that fail with a 503, to exercise retries
+        self.fail_inserts = fail_inserts
+        self.inserted = []
+        self.freebusy_queries = []
+        self.batches = 0
+        # Simulated delay of every round trip (single requests and batches)
+        self.timings = []
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatchHttpRequest(self, callback)
+
+    def events(self):
+        return SimpleNamespace(insert=self._insert)
+
+    def freebusy(self):
+        return SimpleNamespace(query=self._query)
+
+    def _insert(self, calendarId, body, **kwargs):
+        def run():
+            if self.fail_inserts > 0:
+                self.fail_inserts -= 1
+                raise FakeHttpError(503, "Backend Error")
+            if body.get("id") and any(event["id"] == body["id"] for _, event in self.inserted):
+                raise FakeHttpError(409, "The requested identifier already exists.")
+            event = dict(body)
+            event.setdefault("id", f"fake{len(self.inserted):05d}")
+            event["htmlLink"] = f"https://calendar.example.com/event?eid={event['id']}"
+            self.inserted.append((calendarId, event))
+            self.busy.setdefault(calendarId, []).append((_aware(body["start"]), _aware(body["end"])))
+            return event
+        return _Request(run, self.latency, self.timings)
+
+    def _query(self, body):
+        def run():
+            self.freebusy_queries.append(body)
+            time_min, time_max = body["timeMin"], body["timeMax"]
+            calendars = {}
+            for item in body.get("items", []):
+                intervals = self.busy.get(item["id"], [])
+                calendars[item["id"]] = {"busy": [
+                    {"start": start, "end": end} for start, end in intervals
+                    if _overlaps(start, end, time_min, time_max)
+                ]}
+            return {"kind": "calendar#freeBusy", "timeMin": time_min, "timeMax": time_max, "calendars": calendars}
+        return _Request(run, self.latency, self.timings)
+
+
+class FakeHttpError(Exception):
+    """Shaped like googleapiclient.errors.HttpError (status on .resp.status)"""
+    def __init__(self, status, reason=""):
+        super().__init__(f"<HttpError {status}: {reason}>")
+        self.resp = SimpleNamespace(status=status, reason=reason)
+
+
+class FakeBatchHttpRequest:
+    """Mimics BatchHttpRequest: queued requests run in one execute() with a single latency"""
+    def __init__(self, service, callback=None):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.requests.append((request_id or str(len(self.requests)), request, callback))
+
+    def execute(self):
+        self.service.batches += 1
+        self.service.timings.append(_sleep(self.service.latency))
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request.func(), None
+            except FakeHttpError as e:
+                response, exception = None, e
+            handler = callback or self.callback
+            if handler:
+                handler(request_id, response, exception)
+
+
+def _aware(event_time):
+    # Event times may be naive with a separate timeZone field
+    value = datetime.fromisoformat(event_time["dateTime"].replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = pytz.timezone(event_time.get("timeZone", "UTC")).localize(value)
+    return value.isoformat()
+
+
+def _overlaps(start, end, time_min, time_max):
+    parse = lambda value: datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parse(start) < parse(time_max) and parse(end) > parse(time_min)
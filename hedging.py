@@ -0,0 +1,272 @@
+# hedging.py
+"""
+Hedged LLM requests: if the primary model has not produced its first token
+by the scenario's hedge deadline, the same messages are sent to a faster
+fallback model. The reply comes from whichever model streams first, and
+the other request is cancelled. Only the winner's tokens reach the caller,
+so nothing is spoken twice.
+
+Hedges are capped by `max_hedge_rate` over a sliding window of recent
+requests, and are skipped when the shared "llm" rate limiter has no token
+to spare, so a slow provider does not get twice the traffic. Per-scenario
+first-token SLOs are tracked, and misses are counted in the stats and in
+metrics.
+"""
+import time
+import queue
+import asyncio
+import threading
+import contextvars
+from collections import deque
+
+import metrics
+import rate_limiter
+
+
+def parse_ms(value, default_ms=None):
+    """
+    "2000" or "2000,demo_scheduling=1500" -> (default seconds, {scenario: seconds});
+    an empty value gives (default_ms in seconds or None, {})
+    """
+    default = default_ms / 1000.0 if default_ms is not None else None
+    per_scenario = {}
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part:
+            scenario, ms = part.split("=", 1)
+            per_scenario[scenario.strip()] = float(ms) / 1000.0
+        else:
+            default = float(part) / 1000.0
+    return default, per_scenario
+
+
+class HedgePolicy:
+    """
+    Deadlines, SLOs and the hedge budget, plus per-scenario outcome stats.
+    Without an explicit hedge deadline a scenario hedges at half its SLO,
+    which leaves the fallback the other half to answer in.
+    """
+    def __init__(self, slo=2.0, scenario_slos=None, hedge_after=None, scenario_hedge_after=None,
+                 max_hedge_rate=0.25, window=100):
+        self.slo = slo
+        self.scenario_slos = scenario_slos or {}
+        self.hedge_after = hedge_after
+        self.scenario_hedge_after = scenario_hedge_after or {}
+        self.max_hedge_rate = max_hedge_rate
+        # True/False per recent request: was it hedged
+        self.recent = deque(maxlen=window)
+        self.stats_by_scenario = {}
+        self.lock = threading.Lock()
+
+    def slo_for(self, scenario):
+        return self.scenario_slos.get(scenario, self.slo)
+
+    def hedge_after_for(self, scenario):
+        if scenario in self.scenario_hedge_after:
+            return self.scenario_hedge_after[scenario]
+        if self.hedge_after is not None:
+            return self.hedge_after
+        return self.slo_for(scenario) / 2.0
+
+    def may_hedge(self):
+        """Whether one more hedge fits the budget and the shared LLM rate limit"""
+        with self.lock:
+            if self.recent and sum(self.recent) / len(self.recent) >= self.max_hedge_rate:
+                return False
+        bucket = rate_limiter.get_guard("llm").bucket
+        if bucket.reserve() > 0:
+            # Only hedge with a token that is free right now
+            bucket.refund()
+            return False
+        return True
+
+    def record(self, scenario, first_token, hedged, winner, skipped=False):
+        missed = first_token is not None and first_token > self.slo_for(scenario)
+        with self.lock:
+            self.recent.append(hedged)
+            stats = self.stats_by_scenario.setdefault(scenario, {
+                "requests": 0, "hedged": 0, "skipped": 0, "fallback_wins": 0, "slo_misses": 0})
+            stats["requests"] += 1
+            stats["hedged"] += int(hedged)
+            stats["skipped"] += int(skipped)
+            stats["fallback_wins"] += int(winner == "fallback")
+            stats["slo_misses"] += int(missed)
+        metrics.increment("llm_requests", scenario=scenario, winner=winner, hedged="yes" if hedged else "no")
+        if missed:
+            metrics.increment("llm_slo_misses", scenario=scenario)
+
+    def stats(self):
+        """{scenario: counters plus hedge_rate and slo_miss_rate}"""
+        with self.lock:
+            result = {}
+            for scenario, stats in self.stats_by_scenario.items():
+                stats = dict(stats, slo_ms=round(self.slo_for(scenario) * 1000),
+                             hedge_after_ms=round(self.hedge_after_for(scenario) * 1000))
+                stats["hedge_rate"] = stats["hedged"] / stats["requests"]
+                stats["slo_miss_rate"] = stats["slo_misses"] / stats["requests"]
+                result[scenario] = stats
+            return result
+
+    def format_stats(self):
+        lines = ["LLM hedging:"]
+        for scenario, stats in self.stats().items():
+            lines.append(
+                f"  {scenario:22} requests={stats['requests']} hedged={stats['hedge_rate']:.0%} "
+                f"fallback_wins={stats['fallback_wins']} slo={stats['slo_ms']}ms "
+                f"misses={stats['slo_miss_rate']:.0%} skipped={stats['skipped']}"
+            )
+        return "\n".join(lines)
+
+
+def _pump(name, model, messages, events, cancel):
+    # Runs one model's stream on its own thread, forwarding text to the shared queue
+    stream = None
+    try:
+        stream = model.stream(messages)
+        for chunk in stream:
+            if cancel.is_set():
+                break
+            if chunk.content:
+                events.put((name, "token", chunk.content))
+        events.put((name, "done", None))
+    except Exception as e:
+        events.put((name, "error", e))
+    finally:
+        # Closing the generator closes the HTTP response of a cancelled request.
+        # A loser still waiting on its first byte only notices once it arrives.
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+
+def hedged_stream(primary, fallback, messages, policy, scenario=None):
+    """Yield reply text from whichever model streams first"""
+    events = queue.Queue()
+    cancels = {"primary": threading.Event(), "fallback": threading.Event()}
+    models = {"primary": primary, "fallback": fallback}
+    running = set()
+
+    def launch(name):
+        running.add(name)
+        thread = threading.Thread(target=contextvars.copy_context().run, name=f"llm-{name}",
+                                  args=(_pump, name, models[name], messages, events, cancels[name]))
+        thread.daemon = True
+        thread.start()
+
+    started = time.perf_counter()
+    deadline = started + policy.hedge_after_for(scenario)
+    hedged = skipped = False
+    winner = first = None
+    errors = {}
+    launch("primary")
+    try:
+        while winner is None:
+            timeout = None if hedged or skipped else max(0.0, deadline - time.perf_counter())
+            try:
+                name, kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                if policy.may_hedge():
+                    hedged = True
+                    print(f"⏱️ No first token after {policy.hedge_after_for(scenario):.1f}s, hedging to the fallback model")
+                    launch("fallback")
+                else:
+                    skipped = True
+                continue
+            if kind == "error":
+                running.discard(name)
+                errors[name] = payload
+                if not running:
+                    raise errors.get("primary", payload)
+                continue
+            winner, first = name, payload
+        for name in cancels:
+            if name != winner:
+                cancels[name].set()
+        policy.record(scenario, time.perf_counter() - started, hedged, winner, skipped=skipped)
+
+        if first is not None:
+            yield first
+            while True:
+                name, kind, payload = events.get()
+                if name != winner:
+                    continue
+                if kind == "token":
+                    yield payload
+                elif kind == "error":
+                    raise payload
+                else:
+                    break
+    finally:
+        # Also reached when the consumer stops early (barge-in, cancelled turn)
+        for cancel in cancels.values():
+            cancel.set()
+
+
+async def _apump(name, model, messages, events):
+    try:
+        async for chunk in model.astream(messages):
+            if chunk.content:
+                await events.put((name, "token", chunk.content))
+        await events.put((name, "done", None))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        await events.put((name, "error", e))
+
+
+async def ahedged_stream(primary, fallback, messages, policy, scenario=None):
+    """Async variant of hedged_stream; the losing request's task is cancelled"""
+    events = asyncio.Queue()
+    models = {"primary": primary, "fallback": fallback}
+    tasks = {}
+
+    def launch(name):
+        tasks[name] = asyncio.ensure_future(_apump(name, models[name], messages, events))
+
+    started = time.perf_counter()
+    deadline = started + policy.hedge_after_for(scenario)
+    hedged = skipped = False
+    winner = first = None
+    errors = {}
+    launch("primary")
+    try:
+        while winner is None:
+            timeout = None if hedged or skipped else max(0.0, deadline - time.perf_counter())
+            try:
+                name, kind, payload = await asyncio.wait_for(events.get(), timeout)
+            except asyncio.TimeoutError:
+                if policy.may_hedge():
+                    hedged = True
+                    print(f"⏱️ No first token after {policy.hedge_after_for(scenario):.1f}s, hedging to the fallback model")
+                    launch("fallback")
+                else:
+                    skipped = True
+                continue
+            if kind == "error":
+                errors[name] = payload
+                if len(errors) == len(tasks):
+                    raise errors.get("primary", payload)
+                continue
+            winner, first = name, payload
+        for name, task in tasks.items():
+            if name != winner:
+                task.cancel()
+        policy.record(scenario, time.perf_counter() - started, hedged, winner, skipped=skipped)
+
+        if first is not None:
+            yield first
+            while True:
+                name, kind, payload = await events.get()
+                if name != winner:
+                    continue
+                if kind == "token":
+                    yield payload
+                elif kind == "error":
+                    raise payload
+                else:
+                    break
+    finally:
+        for task in tasks.values():
+            task.cancel()
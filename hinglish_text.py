@@ -0,0 +1,150 @@
+# hinglish_text.py
+"""
+Text normalization for Hinglish written in Devanagari or Latin script.
+
+Devanagari is transliterated to a plain romanization and both scripts are then
+folded to one canonical spelling ("haan", "हाँ" -> "han"; "nahi", "नहीं" -> "nahi";
+"fix", "फिक्स" -> "fiks"), so keyword rules only need to be written once.
+"""
+import re
+
+CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+# Consonant + nukta
+NUKTA_CONSONANTS = {"क": "q", "ख": "kh", "ग": "g", "ज": "z", "ड": "r", "ढ": "rh", "फ": "f", "य": "y"}
+PRECOMPOSED = {"क़": "q", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "r", "ढ़": "rh", "फ़": "f", "य़": "y"}
+VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o", "ऍ": "e",
+}
+MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॅ": "e", "ॉ": "o",
+}
+NASALS = {"ं": "n", "ँ": "n"}
+VISARGA = "ः"
+VIRAMA = "्"
+NUKTA = "़"
+DIGITS = {chr(0x0966 + i): str(i) for i in range(10)}
+DANDAS = {"।": ".", "॥": "."}
+
+# Collapses spelling variants of the same sound
+CANONICAL_RULES = [
+    (re.compile(r"ee"), "i"),
+    (re.compile(r"oo"), "u"),
+    (re.compile(r"ei"), "e"),
+    (re.compile(r"([aiu])\1+"), r"\1"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"z"), "j"),
+    (re.compile(r"q"), "k"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"x"), "ks"),
+    # Final nasal after "hi" is often left unwritten in Latin ("nahi", "kahi")
+    (re.compile(r"hin$"), "hi"),
+]
+
+# English loanwords as they come out of Devanagari, mapped to their usual Latin spelling
+# (keys and values are already in canonical form)
+LOANWORDS = {
+    "prais": "price", "taim": "time", "kol": "call", "biji": "busy", "oke": "ok",
+    "okay": "ok", "pement": "payment", "intravyu": "interviev", "shedyul": "schedule",
+    "kanpani": "company", "sar": "sir", "plij": "please", "bay": "bye",
+    "thaink": "thank", "yu": "you", "prodakt": "product", "sistam": "system",
+    "fon": "fone",
+}
+
+# Words that carry no meaning on their own in a short reply
+FILLER_WORDS = frozenset([
+    "ji", "sir", "madam", "mam", "um", "umm", "hm", "hmm", "uh", "arre", "yar", "bhai",
+    "please", "to", "toh", "matlab", "vo", "hello", "helo",
+])
+
+PUNCTUATION = re.compile(r"[^\w\s:]", re.UNICODE)
+WHITESPACE = re.compile(r"\s+")
+
+
+def _is_devanagari(ch):
+    return "ऀ" <= ch <= "ॿ"
+
+
+def _transliterate_word(word):
+    # Build (consonants, vowel, inherent) units, then apply schwa deletion
+    units = []
+    i = 0
+    while i < len(word):
+        ch = word[i]
+        if ch in PRECOMPOSED or ch in CONSONANTS:
+            sound = PRECOMPOSED.get(ch, CONSONANTS.get(ch))
+            if i + 1 < len(word) and word[i + 1] == NUKTA:
+                sound = NUKTA_CONSONANTS.get(ch, sound)
+                i += 1
+            nxt = word[i + 1] if i + 1 < len(word) else ""
+            if nxt in MATRAS:
+                units.append([sound, MATRAS[nxt], False])
+                i += 1
+            elif nxt == VIRAMA:
+                # Conjunct: this consonant joins the next unit
+                units.append([sound, "", False])
+                i += 1
+            else:
+                units.append([sound, "a", True])
+        elif ch in VOWELS:
+            units.append(["", VOWELS[ch], False])
+        elif ch in NASALS and units:
+            units[-1][1] += NASALS[ch]
+        elif ch == VISARGA and units:
+            units[-1][1] += "h"
+        elif ch in DIGITS:
+            units.append([DIGITS[ch], "", False])
+        elif ch in DANDAS:
+            units.append([DANDAS[ch], "", False])
+        elif not _is_devanagari(ch):
+            units.append([ch, "", False])
+        i += 1
+
+    # Final schwa is silent ("kal", not "kala")
+    if units and units[-1][2]:
+        units[-1][1] = ""
+    # Medial schwa between a vowel and a consonant-vowel is silent ("karna", not "karana")
+    for j in range(len(units) - 2, 0, -1):
+        if units[j][2] and units[j + 1][0] and units[j + 1][1] and units[j - 1][1]:
+            units[j][1] = ""
+    return "".join(consonant + vowel for consonant, vowel, _ in units)
+
+
+def transliterate(text):
+    """Romanize any Devanagari in the text, leaving Latin text untouched"""
+    if not any(_is_devanagari(ch) for ch in text):
+        return text
+    return " ".join(_transliterate_word(word) if any(_is_devanagari(ch) for ch in word) else word
+                    for word in text.split())
+
+
+def canonical_word(word):
+    """Fold spelling variants of one romanized word"""
+    word = word.lower()
+    for pattern, replacement in CANONICAL_RULES:
+        word = pattern.sub(replacement, word)
+    return LOANWORDS.get(word, word)
+
+
+def normalize_text(text):
+    """Lowercase, romanize, strip punctuation and fold spellings; returns a space-joined string"""
+    if not text:
+        return ""
+    text = PUNCTUATION.sub(" ", transliterate(text).lower())
+    return " ".join(canonical_word(word) for word in WHITESPACE.split(text.strip()) if word)
+
+
+def normalize_utterance(text):
+    """normalize_text with filler words dropped, so "ji haan, theek hai" and "haan theek hai" match"""
+    words = normalize_text(text).split()
+    content = [word for word in words if word not in FILLER_WORDS]
+    return " ".join(content or words)
@@ -0,0 +1,229 @@
+# intent_classifier.py
+"""
+Local intent classifier for short Hinglish turns ("haan", "nahi", "baad mein
+call karo", "kal 3 baje").
+
+Utterances are normalized with hinglish_text, so Devanagari and romanized
+input hit the same rules. Phrase tables are canonicalized and compiled once at
+import; classifying a turn is a handful of regex scans. Confidence is the share
+of the utterance's non-filler words covered by the union of the winning
+intent's phrase matches (overlaps included, plus compatible intents), so
+anything with extra content is left to the LLM. A refusal ("nahi") turns a
+booking intent into a deny.
+"""
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from hinglish_text import normalize_text, FILLER_WORDS
+
+CONFIDENCE_THRESHOLD = 0.8
+
+INTENT_PHRASES = {
+    "callback_later": [
+        "baad mein call karo", "baad mein call kariye", "baad mein call karna", "baad me call karo",
+        "baad mein baat karte hain", "baad mein baat karenge", "baad mein", "thodi der baad",
+        "abhi busy hoon", "abhi busy hun", "main busy hoon", "abhi time nahi hai", "abhi nahi",
+        "meeting mein hoon", "drive kar raha hoon", "call karna", "call kariye", "call karo",
+        "later", "call me later", "call back later", "call back",
+        "बाद में कॉल करो", "बाद में कॉल करना", "अभी बिज़ी हूँ", "अभी टाइम नहीं है",
+    ],
+    "who_is_calling": [
+        "kaun bol raha hai", "kaun bol rahe ho", "kaun bol rahe hain", "aap kaun", "aap kaun ho",
+        "aap kaun hain", "kaun hai", "kaun", "kahan se bol rahe ho", "kahan se bol rahe hain",
+        "kis company se", "kis company se ho", "who is this", "who is calling", "who are you",
+        "कौन बोल रहा है", "आप कौन हैं", "कहाँ से बोल रहे हैं",
+    ],
+    "schedule_request": [
+        "demo schedule kar do", "demo schedule karo", "demo schedule kariye", "demo book kar do",
+        "demo book karo", "demo fix kar do", "demo fix karo", "demo dikhao", "demo dikha do",
+        "demo chahiye", "demo le lete hain", "meeting fix karo", "meeting fix kar do",
+        "meeting schedule karo", "meeting rakh lo", "schedule kar do", "schedule karo",
+        "book kar do", "appointment book karo", "demo ke liye time fix karo",
+        "schedule a demo", "book a demo", "book it", "schedule it",
+        "डेमो शेड्यूल कर दो", "डेमो दिखाओ", "मीटिंग फिक्स करो",
+    ],
+    "goodbye": [
+        "bye", "bye bye", "ok bye", "goodbye", "alvida", "phone rakhta hoon", "rakhta hoon",
+        "phone rakho", "baad mein milte hain",
+        "अलविदा", "फ़ोन रखता हूँ",
+    ],
+    "deny": [
+        "nahi", "nahin", "na", "no", "nope", "nahi chahiye", "nahi ji", "interested nahi",
+        "interest nahi hai", "zaroorat nahi", "koi zaroorat nahi", "mat karo", "not interested",
+        "नहीं", "नहीं चाहिए", "ज़रूरत नहीं",
+    ],
+    "affirm": [
+        "haan", "haan ji", "ji haan", "ji", "ha", "han", "yes", "yeah", "yes please", "ok", "okay",
+        "theek hai", "thik hai", "bilkul", "zaroor", "sure", "chalega", "sahi hai", "accha", "achha",
+        "acha", "haan bataiye", "boliye", "ji boliye", "kar do", "kariye", "done", "perfect",
+        "हाँ", "हाँ जी", "ठीक है", "बिल्कुल", "ज़रूर", "चलेगा",
+    ],
+}
+
+# When several intents match, the first one in this order wins
+INTENT_PRIORITY = ["callback_later", "who_is_calling", "schedule_request", "time_confirmation",
+                   "goodbye", "deny", "affirm"]
+
+# Intents that book a demo; a refusal anywhere in the utterance overrides them
+BOOKING_INTENTS = ("schedule_request", "time_confirmation")
+
+# Intents that may share an utterance with the winner without lowering its confidence
+COMPATIBLE_INTENTS = {
+    "callback_later": {"deny", "affirm", "goodbye", "time_confirmation"},
+    "who_is_calling": {"affirm"},
+    "schedule_request": {"affirm", "time_confirmation"},
+    "time_confirmation": {"affirm"},
+    "goodbye": {"affirm"},
+    "deny": set(),
+    "affirm": set(),
+}
+
+DAY_OFFSETS = {"aj": 0, "today": 0, "kal": 1, "tomorrow": 1, "parso": 2, "parson": 2}
+WEEKDAYS = {
+    "somvar": 0, "monday": 0, "mangalvar": 1, "tuesday": 1, "budhvar": 2, "wednesday": 2,
+    "guruvar": 3, "brihaspativar": 3, "thursday": 3, "shukravar": 4, "friday": 4,
+    "shanivar": 5, "saturday": 5, "ravivar": 6, "itvar": 6, "sunday": 6,
+}
+HOUR_WORDS = {
+    "ek": 1, "do": 2, "tin": 3, "char": 4, "panch": 5, "chhe": 6, "chah": 6, "sat": 7,
+    "ath": 8, "nau": 9, "das": 10, "gyarah": 11, "barah": 12,
+}
+PERIODS = {"subah": "am", "morning": "am", "dopahar": "pm", "afternoon": "pm",
+           "sham": "pm", "evening": "pm", "rat": "pm"}
+
+
+def _alternation(words):
+    # Longest first so "baad mein call karo" wins over "baad mein"
+    return "|".join(re.escape(word) for word in sorted(set(words), key=len, reverse=True))
+
+
+def _compile_phrases(phrases):
+    # A lookahead match is found at every word start, so overlapping phrases
+    # ("aap kaun" + "kaun bol rahe hain") each report their own span
+    canonical = [normalize_text(phrase) for phrase in phrases]
+    return re.compile(r"(?<!\S)(?=((?:%s)(?!\S)))" % _alternation(phrase for phrase in canonical if phrase))
+
+
+PHRASE_PATTERNS = {intent: _compile_phrases(phrases) for intent, phrases in INTENT_PHRASES.items()}
+
+DAY_PATTERN = re.compile(r"(?<!\S)(?P<day>%s)(?!\S)" % _alternation(list(DAY_OFFSETS) + list(WEEKDAYS)))
+TIME_PATTERN = re.compile(
+    r"(?<!\S)(?:(?P<period>%s)\s+)?(?:(?P<half>sade)\s+)?"
+    r"(?P<hour>\d{1,2}|%s)(?::(?P<minute>\d{2}))?\s*(?P<marker>baje|bje|am|pm|o clock)?(?!\S)"
+    % (_alternation(PERIODS), _alternation(HOUR_WORDS))
+)
+
+
+class Intent:
+    """Classifier result: intent name, confidence in [0, 1] and any extracted slots"""
+    def __init__(self, name, confidence=0.0, slots=None, text=""):
+        self.name = name
+        self.confidence = confidence
+        self.slots = slots or {}
+        self.text = text
+
+    @property
+    def confident(self):
+        return self.name is not None and self.confidence >= CONFIDENCE_THRESHOLD
+
+    def __repr__(self):
+        return f"Intent({self.name}, {self.confidence:.2f}, {self.slots})"
+
+
+def _token_indices(start, end, offsets):
+    return {index for index, (token_start, token_end) in enumerate(offsets)
+            if token_start >= start and token_end <= end}
+
+
+def _find_time(normalized, offsets):
+    # Returns (slots, covered token indices) for day/time expressions
+    slots = {}
+    covered = set()
+    day_match = DAY_PATTERN.search(normalized)
+    if day_match:
+        day = day_match.group("day")
+        if day in DAY_OFFSETS:
+            slots["day_offset"] = DAY_OFFSETS[day]
+        else:
+            slots["weekday"] = WEEKDAYS[day]
+        covered |= _token_indices(day_match.start(), day_match.end(), offsets)
+
+    for match in TIME_PATTERN.finditer(normalized):
+        hour_text, marker = match.group("hour"), match.group("marker")
+        period = PERIODS.get(match.group("period")) or (marker if marker in ("am", "pm") else None)
+        if hour_text.isdigit():
+            # A bare number only means a time next to "baje", a day or a part of the day
+            if not (marker or match.group("minute") or period or day_match):
+                continue
+            hour = int(hour_text)
+        else:
+            if not marker:
+                continue
+            hour = HOUR_WORDS[hour_text]
+        if not 1 <= hour <= 23:
+            continue
+        minute = int(match.group("minute") or 0) if not match.group("half") else 30
+        if hour < 12:
+            # Business hours: "3 baje" is 15:00 unless the caller said subah/am
+            if period == "pm" or (period is None and hour <= 7):
+                hour += 12
+        slots["hour"], slots["minute"] = hour, minute % 60
+        covered |= _token_indices(match.start(), match.end(), offsets)
+        break
+    return slots, covered
+
+
+@lru_cache(maxsize=4096)
+def classify(text):
+    """Classify one utterance; returns an Intent (name None when nothing matched)"""
+    normalized = normalize_text(text)
+    offsets = [match.span() for match in re.finditer(r"\S+", normalized)]
+    if not offsets:
+        return Intent(None, text=text)
+
+    covered = {}
+    for intent, pattern in PHRASE_PATTERNS.items():
+        indices = set()
+        for match in pattern.finditer(normalized):
+            indices |= _token_indices(match.start(1), match.end(1), offsets)
+        if indices:
+            covered[intent] = indices
+    slots, time_indices = _find_time(normalized, offsets)
+    if "hour" in slots:
+        covered["time_confirmation"] = time_indices
+
+    name = next((intent for intent in INTENT_PRIORITY if intent in covered), None)
+    if name is None:
+        return Intent(None, text=text)
+    if name in BOOKING_INTENTS and "deny" in covered:
+        # "nahi ji, kal 3 baje" must never book; the refusal wins and the turn goes to the LLM
+        name = "deny"
+
+    tokens = normalized.split()
+    explained = set(covered[name])
+    if name in BOOKING_INTENTS:
+        explained |= time_indices
+    for other in COMPATIBLE_INTENTS[name]:
+        explained |= covered.get(other, set())
+    # Filler words neither help nor hurt; an all-filler reply ("ji") is scored on its own words
+    content = {index for index, token in enumerate(tokens) if token not in FILLER_WORDS}
+    if not content:
+        content = set(range(len(tokens)))
+    return Intent(name, len(explained & content) / len(content), slots, text=text)
+
+
+def resolve_start(intent, now=None):
+    """Naive local datetime for the time named in the intent, or None if it has no hour"""
+    if "hour" not in intent.slots:
+        return None
+    now = now or datetime.now()
+    start = now.replace(hour=intent.slots["hour"], minute=intent.slots.get("minute", 0), second=0, microsecond=0)
+    if "day_offset" in intent.slots:
+        start += timedelta(days=intent.slots["day_offset"])
+    elif "weekday" in intent.slots:
+        start += timedelta(days=(intent.slots["weekday"] - now.weekday()) % 7 or 7)
+    elif start <= now:
+        # "4 baje" said after 4 pm means tomorrow
+        start += timedelta(days=1)
+    return start
@@ -1,21 +1,32 @@
 import os
 from dotenv import load_dotenv
-from google.cloud import speech, texttospeech
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
-from langchain_openai import ChatOpenAI
 
-# Import from our modules
-from system_prompts import SYSTEM_PROMPTS
+# Import from our modules (heavy SDKs are imported by the warm-up threads)
+from system_prompts import SYSTEM_PROMPTS, INITIAL_GREETINGS, DEFAULT_GREETING
 
 import utils
-from pygame_ui import run_ui
+import metrics
+import startup
+import rate_limiter
+import hedging
+from startup import WarmUp, timed_import
+from streaming_pipeline import StreamingSpeaker
+import speculation
+from speculation import SpeculativeTurn
+from tts_cache import TTSCache
+from response_cache import ResponseCache
+from conversation_memory import ConversationMemory
+from slot_finder import SlotFinder
+from connection_manager import ConnectionManager
 
 # Load environment variables
 load_dotenv()
 
-def initialize_services():
-  
+def start_services():
+    """
+    Build every client in parallel background threads and return the WarmUp;
+    call .wait() on it before the first call needs the services.
+    """
     SERVICE_ACCOUNT_FILE = os.environ.get("GOOGLE_SERVICE_FILE_PATH")
     SCOPES = ["https://www.googleapis.com/auth/calendar"]
     
@@ -23,30 +34,140 @@ def initialize_services():
     
     openai_api_key = os.environ.get("OPEN_AI_API_KEY")
     
-    try:
+    # Per-stage timings: JSON lines on disk, Prometheus text on /metrics if a port is set
+    metrics.registry.configure(os.environ.get("METRICS_LOG_PATH", os.path.join("logs", "turn_metrics.jsonl")))
+    if os.environ.get("METRICS_PORT"):
+        metrics.registry.serve(int(os.environ["METRICS_PORT"]))
+    
+    utils.tts_cache = TTSCache()
+    utils.response_cache = ResponseCache()
+    
+    # One shared limiter and circuit breaker per external API, e.g. LLM_RATE_LIMIT=5 for a low quota
+    for api in ("llm", "stt", "tts", "calendar"):
+        rate = os.environ.get(f"{api.upper()}_RATE_LIMIT")
+        rate_limiter.configure(
+            api,
+            rate=float(rate) if rate else None,
+            failure_threshold=int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.environ.get("BREAKER_RESET_SECONDS", "30")),
+        )
+    
+    # First-token SLOs and hedge deadlines, e.g. LLM_SLO_MS="2000,demo_scheduling=1500"
+    slo, scenario_slos = hedging.parse_ms(os.environ.get("LLM_SLO_MS"), default_ms=2000)
+    hedge_after, scenario_hedge_after = hedging.parse_ms(os.environ.get("LLM_HEDGE_AFTER_MS"))
+    utils.hedge_policy = hedging.HedgePolicy(
+        slo=slo, scenario_slos=scenario_slos,
+        hedge_after=hedge_after, scenario_hedge_after=scenario_hedge_after,
+        max_hedge_rate=float(os.environ.get("LLM_MAX_HEDGE_RATE", "0.25")),
+    )
+    # Begin the reply while the callee is still finishing; SPECULATIVE_REPLIES=0 turns it off
+    utils.speculation_enabled = os.environ.get("SPECULATIVE_REPLIES", "1") != "0"
+    # Stream each turn to the recognizer as it is spoken; STREAMING_STT=0 recognizes after the turn ends
+    utils.streaming_stt_enabled = os.environ.get("STREAMING_STT", "1") != "0"
+    
+    # Shared keepalive channels and a pooled LLM HTTP client, so calls after an idle gap start warm
+    utils.connection_manager = ConnectionManager(
+        keepalive_time_ms=int(os.environ.get("GRPC_KEEPALIVE_TIME_MS", "30000")),
+        keepalive_timeout_ms=int(os.environ.get("GRPC_KEEPALIVE_TIMEOUT_MS", "10000")),
+        pool_size=int(os.environ.get("LLM_POOL_SIZE", "10")),
+        keepalive_connections=int(os.environ.get("LLM_KEEPALIVE_CONNECTIONS", "5")),
+        keepalive_expiry=float(os.environ.get("LLM_KEEPALIVE_EXPIRY", "300")),
+        health_check_interval=float(os.environ.get("CONNECTION_HEALTH_INTERVAL", "45")),
+        llm_api_key=openai_api_key,
+    )
+    
+    def create_speech_client():
         # Initialize Google Speech client
-        utils.speech_client = speech.SpeechClient()
-        
+        timed_import("google.cloud.speech")
+        utils.speech_client = utils.connection_manager.speech_client()
+    
+    def create_tts_client():
         # Initialize Google Text-to-Speech client
-        utils.tts_client = texttospeech.TextToSpeechClient()
-        
+        timed_import("google.cloud.texttospeech")
+        utils.tts_client = utils.connection_manager.tts_client()
+    
+    def create_calendar_service():
         # Initialize Google Calendar service
+        service_account = timed_import("google.oauth2.service_account")
+        discovery = timed_import("googleapiclient.discovery")
         credentials = service_account.Credentials.from_service_account_file(
             SERVICE_ACCOUNT_FILE, scopes=SCOPES
         )
-        utils.calendar_service = build("calendar", "v3", credentials=credentials)
-        
+        utils.calendar_service = discovery.build("calendar", "v3", credentials=credentials)
+    
+    def start_slot_finder():
+        # Keep demo availability cached so slots can be proposed mid-call;
+        # the first refresh also opens the Calendar connection
+        utils.slot_finder = SlotFinder(utils.calendar_service)
+        utils.slot_finder.start_background_refresh()
+    
+    def create_llm():
         # Initialize OpenAI client
-        utils.llm = ChatOpenAI(model_name="gpt-4", api_key=openai_api_key)
-        
+        langchain_openai = timed_import("langchain_openai")
+        utils.llm = langchain_openai.ChatOpenAI(
+            model_name=os.environ.get("LLM_MODEL", "gpt-4"), api_key=openai_api_key,
+            http_client=utils.connection_manager.http_client(),
+            http_async_client=utils.connection_manager.async_http_client(),
+        )
+        # Faster model the turn is hedged to when the first token misses its deadline; empty disables
+        fallback_model = os.environ.get("LLM_FALLBACK_MODEL", "gpt-4o-mini")
+        if fallback_model:
+            utils.fallback_llm = langchain_openai.ChatOpenAI(
+                model_name=fallback_model, api_key=openai_api_key,
+                http_client=utils.connection_manager.http_client(),
+                http_async_client=utils.connection_manager.async_http_client(),
+            )
+    
+    def open_connections():
+        # Complete the TLS/HTTP2 handshakes now and keep them alive between calls
+        health = utils.connection_manager.check_health()
+        utils.connection_manager.start_keepalive()
+        failed = [name for name, healthy in health.items() if not healthy]
+        if failed:
+            raise RuntimeError(f"unhealthy connections: {', '.join(failed)}")
+    
+    def preload_audio_modules():
+        # Capture/VAD/streaming STT and the Pygame UI are only needed once a call starts
+        for name in ("speech_recognition", "audio_capture", "recording_helper", "pygame_ui"):
+            timed_import(name)
+    
+    warmup = WarmUp()
+    warmup.add("speech_client", create_speech_client)
+    warmup.add("tts_client", create_tts_client)
+    warmup.add("calendar_service", create_calendar_service)
+    warmup.add("slot_finder", start_slot_finder, after=("calendar_service",))
+    warmup.add("llm", create_llm)
+    # Optional: a failed check is retried by the keepalive thread and the clients reconnect on demand
+    warmup.add("connections", open_connections, after=("speech_client", "tts_client", "llm"), required=False)
+    # Resolve the playback backend and open the output stream once, before the first reply
+    warmup.add("audio_output", utils.get_audio_player, required=False)
+    warmup.add("audio_modules", preload_audio_modules, required=False)
+    # Fill the TTS cache with greetings while the user picks a scenario
+    warmup.add("prerender", utils.prerender_fixed_lines, after=("tts_client",), required=False)
+    return warmup
+
+def initialize_services():
+    # Blocking variant: start everything and wait for it
+    services = start_services()
+    if services.wait():
         print("All services initialized successfully")
+        services.wait_optional("connections")
+        print_connection_stats()
         return True
-    except Exception as e:
-        print(f"Error initializing services: {e}")
-        return False
+    print("Error initializing services")
+    return False
+
+def print_startup_report():
+    print(startup.report.format())
+
+def print_connection_stats():
+    if utils.connection_manager is not None:
+        print(utils.connection_manager.format_stats())
 
-def main_loop():
+def main_loop(auto_endpoint=True, services=None):
      #Main execution loop for the voice assistant
+     #With auto_endpoint the turn ends on silence instead of a SPACE key press
+     #services is the WarmUp from start_services, waited on once a scenario is chosen
    
     print("Starting Hinglish Cold Calling AI Agent. Press Ctrl+C to exit.")
     print("Select scenario:")
@@ -70,65 +191,121 @@ def main_loop():
             scenario = "demo_scheduling"
             user_email = input("Enter customer email: ")
         
-        initial_greeting = {
-            "demo_scheduling": "Namaste! Mai iMax Global Ventures se bol raha hoon. Kya aap hamare ERP system ke baare mein baat karna chahenge?",
-            "candidate_interviewing": "Namaste! Mai iMax Global Ventures se bol raha hoon. Hum aapka interview lene wale hain AI/ML Engineer position ke liye.",
-            "payment_followup": "Namaste! Mai iMax Global Ventures se bol raha hoon. Mai aapke pending payment ke baare mein baat karna chahta hoon."
-        }
+        if services is not None:
+            if not services.wait():
+                print("Failed to initialize services. Exiting...")
+                return
+            print("All services initialized successfully")
+            print_startup_report()
+            print_connection_stats()
         
-        greeting = initial_greeting.get(scenario, "Namaste! Mai iMax Global Ventures se bol raha hoon.")
+        from recording_helper import RecordingHelper
+        
+        greeting = INITIAL_GREETINGS.get(scenario, DEFAULT_GREETING)
         print(f" Initial Greeting: {greeting}")
-        greeting_audio = utils.synthesize_speech(greeting, output_path="greeting.mp3")
-        utils.play_audio(greeting_audio)
+        try:
+            greeting_audio = utils.synthesize_audio(greeting)
+            startup.report.mark("first_greeting")
+            utils.play_audio(greeting_audio)
+        except Exception as e:
+            print(f"Error synthesizing speech: {e}")
         
-        print("\nUse SPACE key to start and stop recording.")
+        # Conversation history for this call, kept within a token budget
+        memory = ConversationMemory(summarizer=utils.summarize_conversation)
+        memory.add_message("assistant", greeting)
+        
+        if auto_endpoint:
+            recording_helper = RecordingHelper(auto_endpoint=True, scenario=scenario, streaming=utils.streaming_stt_enabled)
+            print("\nJust speak - recording stops automatically when you pause. You can interrupt the agent at any time.")
+        else:
+            print("\nUse SPACE key to start and stop recording.")
+        
+        # Where the callee's next turn starts in the capture stream after they interrupted the agent
+        resume_from = None
         
         while True:
             print(f"\nRunning {scenario.replace('_', ' ')} scenario.")
             print("Speak in Hinglish (mix of Hindi and English).")
             
-            # Use the manual control recording function instead of automatic
-            recognized_text = utils.recognize_speech_with_manual_control()
-            
-            if recognized_text:
-                if recognized_text.lower() in ["exit", "quit", "stop", "बंद", "बंद करो"]:
-                    print("Exiting voice assistant...")
-                    break
+            with metrics.turn(scenario):
+                # Interim transcripts taken at pauses start the reply before the turn has ended
+                turn_speculation = None
+                if auto_endpoint and utils.speculation_enabled:
+                    turn_speculation = SpeculativeTurn(scenario, memory)
                 
-                if scenario == "demo_scheduling":
-                    ai_response = utils.handle_demo_scheduling(user_email, recognized_text)
-                elif scenario == "candidate_interviewing":
-                    ai_response = utils.handle_candidate_interview(recognized_text)
-                elif scenario == "payment_followup":
-                    ai_response = utils.handle_payment_followup(user_email, recognized_text)
+                if auto_endpoint:
+                    recording_helper.on_interim = turn_speculation.on_interim if turn_speculation else None
+                    recognized_text, _ = recording_helper.listen(origin=resume_from)
+                    resume_from = None
                 else:
-                    ai_response = utils.get_ai_response(recognized_text)
+                    recognized_text = utils.recognize_speech_with_manual_control()
                 
-                print(f" AI Response: {ai_response}")
+                if not recognized_text or recognized_text.lower() in utils.EXIT_COMMANDS:
+                    if turn_speculation is not None:
+                        turn_speculation.cancel()
                 
-                audio_file = utils.synthesize_speech(ai_response)
-                
-                print("🔊 Playing audio response...")
-                utils.play_audio(audio_file)
+                if recognized_text:
+                    if recognized_text.lower() in utils.EXIT_COMMANDS:
+                        print("Exiting voice assistant...")
+                        break
+                    
+                    # Reply audio starts playing while the rest is still being generated
+                    # With automatic endpointing the callee can talk over the reply to interrupt it
+                    speaker = StreamingSpeaker(barge_in=auto_endpoint)
+                    
+                    if turn_speculation is not None:
+                        ai_response = turn_speculation.respond(user_email, recognized_text, on_token=speaker.feed)
+                    else:
+                        ai_response = utils.handle_turn(scenario, user_email, recognized_text, on_token=speaker.feed, memory=memory)
+                    
+                    print(f" AI Response: {ai_response}")
+                    
+                    print("🔊 Playing audio response...")
+                    time_to_first_audio = speaker.finish()
+                    if time_to_first_audio is not None:
+                        print(f"⏱️ Time to first audio: {time_to_first_audio:.2f}s")
+                    if speaker.interrupted:
+                        # Only what was played is part of the conversation; listen from where the callee began
+                        memory.revise_last("assistant", speaker.heard_reply())
+                        resume_from = speaker.resume_from
     except KeyboardInterrupt:
         print("\nVoice assistant stopped by user.")
     except Exception as e:
         print(f"Error in main loop: {e}")
+    finally:
+        print_stage_summary()
+
+def print_stage_summary():
+    # Where the time went during this run, per stage
+    summary = metrics.registry.summary()
+    if not summary:
+        return
+    print("\nStage timings (p50 / p95):")
+    for stage, stats in summary.items():
+        print(f"  {stage:20} {stats['p50'] * 1000:8.0f} ms {stats['p95'] * 1000:8.0f} ms  ({stats['count']} samples)")
+    print(rate_limiter.format_stats())
+    if utils.hedge_policy is not None and utils.hedge_policy.stats():
+        print(utils.hedge_policy.format_stats())
+    if speculation.stats.started:
+        print(speculation.stats.format_stats())
 
 def main():
     """
     Entry point for the application
     """
-    if initialize_services():
-        # Choose between terminal-based UI or Pygame UI
-        use_pygame_ui = input("Use graphical interface? (y/n): ").lower().startswith('y')
-        
-        if use_pygame_ui:
-            run_ui()
-        else:
-            main_loop()
+    # Clients are built in the background while the user answers the prompts
+    services = start_services()
+    startup.report.mark("menu")
+    
+    # Choose between terminal-based UI or Pygame UI
+    use_pygame_ui = input("Use graphical interface? (y/n): ").lower().startswith('y')
+    
+    if use_pygame_ui:
+        from pygame_ui import run_ui
+        run_ui(services)
+        print_startup_report()
     else:
-        print("Failed to initialize services. Exiting...")
+        main_loop(services=services)
 
 # Program entry point
 if __name__ == "__main__":
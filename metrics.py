@@ -0,0 +1,294 @@
+# metrics.py
+"""
+Per-stage latency instrumentation.
+
+Code paths wrap their work in `span("stt")`, `span("llm", attempt=1)` and so
+on. Every span is added to an in-process histogram (labelled by stage, the
+current turn's scenario and any extra labels) and, when a log path is
+configured, written as one JSON line by a background writer thread, so a slow
+disk never holds up the turn or the registry lock. `prometheus_text()` renders the
+histograms in the Prometheus text exposition format and `serve()` exposes
+them on /metrics. Point-in-time state (limiter rates, breaker states) is kept
+as gauges with `set_gauge()`, and event counts (breaker trips) as counters
+with `increment()`.
+
+The current turn lives in a context variable, so spans opened in asyncio
+tasks and in threads started with the turn's context are attributed to it.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds; +Inf is implied
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0)
+
+METRIC_NAME = "hinglish_agent_stage_duration_seconds"
+METRIC_PREFIX = "hinglish_agent_"
+
+_current_turn = contextvars.ContextVar("current_turn", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds"""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile (0-1) by interpolating inside the bucket that holds it"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _LogWriter:
+    """Appends queued span records to a JSON-lines file from a daemon thread, a batch at a time"""
+    def __init__(self, log_path, batch_size=256):
+        self.file = open(log_path, "a", encoding="utf-8")
+        self.batch_size = batch_size
+        self.records = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name="metrics-log", daemon=True)
+        self.thread.start()
+
+    def write(self, record):
+        self.records.put(record)
+
+    def close(self, timeout=5.0):
+        """Write what is queued, then close the file"""
+        self.records.put(None)
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.records.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in batch if record is not None]
+            try:
+                self.file.writelines(lines)
+                self.file.flush()
+            except Exception as e:
+                print(f"⚠️ Could not write metrics log: {e}")
+            if batch[-1] is None:
+                self.file.close()
+                return
+
+
+class MetricsRegistry:
+    """Histograms keyed by (stage, labels) plus an optional JSON-lines span log"""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}
+        self.gauges = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self._writer = None
+        self._server = None
+
+    def configure(self, log_path=None):
+        """Start (or stop, with None) writing every span to a JSON-lines file"""
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+        if log_path:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._writer = _LogWriter(log_path)
+
+    def observe(self, stage, seconds, **labels):
+        """Record a finished stage duration"""
+        turn = _current_turn.get()
+        if turn is not None:
+            labels.setdefault("scenario", turn["scenario"])
+        labels = {name: str(value) for name, value in labels.items() if value is not None}
+        key = (stage, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        writer = self._writer
+        if writer is not None:
+            record = {
+                "ts": round(time.time(), 3),
+                "turn_id": turn["turn_id"] if turn else None,
+                "stage": stage,
+                "duration_ms": round(seconds * 1000.0, 3),
+            }
+            if turn and turn["session_id"]:
+                record["session_id"] = turn["session_id"]
+            record.update(labels)
+            writer.write(record)
+
+    def set_gauge(self, name, value, **labels):
+        """Set a point-in-time value, e.g. the current request rate of an API"""
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self.lock:
+            self.gauges[key] = float(value)
+
+    def increment(self, name, amount=1, **labels):
+        """Add to a monotonically increasing counter, e.g. circuit breaker trips"""
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def values(self, name):
+        """{labels: value} for one gauge or counter"""
+        with self.lock:
+            return {labels: value for (metric, labels), value in list(self.gauges.items()) + list(self.counters.items())
+                    if metric == name}
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """
+        Time the enclosed block as one stage. The yielded dict can be filled
+        with labels known only at the end (e.g. outcome or cache hit). An
+        exception is recorded as outcome="error" and re-raised.
+        """
+        extra = {}
+        started = time.perf_counter()
+        try:
+            yield extra
+        except BaseException:
+            extra.setdefault("outcome", "error")
+            raise
+        finally:
+            labels.update(extra)
+            self.observe(stage, time.perf_counter() - started, **labels)
+
+    @contextmanager
+    def turn(self, scenario, session_id=None):
+        """Mark the enclosed block as one conversational turn; its total time is the "turn" stage"""
+        token = _current_turn.set({"turn_id": uuid.uuid4().hex[:12], "scenario": scenario, "session_id": session_id})
+        try:
+            with self.span("turn"):
+                yield
+        finally:
+            _current_turn.reset(token)
+
+    def summary(self):
+        """{stage: {count, p50, p95, p99}} merged over labels, in seconds"""
+        merged = {}
+        with self.lock:
+            for (stage, _), histogram in self.histograms.items():
+                total = merged.setdefault(stage, Histogram(self.buckets))
+                total.counts = [a + b for a, b in zip(total.counts, histogram.counts)]
+                total.sum += histogram.sum
+                total.count += histogram.count
+        return {
+            stage: {
+                "count": histogram.count,
+                "mean": histogram.sum / histogram.count if histogram.count else None,
+                "p50": histogram.quantile(0.5),
+                "p95": histogram.quantile(0.95),
+                "p99": histogram.quantile(0.99),
+            }
+            for stage, histogram in sorted(merged.items())
+        }
+
+    def prometheus_text(self):
+        """Histograms in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each stage of a conversational turn.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self.lock:
+            items = sorted(self.histograms.items())
+            for (stage, labels), histogram in items:
+                base = [("stage", stage)] + list(labels)
+                cumulative = 0
+                for bound, count in zip(list(self.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else repr(float(bound))
+                    lines.append(f"{METRIC_NAME}_bucket{_labels(base + [('le', le)])} {cumulative}")
+                lines.append(f"{METRIC_NAME}_sum{_labels(base)} {histogram.sum:.6f}")
+                lines.append(f"{METRIC_NAME}_count{_labels(base)} {histogram.count}")
+            for kind, series, suffix in (("gauge", self.gauges, ""), ("counter", self.counters, "_total")):
+                for name in sorted({metric for metric, _ in series}):
+                    full_name = METRIC_PREFIX + name + suffix
+                    lines.append(f"# TYPE {full_name} {kind}")
+                    for (metric, labels), value in sorted(series.items()):
+                        if metric == name:
+                            lines.append(f"{full_name}{_labels(labels) if labels else ''} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9108, host="0.0.0.0"):
+        """Expose prometheus_text() on http://host:port/metrics from a daemon thread"""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=self._server.serve_forever, name="metrics-http")
+        thread.daemon = True
+        thread.start()
+        return self._server
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.gauges = {}
+            self.counters = {}
+
+
+def _labels(pairs):
+    parts = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+# Process-wide registry used by the instrumented code paths
+registry = MetricsRegistry()
+span = registry.span
+observe = registry.observe
+set_gauge = registry.set_gauge
+increment = registry.increment
+turn = registry.turn
+atexit.register(registry.configure, None)
@@ -1,11 +1,19 @@
 import pygame
 import time
 import os
+import queue
+import threading
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 import utils
-from system_prompts import SYSTEM_PROMPTS
+import metrics
+import startup
+from system_prompts import SYSTEM_PROMPTS, INITIAL_GREETINGS, DEFAULT_GREETING
 from recording_helper import RecordingHelper
+from streaming_pipeline import StreamingSpeaker
+from speculation import SpeculativeTurn
+from conversation_memory import ConversationMemory
 
 # Define colors
 WHITE = (255, 255, 255)
@@ -22,6 +30,15 @@ DARK_BLUE = (0, 50, 150)
 SCREEN_WIDTH = 900
 SCREEN_HEIGHT = 650
 
+# Frame pacing: full rate while something animates, otherwise sleep until an event arrives
+ACTIVE_FPS = 60
+IDLE_WAIT_MS = 1000
+# Posted by the turn worker so an idle frame loop wakes up for its updates
+UI_WAKE_EVENT = pygame.USEREVENT + 1
+
+# Region holding the recording indicator / turn stage text
+STATUS_RECT = pygame.Rect(150, SCREEN_HEIGHT-140, SCREEN_WIDTH-300, 55)
+
 class Button:
     def __init__(self, x, y, width, height, text, color=BLUE, hover_color=DARK_BLUE, text_color=WHITE):
         self.rect = pygame.Rect(x, y, width, height)
@@ -30,6 +47,8 @@ class Button:
         self.hover_color = hover_color
         self.text_color = text_color
         self.is_hovered = False
+        self._text_surface = None
+        self._text_key = None
         
     def draw(self, screen, font):
         # Draw button with hover effect
@@ -37,10 +56,16 @@ class Button:
         pygame.draw.rect(screen, color, self.rect, border_radius=5)
         pygame.draw.rect(screen, DARK_GRAY, self.rect, 2, border_radius=5)
         
-        # Draw text
-        text_surf = font.render(self.text, True, self.text_color)
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        screen.blit(text_surf, text_rect)
+        # Draw text, rendered again only when the label changes
+        if self._text_key != (self.text, font):
+            self._text_surface = font.render(self.text, True, self.text_color)
+            self._text_key = (self.text, font)
+        text_rect = self._text_surface.get_rect(center=self.rect.center)
+        screen.blit(self._text_surface, text_rect)
+    
+    @property
+    def state(self):
+        return (self.text, self.is_hovered)
         
     def check_hover(self, pos):
         self.is_hovered = self.rect.collidepoint(pos)
@@ -97,87 +122,155 @@ class InputBox:
         return self.text
 
 class ScrollableTextArea:
-    def __init__(self, x, y, width, height, text=''):
+    """
+    Transcript view. Messages are wrapped to the pixel width once, when they
+    arrive; only the visible lines are rendered and their surfaces are cached,
+    so drawing cost does not grow with the length of the call.
+    """
+    def __init__(self, x, y, width, height, text='', max_lines=2000):
         self.rect = pygame.Rect(x, y, width, height)
         self.text = text
         self.scroll_y = 0
         self.line_height = 24
         self.visible_lines = height // self.line_height
+        # Wrapped lines as (text, color); the oldest are dropped past max_lines
         self.lines = []
-        self.max_chars_per_line = width // 10  # Approximate
+        self.max_lines = max_lines
+        # Absolute number of lines[0], so cached surfaces survive trimming
+        self.first_line_number = 0
+        # Messages waiting to be wrapped once the font is known
+        self.pending = []
+        self.font = None
+        self.wrap_width = width - 25  # Room for padding and the scrollbar
+        self.line_surfaces = {}
+        # The whole area is composed once and re-blitted until something changes
+        self.surface = None
+        self.dirty = True
         
     def add_text(self, speaker, text):
         # Format text with speaker and timestamp
         timestamp = datetime.now().strftime("%H:%M:%S")
-        new_text = f"[{timestamp}] {speaker}: {text}"
-        
-        # Wrap text to fit the width
-        words = new_text.split()
+        self.pending.append((f"[{timestamp}] {speaker}: {text}", self._color_for(speaker)))
+        self.dirty = True
+    
+    @staticmethod
+    def _color_for(speaker):
+        # Color coding for different speakers
+        if speaker == "AI":
+            return BLUE
+        if speaker == "You":
+            return GREEN
+        return BLACK
+    
+    def _wrap(self, text, font):
+        """Split text into lines no wider than wrap_width pixels"""
         lines = []
         current_line = ""
-        
-        for word in words:
-            if len(current_line) + len(word) + 1 <= self.max_chars_per_line:
-                current_line += (word + " ")
-            else:
+        for word in text.split():
+            candidate = f"{current_line} {word}" if current_line else word
+            if font.size(candidate)[0] <= self.wrap_width:
+                current_line = candidate
+                continue
+            if current_line:
                 lines.append(current_line)
-                current_line = word + " "
-        
+            # A single word wider than the area is broken across lines
+            while font.size(word)[0] > self.wrap_width and len(word) > 1:
+                cut = len(word) - 1
+                while cut > 1 and font.size(word[:cut])[0] > self.wrap_width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+            current_line = word
         if current_line:
             lines.append(current_line)
-            
-        self.lines.extend(lines)
+        return lines
+    
+    def _flush_pending(self, font):
+        if font is not self.font:
+            # Different font: cached surfaces no longer apply (existing lines keep their wrapping)
+            self.font = font
+            self.line_surfaces = {}
+        if not self.pending:
+            return
+        for text, color in self.pending:
+            self.lines.extend((line, color) for line in self._wrap(text, font))
+        self.pending = []
+        
+        if len(self.lines) > self.max_lines:
+            excess = len(self.lines) - self.max_lines
+            del self.lines[:excess]
+            self.first_line_number += excess
+            self.line_surfaces = {
+                number: surface for number, surface in self.line_surfaces.items()
+                if number >= self.first_line_number
+            }
         
         # Auto-scroll to bottom
-        if len(self.lines) > self.visible_lines:
-            self.scroll_y = len(self.lines) - self.visible_lines
+        self.scroll_y = max(0, len(self.lines) - self.visible_lines)
+    
+    def _line_surface(self, index):
+        number = self.first_line_number + index
+        surface = self.line_surfaces.get(number)
+        if surface is None:
+            line, color = self.lines[index]
+            surface = self.line_surfaces[number] = self.font.render(line, True, color)
+        return surface
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
+            previous = self.scroll_y
             if event.button == 4:  # Scroll up
                 self.scroll_y = max(0, self.scroll_y - 1)
             elif event.button == 5:  # Scroll down
                 self.scroll_y = min(max(0, len(self.lines) - self.visible_lines), self.scroll_y + 1)
+            if self.scroll_y != previous:
+                self.dirty = True
                 
     def draw(self, screen, font):
-        # Draw background
-        pygame.draw.rect(screen, WHITE, self.rect, border_radius=5)
-        pygame.draw.rect(screen, GRAY, self.rect, 2, border_radius=5)
+        if self.dirty or font is not self.font:
+            self._flush_pending(font)
+            self._compose()
+            self.dirty = False
+        screen.blit(self.surface, self.rect)
+    
+    def _compose(self):
+        if self.surface is None:
+            self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 0))
+        area = self.surface.get_rect()
         
-        # Create a clip area
-        screen.set_clip(self.rect)
+        # Draw background
+        pygame.draw.rect(self.surface, WHITE, area, border_radius=5)
+        pygame.draw.rect(self.surface, GRAY, area, 2, border_radius=5)
         
-        # Draw visible lines
+        # Only the visible lines are touched; their surfaces are rendered once
         start_line = self.scroll_y
         end_line = min(start_line + self.visible_lines, len(self.lines))
-        
-        for i, line in enumerate(self.lines[start_line:end_line]):
-            y_pos = self.rect.y + (i * self.line_height) + 5
-            
-            # Color coding for different speakers
-            if "AI:" in line:
-                text_color = BLUE
-            elif "You:" in line:
-                text_color = GREEN
-            else:
-                text_color = BLACK
-                
-            text_surface = font.render(line, True, text_color)
-            screen.blit(text_surface, (self.rect.x + 5, y_pos))
+        for i in range(start_line, end_line):
+            y_pos = (i - start_line) * self.line_height + 5
+            self.surface.blit(self._line_surface(i), (5, y_pos))
+        
+        # Keep the surface cache to roughly the lines around the view
+        if len(self.line_surfaces) > self.visible_lines * 4:
+            first = self.first_line_number + start_line - self.visible_lines
+            last = self.first_line_number + end_line + self.visible_lines
+            self.line_surfaces = {
+                number: surface for number, surface in self.line_surfaces.items()
+                if first <= number < last
+            }
         
         # Draw scrollbar if needed
         if len(self.lines) > self.visible_lines:
-            scrollbar_height = self.rect.height * (self.visible_lines / len(self.lines))
-            scrollbar_pos = self.rect.y + (self.scroll_y / (len(self.lines) - self.visible_lines)) * (self.rect.height - scrollbar_height)
+            scrollbar_height = area.height * (self.visible_lines / len(self.lines))
+            scrollbar_pos = (self.scroll_y / (len(self.lines) - self.visible_lines)) * (area.height - scrollbar_height)
             
-            scrollbar_rect = pygame.Rect(self.rect.right - 15, scrollbar_pos, 10, scrollbar_height)
-            pygame.draw.rect(screen, DARK_GRAY, scrollbar_rect, border_radius=5)
-        
-        # Reset clip area
-        screen.set_clip(None)
+            scrollbar_rect = pygame.Rect(area.right - 15, scrollbar_pos, 10, scrollbar_height)
+            pygame.draw.rect(self.surface, DARK_GRAY, scrollbar_rect, border_radius=5)
 
 class AIAssistantApp:
-    def __init__(self):
+    def __init__(self, auto_endpoint=True, services=None):
+        # Background warm-up from main.start_services; waited on before the first call
+        self.services = services
         pygame.init()
         pygame.display.set_caption("Hinglish Cold Calling AI Agent")
         
@@ -195,9 +288,23 @@ class AIAssistantApp:
         self.user_email = ""
         self.is_recording = False
         self.recording_start_time = 0
-        
-        # Speech recognition
-        self.recording_helper = RecordingHelper()
+        self.memory = None
+        
+        # Turns run on a worker thread and report back through ui_events, so the
+        # frame loop keeps running while audio is recognized, answered and played
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="turn")
+        self.ui_events = queue.Queue()
+        self.turn_id = 0
+        self.turn_stage = None
+        self.turn_stage_time = 0
+        self.cancel_event = None
+        self.active_speaker = None
+        
+        # Speech recognition; with auto endpointing a turn ends when the speaker goes quiet
+        self.auto_endpoint = auto_endpoint
+        self.recording_helper = RecordingHelper(auto_endpoint=auto_endpoint, streaming=utils.streaming_stt_enabled)
+        # Reply started from interim transcripts of the recording in progress
+        self.speculation = None
         
         # Create UI elements - Scenario Selection
         self.demo_button = Button(SCREEN_WIDTH//2-150, 200, 300, 50, "Demo Scheduling for ERP System")
@@ -214,18 +321,99 @@ class AIAssistantApp:
         # Recording animation
         self.recording_dots = 0
         self.recording_anim_time = 0
+        
+        # Redraw bookkeeping: only regions whose content changed are repainted
+        self.full_redraw = True
+        self.dirty_rects = []
+        self.drawn_state = None
+        self.widget_states = {}
+        self.text_surfaces = {}
+    
+    def render_text(self, font, text, color):
+        """Rendered text surface, cached for labels drawn on every repaint"""
+        key = (font, text, color)
+        surface = self.text_surfaces.get(key)
+        if surface is None:
+            if len(self.text_surfaces) > 256:
+                self.text_surfaces = {}
+            surface = self.text_surfaces[key] = font.render(text, True, color)
+        return surface
+    
+    def invalidate(self, rect=None):
+        """Mark a region (or, with None, the whole window) for repainting"""
+        if rect is None:
+            self.full_redraw = True
+        else:
+            self.dirty_rects.append(pygame.Rect(rect))
+    
+    def track(self, name, rect, state):
+        """Invalidate rect when a widget's visible state differs from the last frame"""
+        if self.widget_states.get(name) != state:
+            self.widget_states[name] = state
+            self.invalidate(rect)
+    
+    def is_animating(self):
+        """True while something on screen changes without user input"""
+        return self.current_state == "conversation" and (self.is_recording or self.turn_in_progress)
+    
+    def update_damage(self):
+        """Work out which regions changed since the last frame"""
+        if self.current_state != self.drawn_state:
+            self.drawn_state = self.current_state
+            self.widget_states = {}
+            self.invalidate()
+        if self.current_state == "scenario_selection":
+            for name in ("demo_button", "interview_button", "payment_button"):
+                button = getattr(self, name)
+                self.track(name, button.rect, button.state)
+            self.track("email_input", self.email_input.rect, (self.email_input.text, self.email_input.color))
+        else:
+            for name in ("record_button", "exit_button", "back_button"):
+                button = getattr(self, name)
+                self.track(name, button.rect, button.state)
+            if self.conversation_area.dirty:
+                self.invalidate(self.conversation_area.rect)
+            self.track("status", STATUS_RECT, self.status_state())
+    
+    def status_state(self):
+        # Update animation
+        if self.is_recording:
+            current_time = time.time()
+            if current_time - self.recording_anim_time > 0.5:
+                self.recording_dots = (self.recording_dots + 1) % 4
+                self.recording_anim_time = current_time
+            return ("recording", self.recording_dots, int(time.time() - self.recording_start_time))
+        if self.turn_stage:
+            return ("stage", self.turn_stage, round(time.time() - self.turn_stage_time, 1))
+        return None
+    
+    def render_frame(self):
+        """Repaint damaged regions and push only those to the display"""
+        draw = self.draw_scenario_selection if self.current_state == "scenario_selection" else self.draw_conversation
+        if self.full_redraw:
+            draw()
+            pygame.display.flip()
+        elif self.dirty_rects:
+            rects = self.dirty_rects
+            for rect in rects:
+                self.screen.set_clip(rect)
+                draw()
+            self.screen.set_clip(None)
+            pygame.display.update(rects)
+        self.full_redraw = False
+        self.dirty_rects = []
     
     def draw_scenario_selection(self):
         """Draw the scenario selection screen"""
         self.screen.fill(LIGHT_GRAY)
         
         # Draw title
-        title_surf = self.title_font.render("Hinglish Cold Calling AI Agent", True, DARK_BLUE)
+        title_surf = self.render_text(self.title_font, "Hinglish Cold Calling AI Agent", DARK_BLUE)
         title_rect = title_surf.get_rect(center=(SCREEN_WIDTH//2, 80))
         self.screen.blit(title_surf, title_rect)
         
         # Draw subtitle
-        subtitle_surf = self.normal_font.render("Select a scenario to begin:", True, BLACK)
+        subtitle_surf = self.render_text(self.normal_font, "Select a scenario to begin:", BLACK)
         subtitle_rect = subtitle_surf.get_rect(center=(SCREEN_WIDTH//2, 130))
         self.screen.blit(subtitle_surf, subtitle_rect)
         
@@ -235,14 +423,14 @@ class AIAssistantApp:
         self.payment_button.draw(self.screen, self.normal_font)
         
         # Draw email input label
-        email_label = self.normal_font.render("Email Address:", True, BLACK)
+        email_label = self.render_text(self.normal_font, "Email Address:", BLACK)
         self.screen.blit(email_label, (SCREEN_WIDTH//2-150, 385))
         
         # Draw email input
         self.email_input.draw(self.screen, self.normal_font)
         
         # Draw footer
-        footer_surf = self.small_font.render("Press ESC to exit application", True, DARK_GRAY)
+        footer_surf = self.render_text(self.small_font, "Press ESC to exit application", DARK_GRAY)
         footer_rect = footer_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT-30))
         self.screen.blit(footer_surf, footer_rect)
     
@@ -257,12 +445,12 @@ class AIAssistantApp:
             "payment_followup": "Payment/Order Follow-up"
         }.get(self.scenario, "Conversation")
         
-        title_surf = self.title_font.render(f"AI Agent: {scenario_name}", True, DARK_BLUE)
+        title_surf = self.render_text(self.title_font, f"AI Agent: {scenario_name}", DARK_BLUE)
         title_rect = title_surf.get_rect(midleft=(50, 50))
         self.screen.blit(title_surf, title_rect)
         
         # Draw email info
-        email_surf = self.small_font.render(f"Email: {self.user_email}", True, DARK_GRAY)
+        email_surf = self.render_text(self.small_font, f"Email: {self.user_email}", DARK_GRAY)
         email_rect = email_surf.get_rect(midright=(SCREEN_WIDTH-50, 50))
         self.screen.blit(email_surf, email_rect)
         
@@ -274,14 +462,15 @@ class AIAssistantApp:
         self.exit_button.draw(self.screen, self.normal_font)
         self.back_button.draw(self.screen, self.normal_font)
         
-        # Draw recording indicator if recording
+        # Show what the current turn is doing while it runs in the background
+        if self.turn_stage and not self.is_recording:
+            elapsed = time.time() - self.turn_stage_time
+            stage_surf = self.normal_font.render(f"{self.turn_stage}... {elapsed:.1f}s", True, GREEN)
+            stage_rect = stage_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT-120))
+            self.screen.blit(stage_surf, stage_rect)
+        
+        # Draw recording indicator if recording (animation advanced in status_state)
         if self.is_recording:
-            # Update animation
-            current_time = time.time()
-            if current_time - self.recording_anim_time > 0.5:
-                self.recording_dots = (self.recording_dots + 1) % 4
-                self.recording_anim_time = current_time
-                
             dots = "." * self.recording_dots
             recording_surf = self.normal_font.render(f"Recording{dots}", True, RED)
             recording_rect = recording_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT-120))
@@ -304,108 +493,243 @@ class AIAssistantApp:
             self.user_email = "customer@example.com"
         
         # Prepare initial greeting
-        initial_greeting = {
-            "demo_scheduling": "Namaste! Mai iMax Global Ventures se bol raha hoon. Kya aap hamare ERP system ke baare mein baat karna chahenge?",
-            "candidate_interviewing": "Namaste! Mai iMax Global Ventures se bol raha hoon. Hum aapka interview lene wale hain AI/ML Engineer position ke liye.",
-            "payment_followup": "Namaste! Mai iMax Global Ventures se bol raha hoon. Mai aapke pending payment ke baare mein baat karna chahta hoon."
-        }
-        
-        greeting = initial_greeting.get(self.scenario, "Namaste! Mai iMax Global Ventures se bol raha hoon.")
+        greeting = INITIAL_GREETINGS.get(self.scenario, DEFAULT_GREETING)
         
         # Add greeting to conversation
         self.conversation_area.add_text("AI", greeting)
         
-        # Synthesize and play greeting
-        greeting_audio = utils.synthesize_speech(greeting, output_path="greeting.mp3")
-        utils.play_audio(greeting_audio)
+        # Fresh conversation history for each call
+        self.memory = ConversationMemory(summarizer=utils.summarize_conversation)
+        self.memory.add_message("assistant", greeting)
+        
+        # Synthesize and play the greeting off the render thread
+        self.recording_helper.scenario = self.scenario
+        self.submit_job(self._greet, greeting)
+    
+    def _greet(self, turn_id, cancel, greeting):
+        # Clients may still be warming up if the scenario was picked quickly
+        if self.services is not None:
+            self.post(turn_id, "stage", stage="Connecting")
+            if not self.services.wait():
+                self.post(turn_id, "transcript", speaker="System", text="Some services failed to initialize.")
+            self.services = None
+        
+        self.post(turn_id, "stage", stage="Greeting")
+        try:
+            greeting_audio = utils.synthesize_audio(greeting)
+            startup.report.mark("first_greeting")
+            if not cancel.is_set():
+                utils.play_audio(greeting_audio)
+        except Exception as e:
+            print(f"Error synthesizing speech: {e}")
+        # Start listening for the reply straight away
+        self.post(turn_id, "done", listen=True)
+    
+    def submit_job(self, job, *args):
+        """Run job(turn_id, cancel_event, *args) on the turn worker, cancelling any turn in progress"""
+        self.cancel_turn()
+        self.turn_id += 1
+        self.cancel_event = threading.Event()
+        self.turn_stage = "Processing"
+        self.turn_stage_time = time.time()
+        self.executor.submit(self._run_job, job, self.turn_id, self.cancel_event, args)
+    
+    def _run_job(self, job, turn_id, cancel, args):
+        try:
+            job(turn_id, cancel, *args)
+        except Exception as e:
+            print(f"Error processing turn: {e}")
+            self.post(turn_id, "transcript", speaker="System", text=f"Error: {e}")
+            self.post(turn_id, "done", listen=False)
+    
+    def post(self, turn_id, kind, **data):
+        """Called from the worker: hand a progress update to the render thread"""
+        self.ui_events.put((turn_id, kind, data))
+        try:
+            pygame.event.post(pygame.event.Event(UI_WAKE_EVENT))
+        except pygame.error:
+            pass  # Window already closed
     
-    def start_recording(self):
+    def leave_conversation(self):
+        """Stop any active recording and the turn in progress (back, exit or quit)"""
+        if self.is_recording:
+            self.recording_helper.stop_recording()
+            self.is_recording = False
+        self.cancel_turn()
+    
+    def cancel_turn(self):
+        """Stop the turn in progress: pending speech is dropped and its later updates are ignored"""
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.cancel_event = None
+        speaker, self.active_speaker = self.active_speaker, None
+        if speaker is not None:
+            speaker.cancel()
+        speculation, self.speculation = self.speculation, None
+        if speculation is not None:
+            speculation.cancel()
+        self.turn_stage = None
+    
+    @property
+    def turn_in_progress(self):
+        return self.turn_stage is not None
+    
+    def process_ui_events(self):
+        """Apply progress updates posted by the worker; runs once per frame"""
+        while True:
+            try:
+                turn_id, kind, data = self.ui_events.get_nowait()
+            except queue.Empty:
+                return
+            if turn_id != self.turn_id:
+                continue  # Left over from a cancelled turn
+            if kind == "stage":
+                self.turn_stage = data["stage"]
+                self.turn_stage_time = time.time()
+            elif kind == "transcript":
+                self.conversation_area.add_text(data["speaker"], data["text"])
+            elif kind == "exit":
+                self.turn_stage = None
+                self.current_state = "scenario_selection"
+            elif kind == "done":
+                self.turn_stage = None
+                self.active_speaker = None
+                self.cancel_event = None
+                self.record_button.text = "Start Recording (SPACE)"
+                # Listen for the next turn without waiting for SPACE
+                if data.get("listen") and self.auto_endpoint and self.current_state == "conversation":
+                    self.start_recording(origin=data.get("origin"))
+    
+    def toggle_turn(self):
+        """SPACE / record button: stop recording, cancel a running turn, or start recording"""
+        if self.is_recording:
+            self.stop_recording()
+        elif self.turn_in_progress:
+            self.cancel_turn()
+            self.record_button.text = "Start Recording (SPACE)"
+        else:
+            self.start_recording()
+    
+    def start_recording(self, origin=None):
         """Start recording audio"""
-        if self.recording_helper.start_recording():
+        if self.speculation is not None:
+            # Left over from a recording that never produced a turn
+            self.speculation.cancel()
+            self.speculation = None
+        if self.auto_endpoint and utils.speculation_enabled:
+            self.speculation = SpeculativeTurn(self.scenario, self.memory)
+        self.recording_helper.on_interim = self.speculation.on_interim if self.speculation else None
+        if self.recording_helper.start_recording(origin=origin):
             self.is_recording = True
             self.recording_start_time = time.time()
             self.record_button.text = "Stop Recording (SPACE)"
         else:
             self.conversation_area.add_text("System", "Could not start recording. Please try again.")
             
-    def recognize_speech(self):
-        """Get the recognized speech from our helper"""
+    def recognize_speech(self, cancel, timeout=30.0):
+        """Worker side: stop the recording and wait for the recognition result"""
         self.recording_helper.stop_recording()
         
-        # Wait a bit for the processing to complete
-        wait_time = 0
-        while not self.recording_helper.is_complete and wait_time < 30:
-            pygame.time.delay(100)  # Wait for 100ms
-            wait_time += 0.1
-            
-            # Need to keep the UI responsive during waiting
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return None
+        deadline = time.time() + timeout
+        while not self.recording_helper.is_complete and time.time() < deadline:
+            if cancel.wait(0.05):
+                return None, None
         
-        text, error = self.recording_helper.get_result()
-        
-        if error:
-            self.conversation_area.add_text("System", f"Error: {error}")
-            
-        return text
+        return self.recording_helper.get_result()
     
     def stop_recording(self):
-        """Stop recording and process audio"""
+        """Stop recording and process the turn on the worker thread"""
         self.is_recording = False
-        self.record_button.text = "Start Recording (SPACE)"
-        
-        # Show Processing message
-        processing_surf = self.normal_font.render("Processing...", True, GREEN)
-        processing_rect = processing_surf.get_rect(center=(SCREEN_WIDTH//2, SCREEN_HEIGHT-120))
-        self.screen.blit(processing_surf, processing_rect)
-        pygame.display.flip()
-        
-        # Get recognized text using our own recording method instead of utils function
-        recognized_text = self.recognize_speech()
-        
-        if recognized_text:
+        self.record_button.text = "Cancel (SPACE)"
+        # Handed to the worker, so submit_job's cancel_turn leaves it running
+        speculation, self.speculation = self.speculation, None
+        self.submit_job(self._process_turn, self.scenario, self.user_email, self.memory, speculation)
+    
+    def _process_turn(self, turn_id, cancel, scenario, user_email, memory, speculation=None):
+        try:
+            self._answer_turn(turn_id, cancel, scenario, user_email, memory, speculation)
+        finally:
+            # No-op once committed; otherwise the turn was cancelled or had no usable transcript
+            if speculation is not None:
+                speculation.cancel()
+    
+    def _answer_turn(self, turn_id, cancel, scenario, user_email, memory, speculation):
+        # Everything from recognition to the end of playback is timed as one turn
+        with metrics.turn(scenario):
+            self.post(turn_id, "stage", stage="Recognizing")
+            recognized_text, error = self.recognize_speech(cancel)
+            if cancel.is_set():
+                return
+            if error:
+                self.post(turn_id, "transcript", speaker="System", text=f"Error: {error}")
+            
+            if not recognized_text:
+                self.post(turn_id, "transcript", speaker="System", text="Could not understand audio. Please try again.")
+                self.post(turn_id, "done", listen=False)
+                return
+            
             # Add user's text to conversation
-            self.conversation_area.add_text("You", recognized_text)
+            self.post(turn_id, "transcript", speaker="You", text=recognized_text)
             
-            # Process based on scenario
-            if recognized_text.lower() in ["exit", "quit", "stop", "बंद", "बंद करो"]:
-                self.current_state = "scenario_selection"
+            if recognized_text.lower() in utils.EXIT_COMMANDS:
+                self.post(turn_id, "exit")
                 return
             
+            # Reply audio starts playing while the rest is still being generated; with
+            # automatic endpointing the callee can talk over it to interrupt
+            speaker = StreamingSpeaker(barge_in=self.auto_endpoint)
+            self.active_speaker = speaker
+            if cancel.is_set():
+                speaker.cancel()
+            
             # Get AI response based on scenario
-            if self.scenario == "demo_scheduling":
-                ai_response = utils.handle_demo_scheduling(self.user_email, recognized_text)
-            elif self.scenario == "candidate_interviewing":
-                ai_response = utils.handle_candidate_interview(recognized_text)
-            elif self.scenario == "payment_followup":
-                ai_response = utils.handle_payment_followup(self.user_email, recognized_text)
+            self.post(turn_id, "stage", stage="Thinking")
+            if speculation is not None:
+                ai_response = speculation.respond(user_email, recognized_text, on_token=speaker.feed, cancel=cancel)
             else:
-                ai_response = utils.get_ai_response(recognized_text)
+                ai_response = utils.handle_turn(scenario, user_email, recognized_text, on_token=speaker.feed,
+                                                memory=memory, cancel=cancel)
+            if ai_response is None:
+                # Cancelled mid-reply: nothing was remembered, cached or logged
+                speaker.cancel()
+                return
             
             # Add AI response to conversation
-            self.conversation_area.add_text("AI", ai_response)
+            self.post(turn_id, "transcript", speaker="AI", text=ai_response)
             
-            # Synthesize speech and play audio
-            audio_file = utils.synthesize_speech(ai_response)
-            utils.play_audio(audio_file)
-        else:
-            self.conversation_area.add_text("System", "Could not understand audio. Please try again.")
+            # Wait for the queued speech to finish playing
+            self.post(turn_id, "stage", stage="Speaking")
+            speaker.finish()
+            
+            if speaker.interrupted:
+                # Only what was played is part of the conversation; listen from where the callee began
+                memory.revise_last("assistant", speaker.heard_reply())
+                self.post(turn_id, "transcript", speaker="System", text="Interrupted by the callee.")
+            
+            self.post(turn_id, "done", listen=not cancel.is_set(), origin=speaker.resume_from)
     
     def run(self):
         """Main application loop"""
         running = True
         
         while running:
+            # Idle: sleep until input or a worker update arrives instead of spinning
+            if self.is_animating() or self.full_redraw or self.dirty_rects:
+                events = pygame.event.get()
+            else:
+                events = [pygame.event.wait(IDLE_WAIT_MS)] + pygame.event.get()
+            
             # Track mouse position
             mouse_pos = pygame.mouse.get_pos()
             
             # Handle events
-            for event in pygame.event.get():
+            for event in events:
+                if event.type in (pygame.VIDEOEXPOSE, getattr(pygame, "WINDOWEXPOSED", pygame.VIDEOEXPOSE)):
+                    self.invalidate()
+                
                 if event.type == pygame.QUIT:
-                    # Make sure to stop any active recording before quitting
-                    if self.is_recording:
-                        self.recording_helper.stop_recording()
+                    # Make sure to stop any active recording or turn before quitting
+                    self.leave_conversation()
                     running = False
                 
                 if event.type == pygame.KEYDOWN:
@@ -413,17 +737,12 @@ class AIAssistantApp:
                         if self.current_state == "scenario_selection":
                             running = False
                         else:
-                            # Make sure to stop any active recording before going back
-                            if self.is_recording:
-                                self.recording_helper.stop_recording()
-                                self.is_recording = False
+                            # Make sure to stop any active recording or turn before going back
+                            self.leave_conversation()
                             self.current_state = "scenario_selection"
                     
                     if event.key == pygame.K_SPACE and self.current_state == "conversation":
-                        if self.is_recording:
-                            self.stop_recording()
-                        else:
-                            self.start_recording()
+                        self.toggle_turn()
                 
                 # Handle state-specific events
                 if self.current_state == "scenario_selection":
@@ -452,17 +771,23 @@ class AIAssistantApp:
                     
                     # Handle button clicks
                     if self.record_button.is_clicked(mouse_pos, event):
-                        if self.is_recording:
-                            self.stop_recording()
-                        else:
-                            self.start_recording()
+                        self.toggle_turn()
                     
                     elif self.exit_button.is_clicked(mouse_pos, event):
+                        self.leave_conversation()
                         running = False
                     
                     elif self.back_button.is_clicked(mouse_pos, event):
+                        self.leave_conversation()
                         self.current_state = "scenario_selection"
             
+            # Progress and results from the turn worker
+            self.process_ui_events()
+            
+            # A voice-endpointed recording finishes on its own
+            if self.is_recording and self.recording_helper.is_complete:
+                self.stop_recording()
+            
             # Update button hover states
             if self.current_state == "scenario_selection":
                 self.demo_button.check_hover(mouse_pos)
@@ -473,21 +798,18 @@ class AIAssistantApp:
                 self.exit_button.check_hover(mouse_pos)
                 self.back_button.check_hover(mouse_pos)
             
-            # Draw the current state
-            if self.current_state == "scenario_selection":
-                self.draw_scenario_selection()
-            else:
-                self.draw_conversation()
-            
-            # Update the display
-            pygame.display.flip()
-            self.clock.tick(60)        
+            # Repaint only what changed
+            self.update_damage()
+            self.render_frame()
+            if self.is_animating():
+                self.clock.tick(ACTIVE_FPS)
+        self.executor.shutdown(wait=False)
         pygame.quit()
 
-def run_ui():
+def run_ui(services=None):
     """Run the PyGame UI application"""
     try:
-        app = AIAssistantApp()
+        app = AIAssistantApp(services=services)
         app.run()
     except Exception as e:
         print(f"Error in PyGame UI: {e}")      
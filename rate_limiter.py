@@ -0,0 +1,381 @@
+# rate_limiter.py
+"""
+Client-side protection for the external APIs (LLM, Speech, TTS, Calendar).
+
+Each API has one ApiGuard shared by every call in the process:
+
+- a token bucket paces requests. The rate adapts with AIMD: it grows a
+  little after every success and is halved on a 429 or 5xx.
+- retries use full-jitter exponential backoff. The async paths wait with
+  asyncio.sleep, so a throttled session never holds up the event loop.
+  A token that would take longer than `max_wait` fails the call instead
+  of parking the thread.
+- a circuit breaker opens after `failure_threshold` consecutive provider
+  failures. While it is open, calls fail at once with CircuitOpenError and
+  the caller falls back (a stock line, an empty transcript). After
+  `reset_timeout` a single probe call is let through to test the provider.
+
+Guard state is published as metrics: `rate_limit_rate` and
+`rate_limit_tokens` gauges, a `circuit_breaker_state` gauge (0 closed,
+1 half-open, 2 open), `circuit_breaker_trips` and `api_errors` counters,
+and `rate_limit_wait` / `backoff` timings.
+"""
+import time
+import random
+import asyncio
+import threading
+
+import metrics
+
+# Starting requests/second per API; AIMD moves the live rate between min_rate and max_rate
+DEFAULT_LIMITS = {
+    "llm": {"rate": 10.0, "max_rate": 50.0},
+    "stt": {"rate": 20.0, "max_rate": 100.0},
+    "tts": {"rate": 20.0, "max_rate": 100.0},
+    # Inserts are retried by the booking queue, which makes them idempotent first
+    "calendar": {"rate": 5.0, "max_rate": 10.0, "max_retries": 1},
+}
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class RateLimited(Exception):
+    """No request token became available within max_wait"""
+
+
+class CircuitOpenError(Exception):
+    """The provider is failing; the call was rejected without being sent"""
+
+
+def status_code(error):
+    """HTTP-style status of an API error (OpenAI, google-api-core, googleapiclient), or None"""
+    for attribute in ("status_code", "code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "resp", None)
+    if response is None:
+        response = getattr(error, "response", None)
+    value = getattr(response, "status", None)
+    if value is None:
+        value = getattr(response, "status_code", None)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def classify(error):
+    """
+    "throttled" for 429, "server" for 5xx and network failures, including
+    speech_recognition's RequestError (both count against the provider and
+    are retried), "client" for other 4xx and "other" for anything else,
+    e.g. unintelligible audio
+    """
+    status = status_code(error)
+    if status == 429:
+        return "throttled"
+    if status is not None and status >= 500:
+        return "server"
+    if status is not None and 400 <= status < 500:
+        return "client"
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return "server"
+    name = type(error).__name__
+    if name == "RequestError" and type(error).__module__.startswith("speech_recognition"):
+        # recognize_google raises it for an unreachable service or an HTTP error reply
+        return "server"
+    if any(word in name for word in ("Timeout", "Connect", "Unavailable", "DeadlineExceeded", "ResourceExhausted")):
+        return "server"
+    return "other"
+
+
+class TokenBucket:
+    """
+    Token bucket whose refill rate adapts with AIMD. `reserve` takes a
+    token right away and returns how long the caller has to wait for it,
+    so concurrent callers queue up behind each other instead of all
+    waking at once.
+    """
+    def __init__(self, rate, burst=None, min_rate=0.5, max_rate=None, increase=0.1,
+                 decrease_factor=0.5, decrease_cooldown=1.0):
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate * 5
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token; returns the seconds until it is actually available"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self):
+        """Give back a reserved token the caller decided not to use"""
+        with self.lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def on_success(self):
+        """Additive increase"""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        """
+        Multiplicative decrease. Requests already in flight when the provider
+        pushed back fail together, so the rate is cut at most once per
+        cooldown rather than once per failure.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now - self.last_decrease < self.decrease_cooldown:
+                return False
+            self.last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            # Drop the saved-up burst too, or it would be spent straight into the next 429
+            self.tokens = min(self.tokens, 1.0)
+            return True
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe after reset_timeout"""
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may be sent now; in half-open state only one probe at a time"""
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state("half_open")
+            if self.state == "half_open":
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def retry_after(self):
+        """Seconds until the breaker lets a probe through (0 when closed)"""
+        with self.lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != "closed":
+                print(f"✅ {self.name} recovered, circuit closed")
+                self._set_state("closed")
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.opened_at = time.monotonic()
+                self.trips += 1
+                self._set_state("open")
+                metrics.increment("circuit_breaker_trips", api=self.name)
+                print(f"⛔ {self.name} circuit opened after {self.failures} failures; failing fast for {self.reset_timeout:.0f}s")
+
+    def release(self):
+        """The admitted call never reached the provider; free the probe slot"""
+        with self.lock:
+            self._probing = False
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge("circuit_breaker_state", BREAKER_STATES[state], api=self.name)
+
+
+class ApiGuard:
+    """
+    Limiter, retry policy and breaker for one API. Call sites either use
+    `call` / `acall`, or drive the steps themselves (`admit`,
+    `record_success`, `record_failure`, `backoff`) when a retry needs
+    special handling, e.g. a streamed reply that is already being spoken.
+    """
+    def __init__(self, name, rate=10.0, burst=None, min_rate=0.5, max_rate=None, increase=0.1,
+                 max_retries=3, base_delay=0.5, max_delay=8.0, max_wait=5.0,
+                 failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst=burst, min_rate=min_rate, max_rate=max_rate, increase=increase)
+        self.breaker = CircuitBreaker(name, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.breaker._set_state("closed")
+        self._publish()
+
+    def _reserve(self):
+        if not self.breaker.allow():
+            metrics.increment("api_rejected", api=self.name, reason="circuit_open")
+            raise CircuitOpenError(f"{self.name} circuit open, retry in {self.breaker.retry_after():.0f}s")
+        wait = self.bucket.reserve()
+        if wait > self.max_wait:
+            self.bucket.refund()
+            self.breaker.release()
+            metrics.increment("api_rejected", api=self.name, reason="rate_limited")
+            raise RateLimited(f"{self.name} rate limit: next request slot in {wait:.1f}s")
+        return wait
+
+    def admit(self):
+        """Block until a request token is free; raises CircuitOpenError or RateLimited"""
+        wait = self._reserve()
+        try:
+            if wait > 0:
+                time.sleep(wait)
+        except BaseException:
+            self.breaker.release()
+            raise
+        metrics.observe("rate_limit_wait", wait, api=self.name)
+
+    async def aadmit(self):
+        """Async admit; the wait does not block the event loop"""
+        wait = self._reserve()
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            # Cancelled while waiting: a half-open probe slot must not stay taken
+            self.breaker.release()
+            raise
+        metrics.observe("rate_limit_wait", wait, api=self.name)
+
+    def record_success(self):
+        self.bucket.on_success()
+        self.breaker.record_success()
+        self._publish()
+
+    def record_failure(self, error):
+        """Feed a failed call into AIMD and the breaker; returns whether retrying makes sense"""
+        kind = classify(error)
+        metrics.increment("api_errors", api=self.name, kind=kind)
+        if kind in ("throttled", "server"):
+            if self.bucket.on_throttle():
+                print(f"🐢 {self.name} rate lowered to {self.bucket.rate:.1f} req/s after {kind} error")
+            self.breaker.record_failure()
+        else:
+            # The provider answered; this request was the problem
+            self.breaker.release()
+        self._publish()
+        return kind in ("throttled", "server")
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number attempt + 1"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, func, *args, cancel=None, **kwargs):
+        """
+        Run func with rate limiting, retries and the breaker; re-raises the last error.
+        Setting `cancel` (a threading.Event) during a backoff stops retrying at once.
+        """
+        for attempt in range(self.max_retries):
+            self.admit()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not self.record_failure(e) or attempt == self.max_retries - 1:
+                    raise
+                with metrics.span("backoff", api=self.name):
+                    delay = self.backoff(attempt)
+                    cancelled = cancel.wait(delay) if cancel is not None else time.sleep(delay)
+                if cancelled:
+                    raise
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.record_success()
+            return result
+
+    async def acall(self, func, *args, **kwargs):
+        """Async call; func returns a fresh awaitable for every attempt"""
+        for attempt in range(self.max_retries):
+            await self.aadmit()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                if not self.record_failure(e) or attempt == self.max_retries - 1:
+                    raise
+                with metrics.span("backoff", api=self.name):
+                    await asyncio.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # Cancelled mid-call: the provider's answer is unknown, free the probe slot
+                self.breaker.release()
+                raise
+            self.record_success()
+            return result
+
+    def _publish(self):
+        metrics.set_gauge("rate_limit_rate", round(self.bucket.rate, 3), api=self.name)
+        metrics.set_gauge("rate_limit_tokens", round(max(self.bucket.tokens, 0.0), 3), api=self.name)
+
+    def stats(self):
+        return {
+            "rate": round(self.bucket.rate, 2),
+            "breaker": self.breaker.state,
+            "failures": self.breaker.failures,
+            "trips": self.breaker.trips,
+        }
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def _build(name, settings):
+    options = dict(DEFAULT_LIMITS.get(name, {}))
+    options.update({key: value for key, value in settings.items() if value is not None})
+    return ApiGuard(name, **options)
+
+
+def configure(name, **settings):
+    """Replace the guard for an API, starting from DEFAULT_LIMITS for anything not given"""
+    guard = _build(name, settings)
+    with _guards_lock:
+        _guards[name] = guard
+    return guard
+
+
+def get_guard(name):
+    """The process-wide guard for an API, created with the defaults on first use"""
+    with _guards_lock:
+        if name not in _guards:
+            _guards[name] = _build(name, {})
+        return _guards[name]
+
+
+def format_stats():
+    with _guards_lock:
+        guards = list(_guards.values())
+    lines = ["API guards:"]
+    for guard in guards:
+        stats = guard.stats()
+        lines.append(f"  {guard.name:8} rate={stats['rate']:.1f}/s breaker={stats['breaker']} trips={stats['trips']}")
+    return "\n".join(lines)
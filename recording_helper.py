@@ -3,14 +3,46 @@ import speech_recognition as sr
 import threading
 import time
 
+import metrics
+import rate_limiter
+from audio_capture import get_shared_capture
+from streaming_stt import StreamingRecognizer
+from vad import VoiceActivityDetector, VADEvent, settings_for_scenario
+
 class RecordingHelper:
     """
     Helper class for managing speech recognition without interfering with Pygame
     """
-    def __init__(self, language_code="hi-IN"):
+    def __init__(self, language_code="hi-IN", streaming=False, auto_endpoint=False, scenario=None,
+                 no_speech_timeout=10.0, max_recording_seconds=60.0, capture=None, interim_pause_ms=250):
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        # Audio comes from a long-lived capture stream, so there is no device
+        # open or ambient-noise calibration at the start of each turn
+        self.capture = capture
+        self.max_recording_seconds = max_recording_seconds
         self.language_code = language_code
+        # Streaming mode sends audio to StreamingRecognize while the user is talking;
+        # with auto endpointing only the frames between VAD speech start and end of turn are sent
+        self.streaming = streaming
+        self._stream_thread = None
+        self._stream_end = None
+        self._stream_text = None
+        self._stream_error = None
+        self.interim_text = None
+        # Called with (text, stability) for each interim transcript, e.g. SpeculativeTurn.on_interim.
+        # With auto endpointing, interims come from recognizing the audio so far at each short pause
+        # (stability None); streaming mode passes the server's interim results.
+        self.on_interim = None
+        self.interim_pause_ms = interim_pause_ms
+        self._interim_thread = None
+        # Auto-endpoint mode starts and ends the turn from voice activity instead of SPACE
+        self.auto_endpoint = auto_endpoint
+        self.scenario = scenario
+        self.no_speech_timeout = no_speech_timeout
+        self.end_of_turn_latency = None
+        self.stop_event = threading.Event()
+        # Capture position to start the next auto-endpointed turn from (set after a barge-in)
+        self.origin = None
         self.recording = False
         self.recording_thread = None
         self.audio_data = None
@@ -18,14 +50,26 @@ class RecordingHelper:
         self.result_text = None
         self.error = None
     
-    def start_recording(self):
-        """Start recording in a separate thread"""
+    def start_recording(self, origin=None):
+        """
+        Start recording in a separate thread. With auto endpointing, origin is a
+        capture position in the past to listen from, e.g. where a barge-in began.
+        """
         if not self.recording:
+            self.origin = origin
             self.recording = True
             self.is_complete = False
             self.result_text = None
+            self.interim_text = None
             self.error = None
-            self.recording_thread = threading.Thread(target=self._record_audio)
+            self.stop_event.clear()
+            if self.auto_endpoint:
+                target = self._listen_for_turn
+            elif self.streaming:
+                target = self._stream_audio
+            else:
+                target = self._record_audio
+            self.recording_thread = threading.Thread(target=target)
             self.recording_thread.daemon = True
             self.recording_thread.start()
             return True
@@ -34,10 +78,27 @@ class RecordingHelper:
     def stop_recording(self):
         """Stop the recording"""
         self.recording = False
+        self.stop_event.set()
         if self.recording_thread and self.recording_thread.is_alive():
             self.recording_thread.join(timeout=1.0)
         return True
     
+    def listen(self, timeout=60.0, origin=None):
+        """Record one turn with automatic endpointing and block until it is recognized"""
+        if not self.start_recording(origin=origin):
+            return None, "Recording already in progress."
+        if self.recording_thread:
+            self.recording_thread.join(timeout=timeout)
+        if not self.is_complete:
+            self.stop_recording()
+        return self.result_text, self.error
+    
+    def get_capture(self):
+        """Return the capture stream, opening the shared microphone on first use"""
+        if self.capture is None:
+            self.capture = get_shared_capture()
+        return self.capture
+    
     def get_result(self):
         """Get the recognition result"""
         if self.is_complete:
@@ -45,27 +106,19 @@ class RecordingHelper:
         return None, None
     
     def _record_audio(self):
-        """Record audio in a separate thread"""
+        """Record audio in a separate thread until stop_recording is called"""
         try:
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                print("🎤 Background recording started...")
-                self.audio_data = self.recognizer.listen(source, timeout=10.0, phrase_time_limit=None)
+            capture = self.get_capture()
+            start = capture.cursor
+            print("🎤 Background recording started...")
+            with metrics.span("capture", mode="manual"):
+                self.stop_event.wait(timeout=self.max_recording_seconds)
+            end = capture.cursor
                 
             # Process the audio
-            if self.audio_data:
-                try:
-                    self.result_text = self.recognizer.recognize_google(self.audio_data, language=self.language_code)
-                    print(f"✅ Recognized Speech: {self.result_text}")
-                except sr.UnknownValueError:
-                    self.error = "Could not understand the audio."
-                    print("❌ Could not understand the audio.")
-                except sr.RequestError:
-                    self.error = "Speech recognition service unavailable."
-                    print("❌ Speech recognition service unavailable.")
-                except Exception as e:
-                    self.error = f"Error during speech recognition: {str(e)}"
-                    print(f"❌ Error during speech recognition: {e}")
+            if end > start:
+                self.audio_data = sr.AudioData(capture.slice_bytes(start, end), capture.sample_rate, capture.sample_width)
+                self._recognize(self.audio_data)
             else:
                 self.error = "No audio was recorded."
                 print("❌ No audio was recorded.")
@@ -76,4 +129,209 @@ class RecordingHelper:
         
         finally:
             self.is_complete = True
-            self.recording = False
\ No newline at end of file
+            self.recording = False
+    
+    def _recognize(self, audio_data):
+        """Run recognition on captured audio and store the result"""
+        try:
+            with metrics.span("stt"):
+                self.result_text = rate_limiter.get_guard("stt").call(
+                    self.recognizer.recognize_google, audio_data, language=self.language_code
+                )
+            print(f"✅ Recognized Speech: {self.result_text}")
+        except sr.UnknownValueError:
+            self.error = "Could not understand the audio."
+            print("❌ Could not understand the audio.")
+        except sr.RequestError:
+            self.error = "Speech recognition service unavailable."
+            print("❌ Speech recognition service unavailable.")
+        except Exception as e:
+            self.error = f"Error during speech recognition: {str(e)}"
+            print(f"❌ Error during speech recognition: {e}")
+    
+    def _listen_for_turn(self):
+        """Capture one utterance, using voice activity to detect its start and end"""
+        try:
+            capture = self.get_capture()
+            rate = capture.sample_rate
+            detector = VoiceActivityDetector(
+                sample_rate=rate, noise_floor=capture.noise_floor, **settings_for_scenario(self.scenario)
+            )
+            origin = capture.cursor if self.origin is None else self.origin
+            position = origin
+            pause_frames = max(1, int(self.interim_pause_ms / 1000.0 / detector.frame_seconds))
+            paused = False
+            speech_start = None
+            speech_end = None
+            deadline = time.time() + self.no_speech_timeout
+            hard_deadline = deadline + self.max_recording_seconds
+            print("🎤 Listening (automatic endpointing)...")
+            
+            with metrics.span("capture", mode="vad"):
+                for frames in capture.frames(start=origin, stop_event=self.stop_event):
+                    position += len(frames)
+                    for event in detector.process(frames):
+                        if event.kind == VADEvent.SPEECH_START and speech_start is None:
+                            speech_start = origin + int(event.stream_time * rate)
+                            if self.streaming:
+                                self._start_stream(capture, max(origin, speech_start - int(0.3 * rate)))
+                        elif event.kind == VADEvent.END_OF_TURN:
+                            speech_end = origin + int(event.stream_time * rate)
+                    if speech_end is not None:
+                        break
+                    # A short pause that may or may not end the turn: transcribe what we have so far
+                    if detector.silence_run == 0:
+                        paused = False
+                    elif (self.on_interim is not None and not self.streaming and detector.in_speech and not paused
+                            and detector.silence_run >= pause_frames):
+                        paused = True
+                        self._start_interim(capture, max(origin, speech_start - int(0.3 * rate)), position)
+                    if speech_start is None and time.time() > deadline:
+                        break
+                    if time.time() > hard_deadline:
+                        break
+            
+            self.end_of_turn_latency = detector.end_of_turn_latency
+            if self.end_of_turn_latency is not None:
+                metrics.observe("endpointing", self.end_of_turn_latency)
+                print(f"⏱️ End of turn detected {self.end_of_turn_latency * 1000:.0f} ms after last speech")
+            
+            if speech_start is not None:
+                # Keep ~300 ms before the detected start so the first syllable is not clipped,
+                # and a short tail after the last speech frame
+                start = max(origin, speech_start - int(0.3 * rate))
+                end = capture.cursor if speech_end is None else min(capture.cursor, speech_end + int(0.2 * rate))
+                if self._finish_stream(end):
+                    return
+                # No streaming, or the stream failed: recognize the captured utterance in one request
+                self.audio_data = sr.AudioData(capture.slice_bytes(start, end), rate, capture.sample_width)
+                self._recognize(self.audio_data)
+            else:
+                self.error = "No speech detected."
+                print("❌ No speech detected.")
+        
+        except Exception as e:
+            self.error = f"Error recording audio: {str(e)}"
+            print(f"❌ Error recording audio: {e}")
+        
+        finally:
+            if self._stream_thread is not None:
+                # Turn ended without using the stream; let it wind down on its own
+                self._stream_end = 0
+                self._stream_thread = None
+            self.is_complete = True
+            self.recording = False
+    
+    def _start_stream(self, capture, start):
+        """Stream the turn's audio from `start` to the recognizer while VAD keeps listening"""
+        self._stream_end = None
+        self._stream_text = None
+        self._stream_error = None
+        recognizer = StreamingRecognizer(
+            language_code=self.language_code,
+            sample_rate=capture.sample_rate,
+            single_utterance=False,
+            on_transcript=self._on_transcript
+        )
+        self._stream_thread = threading.Thread(target=self._run_stream, args=(recognizer, capture, start))
+        self._stream_thread.daemon = True
+        self._stream_thread.start()
+    
+    def _run_stream(self, recognizer, capture, start):
+        try:
+            self._stream_text = recognizer.recognize_final(self._gated_frames(capture, start))
+        except Exception as e:
+            self._stream_error = e
+    
+    def _gated_frames(self, capture, position):
+        # Ends once VAD has set the end of turn and the audio up to it has been sent
+        for chunk in capture.frames(start=position, stop_event=self.stop_event):
+            end = self._stream_end
+            if end is not None and position + len(chunk) > end:
+                chunk = chunk[:max(0, end - position)]
+            if len(chunk):
+                yield chunk.tobytes()
+            position += len(chunk)
+            if end is not None and position >= end:
+                return
+    
+    def _finish_stream(self, end, timeout=10.0):
+        """
+        Close the streamed turn at capture position `end` and wait for the final
+        transcript. Returns True if the stream produced the turn's result.
+        """
+        thread = self._stream_thread
+        if thread is None:
+            return False
+        self._stream_thread = None
+        self._stream_end = end
+        with metrics.span("stt", mode="streaming"):
+            thread.join(timeout)
+        if thread.is_alive() or self._stream_error is not None or not self._stream_text:
+            if self._stream_error is not None:
+                print(f"⚠️ Streaming recognition failed, recognizing the recording instead: {self._stream_error}")
+            return False
+        self.result_text = self._stream_text
+        print(f"✅ Recognized Speech: {self.result_text}")
+        return True
+    
+    def _start_interim(self, capture, start, end):
+        # One interim recognition at a time; a pause during one in flight is skipped
+        if self._interim_thread is not None and self._interim_thread.is_alive():
+            return
+        audio_data = sr.AudioData(capture.slice_bytes(start, end), capture.sample_rate, capture.sample_width)
+        self._interim_thread = threading.Thread(target=self._recognize_interim, args=(audio_data,))
+        self._interim_thread.daemon = True
+        self._interim_thread.start()
+    
+    def _recognize_interim(self, audio_data):
+        try:
+            with metrics.span("stt", mode="interim"):
+                text = rate_limiter.get_guard("stt").call(
+                    self.recognizer.recognize_google, audio_data, language=self.language_code
+                )
+        except Exception:
+            return  # Mid-sentence audio often has nothing recognizable yet
+        on_interim = self.on_interim
+        if text and on_interim is not None and not self.is_complete:
+            self.interim_text = text
+            on_interim(text, None)
+    
+    def _stream_audio(self):
+        """Stream microphone audio to the recognizer in a separate thread"""
+        try:
+            capture = self.get_capture()
+            recognizer = StreamingRecognizer(
+                language_code=self.language_code,
+                sample_rate=capture.sample_rate,
+                on_transcript=self._on_transcript
+            )
+            print("🎤 Streaming recognition started...")
+            frames = (chunk.tobytes() for chunk in capture.frames(stop_event=self.stop_event))
+            # Capture and recognition overlap, so this span covers both
+            with metrics.span("capture", mode="streaming"):
+                self.result_text = recognizer.recognize_final(frames)
+            
+            if self.result_text:
+                print(f"✅ Recognized Speech: {self.result_text}")
+                if recognizer.finalization_latency is not None:
+                    metrics.observe("stt", recognizer.finalization_latency, mode="streaming")
+                    print(f"⏱️ Final transcript {recognizer.finalization_latency * 1000:.0f} ms after end of speech")
+            else:
+                self.result_text = None
+                self.error = "Could not understand the audio."
+                print("❌ Could not understand the audio.")
+        
+        except Exception as e:
+            self.error = f"Error during streaming recognition: {str(e)}"
+            print(f"❌ Error during streaming recognition: {e}")
+        
+        finally:
+            self.is_complete = True
+            self.recording = False
+    
+    def _on_transcript(self, update):
+        if not update.is_final:
+            self.interim_text = update.text
+            if self.on_interim is not None:
+                self.on_interim(update.text, update.stability)
@@ -0,0 +1,85 @@
+# response_cache.py
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from hinglish_text import normalize_utterance
+
+
+class ResponseCache:
+    """
+    In-memory cache of model replies for repeated caller utterances.
+
+    Replies are keyed on the scenario, the conversation so far and the
+    normalized utterance (case, punctuation, script and filler words folded
+    away), so "Kaun bol raha hai?" and "कौन बोल रहा है" after the same opening
+    share one entry. Entries expire after `ttl_seconds` and the least recently
+    used are evicted beyond `max_entries`.
+    """
+    def __init__(self, max_entries=5000, ttl_seconds=6 * 60 * 60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(scenario, utterance, context=()):
+        """
+        Build the cache key. `context` is the list of messages sent before the
+        utterance; earlier caller turns are normalized the same way.
+        """
+        parts = [scenario]
+        for message in context:
+            content = message["content"]
+            if message["role"] == "user":
+                content = normalize_utterance(content)
+            parts.append(f"{message['role']}:{content}")
+        parts.append(normalize_utterance(utterance))
+        return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached reply, or None on a miss or an expired entry"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            reply, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self.entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return reply
+
+    def put(self, key, reply):
+        with self.lock:
+            self.entries[key] = (reply, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+            }
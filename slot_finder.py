@@ -0,0 +1,257 @@
+# slot_finder.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+import metrics
+import rate_limiter
+
+
+def _parse_time(value, tz):
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = tz.localize(parsed)
+    return parsed
+
+
+def _merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _covered(start, end, intervals):
+    """True if [start, end) lies inside one of the merged intervals"""
+    return any(busy_start <= start and end <= busy_end for busy_start, busy_end in intervals)
+
+
+class SlotFinder:
+    """
+    Finds free demo slots from Google Calendar free/busy data.
+
+    Busy intervals for the sales calendars are cached locally. Within the TTL
+    only the part of the look-ahead window not yet covered is fetched (e.g. a
+    new day rolling into range); after the TTL the whole window is re-read.
+    Proposing slots only reads the cache and never costs a Calendar round
+    trip during a call: a cold or stale cache is refreshed on a background
+    thread, and until the first snapshot lands no slots are proposed.
+
+    Slots booked during a call are held locally (`mark_busy`) and merged into
+    every snapshot until Calendar shows the booking, it is released, or the
+    hold expires.
+    """
+    def __init__(self, calendar_service, calendar_ids=("primary",), timezone="Asia/Kolkata",
+                 slot_minutes=60, work_start_hour=10, work_end_hour=18, working_days=(0, 1, 2, 3, 4),
+                 horizon_days=7, ttl_seconds=300, min_notice_minutes=60, hold_seconds=900):
+        self.calendar_service = calendar_service
+        self.calendar_ids = list(calendar_ids)
+        self.tz = pytz.timezone(timezone)
+        self.timezone = timezone
+        self.slot = timedelta(minutes=slot_minutes)
+        self.work_start_hour = work_start_hour
+        self.work_end_hour = work_end_hour
+        self.working_days = set(working_days)
+        self.horizon = timedelta(days=horizon_days)
+        self.ttl_seconds = ttl_seconds
+        self.min_notice = timedelta(minutes=min_notice_minutes)
+        self.busy = []
+        # Local bookings not yet seen in Calendar data, as (start, end, expires_at)
+        self.holds = []
+        self.hold_seconds = hold_seconds
+        self.covered_from = None
+        self.covered_until = None
+        self.fetched_at = None
+        self.queries = 0
+        self.lock = threading.Lock()
+        self._refresh_thread = None
+        self._pending_refresh = None
+        self._stop = threading.Event()
+
+    def now(self):
+        return datetime.now(self.tz)
+
+    def refresh(self, force=False):
+        """Bring the busy cache up to date, fetching as little as possible"""
+        now = self.now()
+        # Whole days, so the window only grows (and triggers a fetch) when a new day comes into range
+        window_end = self.tz.normalize((now + self.horizon + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0))
+        with self.lock:
+            expired = (force or self.fetched_at is None
+                       or time.monotonic() - self.fetched_at > self.ttl_seconds)
+            if expired:
+                fetch_from = now
+            elif self.covered_until < window_end:
+                fetch_from = self.covered_until
+            else:
+                return False
+
+        busy = self._query_free_busy(fetch_from, window_end)
+
+        with self.lock:
+            if expired:
+                self.busy = _merge(busy)
+                self.covered_from = now
+                self.fetched_at = time.monotonic()
+            else:
+                # Incremental: keep the cached part, drop intervals already in the past
+                kept = [(start, end) for start, end in self.busy if end > now]
+                self.busy = _merge(kept + busy)
+            self.covered_until = window_end
+            # A hold is no longer needed once Calendar shows the booking
+            self.holds = [hold for hold in self.holds if not _covered(hold[0], hold[1], self.busy)]
+        return True
+
+    def next_free_slots(self, n=3, after=None):
+        """Return up to n (start, end) free slots, using only the local cache (empty until the first fetch)"""
+        if self._stale():
+            self.refresh_in_background()
+        if self.fetched_at is None:
+            return []
+
+        start = max(after or self.now(), self.now() + self.min_notice)
+        candidate = self._align(start)
+        with self.lock:
+            busy = _merge(self.busy + self._active_holds())
+            limit = self.covered_until or (self.now() + self.horizon)
+
+        slots = []
+        index = 0
+        while len(slots) < n and candidate + self.slot <= limit:
+            if not self._within_working_hours(candidate):
+                candidate = self._next_working_start(candidate)
+                continue
+            end = candidate + self.slot
+            while index < len(busy) and busy[index][1] <= candidate:
+                index += 1
+            if index < len(busy) and busy[index][0] < end:
+                # Skip past the conflicting interval
+                candidate = self._align(busy[index][1])
+                continue
+            slots.append((candidate, end))
+            candidate = end
+        return slots
+
+    def mark_busy(self, start, end):
+        """Hold a booked slot locally so it is not proposed again until Calendar shows it"""
+        start, end = self._localize(start), self._localize(end)
+        with self.lock:
+            self.holds.append((start, end, time.monotonic() + self.hold_seconds))
+
+    def release(self, start, end):
+        """Drop the local hold on a slot whose booking failed"""
+        start, end = self._localize(start), self._localize(end)
+        with self.lock:
+            self.holds = [hold for hold in self.holds if hold[:2] != (start, end)]
+
+    def _localize(self, moment):
+        return self.tz.localize(moment) if moment.tzinfo is None else moment
+
+    def _active_holds(self):
+        # Caller holds the lock; expired holds are dropped
+        now = time.monotonic()
+        self.holds = [hold for hold in self.holds if hold[2] > now]
+        return [(start, end) for start, end, _ in self.holds]
+
+    def refresh_in_background(self):
+        """Start a one-off refresh unless one is already running; returns its thread"""
+        with self.lock:
+            if self._pending_refresh is not None and self._pending_refresh.is_alive():
+                return self._pending_refresh
+            self._pending_refresh = threading.Thread(target=self._safe_refresh, name="slot-refresh-once")
+            self._pending_refresh.daemon = True
+            self._pending_refresh.start()
+            return self._pending_refresh
+
+    def start_background_refresh(self, interval_seconds=60):
+        """Keep the cache warm from a daemon thread"""
+        if self._refresh_thread is not None:
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                self._safe_refresh()
+                self._stop.wait(interval_seconds)
+
+        self._refresh_thread = threading.Thread(target=loop, name="slot-refresh")
+        self._refresh_thread.daemon = True
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _stale(self):
+        with self.lock:
+            return (self.fetched_at is None
+                    or time.monotonic() - self.fetched_at > self.ttl_seconds)
+
+    def _safe_refresh(self):
+        # Availability is best effort: a failed fetch keeps the last snapshot
+        try:
+            return self.refresh()
+        except Exception as e:
+            print(f"Error refreshing calendar availability: {e}")
+            return False
+
+    def _query_free_busy(self, time_min, time_max):
+        body = {
+            "timeMin": time_min.isoformat(),
+            "timeMax": time_max.isoformat(),
+            "timeZone": self.timezone,
+            "items": [{"id": calendar_id} for calendar_id in self.calendar_ids],
+        }
+        self.queries += 1
+        with metrics.span("calendar", operation="freebusy"):
+            request = self.calendar_service.freebusy().query(body=body)
+            response = rate_limiter.get_guard("calendar").call(request.execute)
+        busy = []
+        for calendar in response.get("calendars", {}).values():
+            for interval in calendar.get("busy", []):
+                busy.append((_parse_time(interval["start"], self.tz), _parse_time(interval["end"], self.tz)))
+        return busy
+
+    def _align(self, moment):
+        # Round up to the next half hour so proposals sound natural on a call
+        moment = moment.astimezone(self.tz).replace(second=0, microsecond=0)
+        if moment.minute not in (0, 30):
+            moment += timedelta(minutes=30 - moment.minute % 30)
+        return moment
+
+    def _within_working_hours(self, moment):
+        if moment.weekday() not in self.working_days:
+            return False
+        day_start = moment.replace(hour=self.work_start_hour, minute=0)
+        day_end = moment.replace(hour=self.work_end_hour, minute=0)
+        return day_start <= moment and moment + self.slot <= day_end
+
+    def _next_working_start(self, moment):
+        day_start = moment.replace(hour=self.work_start_hour, minute=0)
+        if moment < day_start and moment.weekday() in self.working_days:
+            return day_start
+        next_day = (moment + timedelta(days=1)).replace(hour=self.work_start_hour, minute=0)
+        return self.tz.normalize(next_day)
+
+
+def format_slots(slots, now=None):
+    """Describe slots in short Hinglish, e.g. 'kal 11:00 baje'"""
+    if not slots:
+        return ""
+    now = now or datetime.now(slots[0][0].tzinfo)
+    parts = []
+    for start, _ in slots:
+        days = (start.date() - now.date()).days
+        if days == 0:
+            day = "aaj"
+        elif days == 1:
+            day = "kal"
+        else:
+            day = start.strftime("%A %d %b")
+        parts.append(f"{day} {start.strftime('%H:%M')} baje")
+    return ", ".join(parts)
@@ -0,0 +1,220 @@
+# speculation.py
+"""
+Speculative reply generation from interim transcripts.
+
+While the callee is still finishing a sentence, a stable interim transcript
+starts get_ai_response on a background thread. Its tokens are buffered, and
+nothing is spoken, remembered, booked or logged yet. When the final
+transcript arrives it is compared with the speculated text after
+normalize_utterance:
+
+- match: the speculation is committed. Once its run has finished cleanly
+  the buffered tokens are replayed into the speaker, the reply is written
+  to memory and the response cache, and the turn's side effects run as
+  usual. A run that failed is discarded unspoken and the turn is answered
+  from the final transcript instead.
+- mismatch: the speculation is cancelled (its stream is closed) and the
+  turn is answered from the final transcript as before.
+
+A newer stable interim that reads differently replaces the running
+speculation, up to `max_speculations` per turn.
+"""
+import time
+import threading
+import contextvars
+
+import utils
+import metrics
+from hinglish_text import normalize_utterance
+
+
+class SpeculationStats:
+    """Process-wide hit rate and latency saved"""
+    def __init__(self):
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.replaced = 0
+        self.saved_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, outcome, saved=None):
+        with self.lock:
+            if outcome == "started":
+                self.started += 1
+            elif outcome == "hit":
+                self.hits += 1
+                self.saved_seconds += saved or 0.0
+            elif outcome == "miss":
+                self.misses += 1
+            elif outcome == "replaced":
+                self.replaced += 1
+        metrics.increment("speculation", outcome=outcome)
+        if saved is not None:
+            metrics.observe("speculation_saved", saved)
+
+    @property
+    def hit_rate(self):
+        resolved = self.hits + self.misses
+        return self.hits / resolved if resolved else None
+
+    def format_stats(self):
+        with self.lock:
+            saved_ms = self.saved_seconds / self.hits * 1000 if self.hits else 0.0
+            line = (f"Speculative replies: {self.started} started, {self.hits} committed, {self.misses} diverged, "
+                    f"{self.replaced} replaced")
+        if self.hit_rate is not None:
+            line += f"; hit rate {self.hit_rate:.0%}, {saved_ms:.0f} ms saved per committed turn"
+        return line
+
+
+stats = SpeculationStats()
+
+
+class Speculation:
+    """One background get_ai_response run for an interim transcript"""
+    def __init__(self, text, scenario, memory, context):
+        self.text = text
+        self.key = normalize_utterance(text)
+        self.scenario = scenario
+        self.memory = memory
+        self.reply = None
+        # Cache write held back until the speculation is committed
+        self.deferred_cache = []
+        # Nothing is spoken until the run has finished cleanly
+        self.tokens = []
+        self.failed = False
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.thread = threading.Thread(target=context.run, args=(self._run,), name="speculation")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _run(self):
+        try:
+            self.reply = utils.get_ai_response(self.text, scenario=self.scenario, on_token=self._on_token,
+                                               memory=self.memory, cancel=self.cancel_event, remember=False,
+                                               deferred_cache=self.deferred_cache)
+        except Exception as e:
+            print(f"Speculative reply failed: {e}")
+            with self.lock:
+                self.failed = True
+                self.reply = None
+                self.tokens = []
+        finally:
+            self.finished_at = time.perf_counter()
+            self.done.set()
+
+    def _on_token(self, token):
+        with self.lock:
+            self.tokens.append(token)
+
+    def commit(self, on_token=None, cancel=None):
+        """
+        Wait for the run to finish, then replay its tokens into on_token and
+        return the reply. Returns None (nothing replayed) if it failed or was cancelled.
+        """
+        while not self.done.wait(0.05):
+            if cancel is not None and cancel.is_set():
+                self.cancel()
+        with self.lock:
+            if self.failed or self.reply is None:
+                return None
+            tokens = list(self.tokens)
+        if on_token is not None:
+            for token in tokens:
+                on_token(token)
+        return self.reply
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class SpeculativeTurn:
+    """
+    Speculation for one turn. The recognizer calls `on_interim` with each
+    interim transcript, and the turn is then answered with `respond` once
+    the final transcript is in.
+
+    An interim is stable enough to act on when its stability is at least
+    `min_stability`, or when stability is None (transcribed at a pause in
+    speech), or when the same text came twice in a row.
+    """
+    def __init__(self, scenario, memory=None, min_stability=0.8, min_words=2, max_speculations=3):
+        self.scenario = scenario
+        self.memory = memory
+        self.min_stability = min_stability
+        self.min_words = min_words
+        self.max_speculations = max_speculations
+        # Spans in speculation threads belong to the turn that started them
+        self.context = contextvars.copy_context()
+        self.current = None
+        self.last_key = None
+        self.count = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def on_interim(self, text, stability=None):
+        key = normalize_utterance(text)
+        with self.lock:
+            repeated = key == self.last_key
+            self.last_key = key
+            if self.closed or len(key.split()) < self.min_words:
+                return
+            if stability is not None and stability < self.min_stability and not repeated:
+                return
+            if self.current is not None and self.current.key == key:
+                return
+            if self.count >= self.max_speculations:
+                return
+            previous = self.current
+            self.current = Speculation(text, self.scenario, self.memory, self.context.copy())
+            self.count += 1
+        stats.record("started")
+        if previous is not None:
+            previous.cancel()
+            stats.record("replaced")
+
+    def respond(self, user_email, text, on_token=None, cancel=None):
+        """
+        Answer the turn for the final transcript, committing the speculation if
+        it matches. Returns None if `cancel` is set before the reply is complete.
+        """
+        speculation = self._take()
+        if speculation is not None:
+            if speculation.key == normalize_utterance(text):
+                head_start = time.perf_counter() - speculation.started_at
+                reply = speculation.commit(on_token, cancel=cancel)
+                if cancel is not None and cancel.is_set():
+                    return None
+                if reply is not None:
+                    # The model work that overlapped the end of the callee's speech
+                    saved = min(head_start, speculation.finished_at - speculation.started_at)
+                    stats.record("hit", saved=saved)
+                    print(f"⚡ Speculative reply committed, {saved * 1000:.0f} ms head start")
+                    if self.memory is not None:
+                        self.memory.add_turn(text, reply)
+                    for cache_key, cached_reply in speculation.deferred_cache:
+                        utils.store_cached_reply(cache_key, cached_reply)
+                    return utils.complete_turn(self.scenario, user_email, text, reply)
+                stats.record("miss")
+            else:
+                speculation.cancel()
+                stats.record("miss")
+        return utils.handle_turn(self.scenario, user_email, text, on_token=on_token, memory=self.memory,
+                                 cancel=cancel)
+
+    def cancel(self):
+        """Drop any running speculation (turn abandoned or no final transcript)"""
+        speculation = self._take()
+        if speculation is not None:
+            speculation.cancel()
+
+    def _take(self):
+        with self.lock:
+            self.closed = True
+            speculation, self.current = self.current, None
+        return speculation
@@ -0,0 +1,170 @@
+# startup.py
+"""
+Startup helpers: lazy module proxies and a parallel service warm-up.
+
+Heavy SDKs (Google Cloud, googleapiclient, langchain, pygame, numpy/pyaudio)
+are imported on first use or by the warm-up threads, so the scenario menu can
+be shown straight away while clients are built in the background.
+"""
+import time
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+# Taken when this module is first imported, i.e. close to process start
+PROCESS_START = time.perf_counter()
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access.
+    `speech = LazyModule("google.cloud.speech")` then `speech.RecognitionConfig(...)`.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    report.record_import(self._name, time.perf_counter() - started)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def timed_import(name):
+    """Import a module now, recording how long it took"""
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    report.record_import(name, time.perf_counter() - started)
+    return module
+
+
+class StartupReport:
+    """Import and initialization timings collected during startup"""
+    def __init__(self):
+        self.imports = {}
+        self.steps = {}
+        self.errors = {}
+        self.milestones = {}
+        self.lock = threading.Lock()
+
+    def record_import(self, name, seconds):
+        with self.lock:
+            # Only the first (real) import of a module costs anything
+            self.imports.setdefault(name, seconds)
+
+    def record_step(self, name, seconds, error=None):
+        with self.lock:
+            self.steps[name] = seconds
+            if error is not None:
+                self.errors[name] = str(error)
+        metrics.observe("startup", seconds, step=name, outcome="error" if error else "ok")
+
+    def mark(self, milestone):
+        """Record seconds since process start for a named point (e.g. "menu", "first_greeting")"""
+        with self.lock:
+            self.milestones.setdefault(milestone, time.perf_counter() - PROCESS_START)
+
+    def format(self):
+        lines = ["Startup report:"]
+        with self.lock:
+            for milestone, seconds in self.milestones.items():
+                lines.append(f"  {milestone:28} at {seconds * 1000:8.0f} ms")
+            for name, seconds in sorted(self.steps.items(), key=lambda item: -item[1]):
+                status = f"  FAILED: {self.errors[name]}" if name in self.errors else ""
+                lines.append(f"  init  {name:22} {seconds * 1000:8.0f} ms{status}")
+            for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1]):
+                lines.append(f"  import {name:21} {seconds * 1000:8.0f} ms")
+        return "\n".join(lines)
+
+
+report = StartupReport()
+
+
+class WarmUp:
+    """
+    Runs independent initialization steps in parallel threads.
+
+    Each step is a (name, callable) pair; a step may list other step names it
+    depends on and then starts once they have finished. `wait` blocks until
+    the required steps have run and returns False if one of them failed;
+    optional steps (e.g. TTS pre-rendering) keep running in the background.
+    """
+    def __init__(self, max_workers=6):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup")
+        self.futures = {}
+        self.required = set()
+        self.lock = threading.Lock()
+
+    def add(self, name, func, after=(), required=True):
+        dependencies = [self.futures[dependency] for dependency in after]
+
+        def run():
+            for dependency in dependencies:
+                # Wait on the dependency; its own failure is reported by its own step
+                try:
+                    dependency.result()
+                except Exception:
+                    raise RuntimeError(f"{name} skipped: a step it depends on failed")
+            started = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                report.record_step(name, time.perf_counter() - started, error=e)
+                if not required:
+                    print(f"Warm-up step {name} failed: {e}")
+                raise
+            report.record_step(name, time.perf_counter() - started)
+            return result
+
+        with self.lock:
+            self.futures[name] = self.executor.submit(run)
+            if required:
+                self.required.add(name)
+        return self.futures[name]
+
+    def done(self):
+        return all(future.done() for future in self.futures.values())
+
+    def wait_optional(self, name, timeout=None):
+        """Block until an optional step has run; True if it succeeded"""
+        try:
+            self.futures[name].result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def wait(self, timeout=None):
+        """Block until the required steps are done; True if all of them succeeded"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ok = True
+        for name, future in list(self.futures.items()):
+            if name not in self.required:
+                continue
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(timeout=remaining)
+            except Exception as e:
+                print(f"Error initializing {name}: {e}")
+                ok = False
+        report.mark("services_ready")
+        self.executor.shutdown(wait=False)
+        return ok
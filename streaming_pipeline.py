@@ -0,0 +1,236 @@
+# streaming_pipeline.py
+import re
+import time
+import queue
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import utils
+import metrics
+
+# Sentence ends: Latin punctuation plus the Devanagari danda / double danda
+SENTENCE_END = re.compile(r'[.!?।॥]+["\')\]]*\s')
+# Softer clause breaks, only used once enough text has built up
+CLAUSE_END = re.compile(r'[,;:]\s')
+# Stored in place of an interrupted reply, so the model knows the rest was never heard
+INTERRUPTED_NOTE = " [caller ne yahan beech mein tok diya, baaki reply suna nahi gaya]"
+# Abbreviations whose trailing period does not end a sentence
+ABBREVIATIONS = {"rs", "mr", "mrs", "ms", "dr", "sr", "jr", "st", "no", "etc", "vs"}
+
+
+class SentenceChunker:
+    """
+    Cuts a stream of LLM tokens into speakable Hinglish sentences/clauses
+    """
+    def __init__(self, min_clause_chars=40, max_chunk_chars=200, first_clause_chars=20):
+        self.min_clause_chars = min_clause_chars
+        self.max_chunk_chars = max_chunk_chars
+        # The first chunk is cut earlier so audio can start as soon as possible
+        self.first_clause_chars = first_clause_chars
+        self.buffer = ""
+        self.emitted = 0
+
+    def feed(self, token):
+        """Add a token and return the list of chunks that are now complete"""
+        self.buffer += token
+        chunks = []
+        while True:
+            chunk = self._next_chunk()
+            if chunk is None:
+                break
+            chunks.append(chunk)
+        return chunks
+
+    def flush(self):
+        """Return whatever is left once the stream has ended"""
+        remainder = self.buffer.strip()
+        self.buffer = ""
+        if remainder:
+            self.emitted += 1
+            return [remainder]
+        return []
+
+    def _next_chunk(self):
+        cut = None
+        for match in SENTENCE_END.finditer(self.buffer):
+            words = self.buffer[:match.start()].split()
+            if match.group().startswith(".") and words and words[-1].lower() in ABBREVIATIONS:
+                continue
+            cut = match.end()
+            break
+        if cut is None:
+            min_chars = self.first_clause_chars if self.emitted == 0 else self.min_clause_chars
+            for match in CLAUSE_END.finditer(self.buffer):
+                if match.end() >= min_chars:
+                    cut = match.end()
+                    break
+
+        if cut is None and len(self.buffer) > self.max_chunk_chars:
+            # No punctuation in sight, break on the last space instead
+            space = self.buffer.rfind(" ", 0, self.max_chunk_chars)
+            cut = space + 1 if space > 0 else self.max_chunk_chars
+
+        if cut is None:
+            return None
+
+        chunk = self.buffer[:cut].strip()
+        self.buffer = self.buffer[cut:]
+        if not chunk:
+            return None
+        self.emitted += 1
+        return chunk
+
+
+class StreamingSpeaker:
+    """
+    Synthesizes reply chunks as soon as they are complete and plays them in order
+    while later chunks are still being generated.
+
+    Pass `feed` as the `on_token` callback of utils.get_ai_response (or the
+    handle_* functions) and call `finish` once the reply is complete.
+
+    With barge_in the microphone is watched while chunks play; if the callee
+    starts talking, playback stops, `interrupted` is set, `heard_text` holds
+    what was actually played and `resume_from` is the capture position to
+    recognize the callee's turn from.
+    """
+    def __init__(self, language_code="hi-IN", synthesis_workers=2, barge_in=False, barge_in_mode="stop"):
+        self.language_code = language_code
+        self.chunker = SentenceChunker()
+        self.executor = ThreadPoolExecutor(max_workers=synthesis_workers)
+        self.playback_queue = queue.Queue()
+        self.started_at = time.perf_counter()
+        self.first_audio_at = None
+        self.chunks = []
+        self.cancelled = False
+        self.playing = False
+        # (chunk, seconds heard, chunk duration) for every chunk that started playing
+        self.played = []
+        self.barge_in = barge_in
+        self.barge_in_mode = barge_in_mode
+        self.monitor = None
+        self.interrupted = False
+        self.resume_from = None
+        # Threads run in a copy of the caller's context so their spans belong to the current turn
+        self.playback_thread = threading.Thread(target=contextvars.copy_context().run, args=(self._playback_loop,))
+        self.playback_thread.daemon = True
+        self.playback_thread.start()
+
+    @property
+    def time_to_first_audio(self):
+        """Seconds from creation until the first chunk started playing"""
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.started_at
+
+    def feed(self, token):
+        """Consume a streamed token, queueing any chunk it completes"""
+        if self.cancelled:
+            return
+        for chunk in self.chunker.feed(token):
+            self._submit(chunk)
+
+    def speak(self, text):
+        """Queue a complete, non-streamed text for playback"""
+        self.feed(text)
+        for chunk in self.chunker.flush():
+            self._submit(chunk)
+
+    def finish(self):
+        """Flush the remaining text and block until playback has finished"""
+        for chunk in self.chunker.flush():
+            self._submit(chunk)
+        self.playback_queue.put(None)
+        self.playback_thread.join()
+        self.executor.shutdown(wait=True)
+        if self.monitor is not None:
+            self.monitor.stop()
+        if self.interrupted:
+            metrics.observe("reply_heard", sum(heard for _, heard, _ in self.played), outcome="interrupted")
+        return self.time_to_first_audio
+
+    @property
+    def heard_text(self):
+        """The part of the reply that was played, cut at the word reached when playback stopped"""
+        parts = []
+        for chunk, heard, duration in self.played:
+            if duration and heard < duration:
+                words = chunk.split()
+                parts.extend(words[:int(len(words) * heard / duration)])
+                break
+            parts.append(chunk)
+        return " ".join(parts)
+
+    def heard_reply(self):
+        """Text to keep in conversation memory for this reply"""
+        if not self.interrupted:
+            return " ".join(self.chunks)
+        return self.heard_text + INTERRUPTED_NOTE
+
+    def _on_barge_in(self, monitor):
+        self.interrupted = True
+        # A little audio before the detected start so the first syllable is kept
+        self.resume_from = max(monitor.origin, monitor.speech_start - int(0.3 * monitor.capture.sample_rate))
+        self.cancel()
+
+    def _start_monitor(self):
+        from audio_capture import get_shared_capture
+        from barge_in import BargeInMonitor
+        try:
+            self.monitor = BargeInMonitor(get_shared_capture(), utils.get_audio_player(), mode=self.barge_in_mode,
+                                          on_barge_in=self._on_barge_in).start()
+        except Exception as e:
+            print(f"Barge-in disabled for this reply: {e}")
+            self.barge_in = False
+
+    def cancel(self):
+        """Stop the chunk that is playing and drop everything not yet played"""
+        self.cancelled = True
+        if self.playing and utils.audio_player is not None:
+            utils.audio_player.stop()
+
+    def _submit(self, chunk):
+        if self.cancelled:
+            return
+        self.chunks.append(chunk)
+        # Audio stays in memory from synthesis to the output stream
+        future = self.executor.submit(
+            contextvars.copy_context().run,
+            utils.synthesize_audio, chunk, language_code=self.language_code
+        )
+        # Futures are queued in order, so playback order matches the reply
+        self.playback_queue.put((chunk, future))
+
+    def _playback_loop(self):
+        while True:
+            item = self.playback_queue.get()
+            if item is None:
+                break
+            chunk, future = item
+            if self.cancelled:
+                future.cancel()
+                continue
+            try:
+                audio = future.result()
+            except Exception as e:
+                print(f"Error synthesizing chunk: {e}")
+                continue
+            if not audio or self.cancelled:
+                continue
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+                metrics.observe("time_to_first_audio", self.time_to_first_audio)
+                if self.barge_in:
+                    self._start_monitor()
+            self.playing = True
+            if self.cancelled:
+                self.playing = False
+                continue
+            clip = utils.play_audio(audio)
+            self.playing = False
+            if not clip:
+                continue  # Playback failed, so none of this chunk was heard
+            # Clips from the audio player know their length and how much of them was played
+            duration = getattr(clip, "duration", None)
+            self.played.append((chunk, getattr(clip, "played_seconds", duration), duration))
@@ -0,0 +1,126 @@
+# streaming_stt.py
+import time
+import threading
+
+import utils
+import rate_limiter
+from startup import lazy_module
+
+speech = lazy_module("google.cloud.speech")
+
+
+class TranscriptUpdate:
+    """An interim or final transcript received from StreamingRecognize"""
+    def __init__(self, text, is_final, stability=0.0):
+        self.text = text
+        self.is_final = is_final
+        self.stability = stability
+        self.received_at = time.perf_counter()
+
+    def __repr__(self):
+        kind = "final" if self.is_final else "interim"
+        return f"TranscriptUpdate({kind}, {self.text!r}, stability={self.stability:.2f})"
+
+
+class StreamingRecognizer:
+    """
+    Pushes LINEAR16 audio frames to Google StreamingRecognize while the user is
+    still talking and yields interim and final transcripts as they arrive.
+
+    `single_utterance` lets the server detect the end of speech itself, so the
+    final transcript lands shortly after the user stops talking.
+    """
+    def __init__(self, client=None, language_code="hi-IN", sample_rate=16000,
+                 single_utterance=True, on_transcript=None):
+        self.client = client
+        self.language_code = language_code
+        self.sample_rate = sample_rate
+        self.single_utterance = single_utterance
+        self.on_transcript = on_transcript
+        self.end_of_speech_at = None
+        self.final_at = None
+        self._stop = threading.Event()
+
+    @property
+    def finalization_latency(self):
+        """Seconds between the server's end-of-speech event and the final transcript"""
+        if self.end_of_speech_at is None or self.final_at is None:
+            return None
+        return self.final_at - self.end_of_speech_at
+
+    def stop(self):
+        """Stop sending audio; the server then returns its final transcript"""
+        self._stop.set()
+
+    def recognize(self, frames):
+        """
+        Stream the given audio frames and yield TranscriptUpdate objects.
+        Ends after the first final result in single-utterance mode.
+        """
+        self._stop.clear()
+        self.end_of_speech_at = None
+        self.final_at = None
+
+        client = self.client or utils.speech_client
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=speech.RecognitionConfig(
+                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+                sample_rate_hertz=self.sample_rate,
+                language_code=self.language_code,
+            ),
+            interim_results=True,
+            single_utterance=self.single_utterance,
+        )
+        end_of_utterance = speech.StreamingRecognizeResponse.SpeechEventType.END_OF_SINGLE_UTTERANCE
+        requests = (speech.StreamingRecognizeRequest(audio_content=frame) for frame in self._frames(frames))
+
+        # The audio is consumed as it streams, so a failed stream is not retried here.
+        # Only a final result counts as a success; a stream closed before one arrives
+        # just frees the breaker's probe slot.
+        guard = rate_limiter.get_guard("stt")
+        guard.admit()
+        failed = False
+        got_final = False
+        try:
+            for response in client.streaming_recognize(streaming_config, requests):
+                if response.speech_event_type == end_of_utterance:
+                    self.end_of_speech_at = time.perf_counter()
+                    self._stop.set()
+
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    update = TranscriptUpdate(result.alternatives[0].transcript, result.is_final, result.stability)
+                    if update.is_final:
+                        self.final_at = update.received_at
+                        if not got_final:
+                            got_final = True
+                            guard.record_success()
+                    if self.on_transcript:
+                        self.on_transcript(update)
+                    yield update
+                    if update.is_final and self.single_utterance:
+                        self._stop.set()
+                        return
+        except Exception as e:
+            failed = True
+            guard.record_failure(e)
+            raise
+        finally:
+            if not failed and not got_final:
+                guard.breaker.release()
+
+    def recognize_final(self, frames):
+        """Stream the frames and return the final transcript text ("" if none)"""
+        final_text = ""
+        for update in self.recognize(frames):
+            if update.is_final:
+                final_text += update.text
+        return final_text.strip()
+
+    def _frames(self, frames):
+        for frame in frames:
+            if self._stop.is_set():
+                return
+            yield frame
+
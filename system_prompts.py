@@ -79,3 +79,42 @@ SYSTEM_PROMPTS = {
     Yaad rakhein: Payments collect karna important hai, lekin customer relationship preserve karna equally crucial hai.
     """
 }
+
+# Opening line spoken at the start of each call
+INITIAL_GREETINGS = {
+    "demo_scheduling": "Namaste! Mai iMax Global Ventures se bol raha hoon. Kya aap hamare ERP system ke baare mein baat karna chahenge?",
+    "candidate_interviewing": "Namaste! Mai iMax Global Ventures se bol raha hoon. Hum aapka interview lene wale hain AI/ML Engineer position ke liye.",
+    "payment_followup": "Namaste! Mai iMax Global Ventures se bol raha hoon. Mai aapke pending payment ke baare mein baat karna chahta hoon."
+}
+
+DEFAULT_GREETING = "Namaste! Mai iMax Global Ventures se bol raha hoon."
+
+# Stock replies used when the model cannot be asked or did not get any input
+FIXED_RESPONSES = {
+    "no_input": "I didn't catch that. Please try again.",
+    "service_error": "I'm having trouble processing your request right now. Please try again later.",
+    # Spoken when the circuit breaker is open and the model is not even tried
+    "service_unavailable": "Sorry, our system is down for a moment. We will call you back shortly."
+}
+
+# Templated replies for turns the local intent classifier handles without the model.
+# {when} is filled with the requested or first free demo slot.
+INTENT_REPLIES = {
+    "demo_scheduling": {
+        "who_is_calling": "Mai iMax Global Ventures se bol raha hoon. Hum businesses ke liye cloud-based ERP system banate hain. Kya mai aapke liye iska ek chhota sa demo schedule kar doon?",
+        "callback_later": "Koi baat nahi! Mai aapko baad mein call kar lunga. Aapka din shubh rahe!",
+        "goodbye": "Aapke samay ke liye dhanyavaad! Aapka din shubh rahe.",
+        "schedule_request": "Bahut badhiya! Mai aapka demo {when} ke liye book kar raha hoon. Invite aapke email par aa jayega.",
+        "time_confirmation": "Theek hai, {when} ka demo book kar raha hoon. Invite aapke email par aa jayega."
+    },
+    "candidate_interviewing": {
+        "who_is_calling": "Mai iMax Global Ventures se bol raha hoon. Hum AI/ML Engineer position ke liye aapka initial screening interview le rahe hain.",
+        "callback_later": "Koi baat nahi! Hum aapka interview baad mein reschedule kar lenge. Dhanyavaad!",
+        "goodbye": "Aapke samay ke liye dhanyavaad! Hiring team jald hi aapse sampark karegi."
+    },
+    "payment_followup": {
+        "who_is_calling": "Mai iMax Global Ventures se bol raha hoon. Aapke pending payment ke silsile mein call kiya tha.",
+        "callback_later": "Koi baat nahi! Mai aapko baad mein call kar lunga. Dhanyavaad!",
+        "goodbye": "Aapke samay ke liye dhanyavaad! Aapka din shubh rahe."
+    }
+}
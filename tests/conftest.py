@@ -0,0 +1,43 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rate_limiter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_guards():
+    # Guards are process-wide; a breaker tripped by one test must not leak into the next
+    rate_limiter._guards.clear()
+    yield
+    rate_limiter._guards.clear()
+
+
+@pytest.fixture
+def offline_services(monkeypatch, tmp_path):
+    """Point utils at the fakes, with a real CRM store and booking queue under tmp_path"""
+    import utils
+    from booking_queue import BookingQueue
+    from crm_store import CRMStore
+    from fakes import (FakeAsyncSpeechClient, FakeAsyncTTSClient, FakeCalendarService, FakeLLM,
+                       fake_speech_types, fake_tts_types)
+
+    monkeypatch.setattr(utils, "speech", fake_speech_types)
+    monkeypatch.setattr(utils, "texttospeech", fake_tts_types)
+    monkeypatch.setattr(utils, "async_speech_client", FakeAsyncSpeechClient(latency=0.01))
+    monkeypatch.setattr(utils, "async_tts_client", FakeAsyncTTSClient(latency=0.01))
+    monkeypatch.setattr(utils, "llm", FakeLLM(replies=("Ji, hamara ERP aapke kaam aayega.",), first_token_latency=0.01))
+    for name in ("tts_cache", "response_cache", "slot_finder", "hedge_policy", "fallback_llm"):
+        monkeypatch.setattr(utils, name, None)
+    crm = CRMStore(str(tmp_path / "crm.sqlite3"), flush_interval=0.01)
+    bookings = BookingQueue(FakeCalendarService(), batch_window=0.01)
+    monkeypatch.setattr(utils, "crm_store", crm)
+    monkeypatch.setattr(utils, "booking_queue", bookings)
+    yield crm, bookings
+    bookings.close()
+    crm.close()
@@ -0,0 +1,87 @@
+# test_audio_capture.py
+import threading
+
+import numpy as np
+import pytest
+
+from audio_capture import CaptureStream
+
+
+def _capture(**settings):
+    # 100 ms frames in a 1 s ring keep the numbers small
+    settings.setdefault("capacity_seconds", 1.0)
+    return CaptureStream(sample_rate=1000, frame_ms=100, **settings)
+
+
+def test_slices_stay_contiguous_across_the_wrap():
+    capture = _capture()
+    samples = np.arange(1500, dtype=np.int16)
+    for offset in range(0, 1500, 300):
+        capture.write(samples[offset:offset + 300])
+
+    assert capture.cursor == 1500
+    # Samples 800-1199 straddle the end of the ring
+    window = capture.slice(800, 1200)
+    assert np.array_equal(window, samples[800:1200])
+    assert window.base is not None  # A view, not a copy
+    assert capture.slice_bytes(1400) == samples[1400:].tobytes()
+
+
+def test_slices_outside_the_ring_are_rejected():
+    capture = _capture()
+    capture.write(np.zeros(800, dtype=np.int16))
+    capture.write(np.zeros(700, dtype=np.int16))
+    with pytest.raises(ValueError):
+        capture.slice(400, 600)  # Already overwritten
+    with pytest.raises(ValueError):
+        capture.slice(1400, 1600)  # Not captured yet
+
+
+def test_oversized_write_keeps_the_newest_samples():
+    capture = _capture()
+    samples = np.arange(2500, dtype=np.int16)
+    capture.write(samples)
+    assert capture.cursor == 1000
+    assert np.array_equal(capture.slice(0), samples[-1000:])
+
+
+def test_frames_yield_whole_frames_until_capture_stops():
+    capture = _capture()
+    capture.write(np.arange(450, dtype=np.int16))
+
+    chunks = list(capture.frames(start=0))
+
+    assert [len(chunk) for chunk in chunks] == [400]
+    assert np.array_equal(chunks[0], np.arange(400))
+
+
+def test_frames_follow_live_audio_until_stopped():
+    capture = _capture()
+    capture._stream = object()  # Pretend the device is open so frames() waits for more audio
+    stop = threading.Event()
+    seen = []
+
+    def consume():
+        for chunk in capture.frames(start=0, stop_event=stop, timeout=0.01):
+            seen.append(len(chunk))
+            if sum(seen) >= 300:
+                stop.set()
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    for _ in range(3):
+        capture.write(np.zeros(100, dtype=np.int16))
+    consumer.join(2)
+
+    assert not consumer.is_alive()
+    assert sum(seen) == 300
+
+
+def test_noise_floor_follows_a_quieter_room():
+    capture = _capture(initial_noise_floor=100.0)
+    capture.write(np.full(100, 10, dtype=np.int16))
+    assert capture.noise_floor < 100.0
+    quiet = capture.noise_floor
+    # Loud speech does not raise the floor
+    capture.write(np.full(100, 5000, dtype=np.int16))
+    assert capture.noise_floor == quiet
@@ -0,0 +1,126 @@
+# test_audio_player.py
+import io
+import sys
+import types
+import wave
+
+import numpy as np
+import pytest
+
+import audio_player
+from audio_player import AudioPlayer, Clip, decode_pcm, resample
+
+
+def _wav(pcm, rate=24000, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def test_clip_duration_and_progress():
+    clip = Clip(bytes(48000), 24000)
+    assert clip.duration == 1.0
+    clip.offset = 12000
+    assert clip.played_seconds == 0.25
+
+
+def test_clip_wait_is_bounded_by_its_duration(monkeypatch):
+    monkeypatch.setattr(audio_player, "PLAY_TIMEOUT_SLACK", 0.0)
+    clip = Clip(bytes(480), 24000)
+    assert clip.wait() is False
+    clip.done.set()
+    assert clip.wait() is True
+
+
+def test_decode_pcm_reads_wav_header_and_raw_audio():
+    pcm = bytes(range(200))
+    assert decode_pcm(_wav(pcm, rate=16000)) == (pcm, 16000)
+    assert decode_pcm(pcm, default_rate=8000) == (pcm, 8000)
+    with pytest.raises(ValueError):
+        decode_pcm(_wav(bytes(400), channels=2))
+
+
+def test_resample_changes_length_and_keeps_the_signal():
+    samples = np.linspace(-1000, 1000, 1600).astype(np.int16)
+    out = np.frombuffer(resample(samples.tobytes(), 16000, 24000), dtype=np.int16)
+    assert len(out) == 2400
+    assert abs(int(out[0]) + 1000) <= 1 and abs(int(out[-1]) - 1000) <= 1
+    assert resample(samples.tobytes(), 24000, 24000) == samples.tobytes()
+
+
+def test_callback_drains_queued_clips_in_order():
+    player = AudioPlayer(sample_rate=24000)
+    first, second = Clip(b"\x01\x00" * 3, 24000), Clip(b"\x02\x00" * 3, 24000)
+    player.clips.extend([first, second])
+
+    out, _ = player._on_audio(None, 4, None, None)
+    assert out == b"\x01\x00" * 3 + b"\x02\x00"
+    assert first.done.is_set() and not second.done.is_set()
+
+    out, _ = player._on_audio(None, 4, None, None)
+    # The rest of the second clip, then silence
+    assert out == b"\x02\x00" * 2 + bytes(4)
+    assert second.done.is_set() and not player.is_playing
+
+
+def test_stop_interrupts_everything_queued():
+    player = AudioPlayer()
+    clips = [Clip(bytes(100), 24000) for _ in range(3)]
+    player.clips.extend(clips)
+    player.stop()
+    assert all(clip.interrupted and clip.done.is_set() for clip in clips)
+    assert not player.is_playing
+
+
+class _FakeChannel:
+    def __init__(self):
+        self.played = []
+
+    def play(self, sound):
+        self.played.append(sound.buffer)
+
+    def get_busy(self):
+        return False
+
+    def set_volume(self, volume):
+        pass
+
+    def stop(self):
+        pass
+
+
+@pytest.fixture
+def fake_mixer(monkeypatch):
+    channel = _FakeChannel()
+
+    class Sound:
+        def __init__(self, buffer):
+            if buffer == b"bad!":
+                raise RuntimeError("unsupported format")
+            self.buffer = buffer
+
+    mixer = types.SimpleNamespace(
+        get_init=lambda: None, init=lambda **kwargs: None, quit=lambda: None,
+        Channel=lambda index: channel, Sound=Sound,
+    )
+    # No PyAudio, so the player falls back to the (fake) pygame mixer
+    monkeypatch.setitem(sys.modules, "pyaudio", None)
+    monkeypatch.setitem(sys.modules, "pygame", types.SimpleNamespace(mixer=mixer))
+    return channel
+
+
+def test_mixer_loop_survives_a_clip_that_fails_to_play(fake_mixer):
+    player = AudioPlayer().start()
+    assert player.backend == "pygame"
+
+    bad = player.play(b"bad!")
+    good = player.play(b"good")
+
+    assert bad.done.is_set() and bad.interrupted
+    assert good.done.is_set() and not good.interrupted
+    assert fake_mixer.played == [b"good"]
+    player.close()
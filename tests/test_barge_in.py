@@ -0,0 +1,86 @@
+# test_barge_in.py
+import numpy as np
+
+from audio_capture import CaptureStream
+from barge_in import BargeInMonitor
+
+RATE = 16000
+
+
+def _tone(seconds, amplitude=3000, frequency=220):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+def _silence(seconds, amplitude=20, seed=0):
+    noise = np.random.default_rng(seed).normal(0, amplitude, int(RATE * seconds))
+    return noise.astype(np.int16)
+
+
+class FakePlayer:
+    """Records what the monitor does to playback"""
+    def __init__(self):
+        self.stopped = False
+        self.gains = []
+
+    def stop(self):
+        self.stopped = True
+
+    def set_gain(self, gain):
+        self.gains.append(gain)
+
+
+def _run(audio, **settings):
+    """Feed audio through a capture stream frame by frame while a monitor watches it"""
+    capture = CaptureStream(sample_rate=RATE, capacity_seconds=10.0)
+    # Audio from before playback started must not count
+    capture.write(_tone(0.5))
+    player = FakePlayer()
+    interruptions = []
+    monitor = BargeInMonitor(capture, player, on_barge_in=interruptions.append, **settings).start()
+    for offset in range(0, len(audio), capture.frame_samples):
+        capture.write(audio[offset:offset + capture.frame_samples])
+    # With no device open, the monitor runs out of audio and returns
+    monitor.thread.join(2)
+    monitor.stop()
+    return monitor, player, interruptions
+
+
+def test_speech_stops_playback_within_about_100_ms():
+    monitor, player, interruptions = _run(np.concatenate([_silence(0.5), _tone(1.0)]))
+
+    assert monitor.triggered.is_set()
+    assert player.stopped
+    assert interruptions == [monitor]
+    # Capture position where the callee began, counted from the start of the ring
+    assert abs(monitor.speech_start - int(RATE * 1.0)) < RATE * 0.05
+    assert monitor.reaction_time < 0.2
+
+
+def test_silence_leaves_playback_alone():
+    monitor, player, interruptions = _run(_silence(1.0))
+
+    assert not monitor.triggered.is_set()
+    assert not player.stopped
+    assert interruptions == []
+    assert monitor.speech_start is None
+
+
+def test_duck_mode_only_dips_for_a_backchannel():
+    audio = np.concatenate([_silence(0.3), _tone(0.15), _silence(0.6)])
+    monitor, player, _ = _run(audio, mode="duck", confirm_ms=300)
+
+    assert not monitor.triggered.is_set()
+    assert not player.stopped
+    assert player.gains[0] == 0.25
+    assert player.gains[-1] == 1.0
+
+
+def test_duck_mode_stops_once_speech_is_confirmed():
+    monitor, player, _ = _run(np.concatenate([_silence(0.3), _tone(1.0)]), mode="duck", confirm_ms=300)
+
+    assert monitor.triggered.is_set()
+    assert player.stopped
+    assert player.gains[0] == 0.25
+    assert player.gains[-1] == 1.0
+    assert 0.3 <= monitor.reaction_time < 0.4
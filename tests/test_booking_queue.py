@@ -0,0 +1,82 @@
+# test_booking_queue.py
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from booking_queue import BookingQueue
+from fakes import FakeCalendarService
+
+
+def _event(start):
+    end = start + timedelta(hours=1)
+    return {"summary": "Demo", "start": {"dateTime": start.isoformat(), "timeZone": "Asia/Kolkata"},
+            "end": {"dateTime": end.isoformat(), "timeZone": "Asia/Kolkata"}}
+
+
+@pytest.fixture
+def start():
+    return (datetime.now() + timedelta(days=1)).replace(hour=11, minute=0, second=0, microsecond=0)
+
+
+def test_duplicate_submissions_book_once(start):
+    service = FakeCalendarService()
+    queue = BookingQueue(service, batch_window=0.01)
+    results = []
+    queue.submit("a@example.com", start, _event(start), callback=results.append)
+    queue.submit("A@example.com ", start, _event(start), callback=results.append)
+    assert queue.flush(timeout=2)
+
+    assert len(service.inserted) == 1
+    assert [result.status for result in results] == ["booked", "booked"]
+    queue.close()
+
+
+def test_failed_booking_is_retried_when_resubmitted(start):
+    service = FakeCalendarService(fail_inserts=1)
+    queue = BookingQueue(service, batch_window=0.01, max_attempts=1)
+    results = []
+    queue.submit("a@example.com", start, _event(start), callback=results.append)
+    assert queue.flush(timeout=2)
+    assert results[-1].status == "failed"
+    assert queue.results_for("a@example.com") == []
+
+    queue.submit("a@example.com", start, _event(start), callback=results.append)
+    assert queue.flush(timeout=2)
+    assert results[-1].status == "booked"
+    assert len(service.inserted) == 1
+    queue.close()
+
+
+def test_remembered_results_are_capped(start):
+    queue = BookingQueue(FakeCalendarService(), batch_window=0.01, max_results=2)
+    for hour in range(3):
+        slot = start + timedelta(hours=hour)
+        queue.submit("a@example.com", slot, _event(slot))
+    assert queue.flush(timeout=2)
+    assert len(queue.results) == 2
+    queue.close()
+
+
+def test_close_sends_bookings_still_in_the_batch_window(start):
+    service = FakeCalendarService()
+    queue = BookingQueue(service, batch_window=0.2)
+    queue.submit("a@example.com", start, _event(start))
+
+    queue.close()
+
+    assert len(service.inserted) == 1
+
+
+def test_close_does_not_wait_out_a_retry_backoff(start):
+    service = FakeCalendarService(fail_inserts=1)
+    queue = BookingQueue(service, batch_window=0.01, base_backoff=30.0)
+    key = queue.submit("a@example.com", start, _event(start))
+    deadline = time.monotonic() + 2
+    # Wait until the failed first attempt has scheduled its retry
+    while queue.pending[key].not_before == 0.0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    queue.close(timeout=2)
+
+    assert len(service.inserted) == 1
@@ -0,0 +1,72 @@
+# test_call_session.py
+import asyncio
+
+import pytest
+
+from call_session import AudioIO, CallEngine, CallSession, FileAudioIO
+
+
+def test_audio_io_is_abstract():
+    with pytest.raises(TypeError):
+        AudioIO()
+
+    class CaptureOnly(AudioIO):
+        async def capture(self):
+            return None
+
+    with pytest.raises(TypeError):
+        CaptureOnly()
+
+
+def test_file_audio_io_replays_inputs_and_writes_replies(tmp_path):
+    utterance = tmp_path / "turn.wav"
+    utterance.write_bytes(b"RIFF-caller")
+    audio_io = FileAudioIO([str(utterance)], output_dir=str(tmp_path / "out"))
+
+    async def call():
+        first = await audio_io.capture()
+        await audio_io.play(b"RIFF-agent")
+        return first, await audio_io.capture()
+
+    assert asyncio.run(call()) == (b"RIFF-caller", None)
+    assert (tmp_path / "out" / "reply_000.wav").read_bytes() == b"RIFF-agent"
+
+
+class ScriptedAudioIO(AudioIO):
+    """Says each utterance in turn (as the UTF-8 "audio" FakeAsyncSpeechClient understands)"""
+    def __init__(self, utterances):
+        self.utterances = list(utterances)
+        self.played = []
+
+    async def capture(self):
+        if not self.utterances:
+            return None
+        await asyncio.sleep(0)
+        return self.utterances.pop(0).encode("utf-8")
+
+    async def play(self, audio_content):
+        self.played.append(audio_content)
+
+
+def test_engine_runs_concurrent_sessions_end_to_end(offline_services):
+    crm, bookings = offline_services
+    script = ["haan ji, kal 3 baje", "", "ERP ki pricing kya hai?"]
+    sessions = [
+        CallSession("demo_scheduling", f"lead{index}@example.com", ScriptedAudioIO(script), session_id=f"s{index}")
+        for index in range(4)
+    ]
+
+    asyncio.run(CallEngine(api_limits={"llm": 2, "side_effects": 2}).run(sessions))
+    assert bookings.flush(timeout=5)
+    crm.flush()
+
+    for session in sessions:
+        assert session.error is None
+        assert session.turns == 3
+        # Greeting plus one reply per turn
+        assert len(session.audio_io.played) == 4
+        assert [result.ok for result in session.bookings] == [True]
+        assert session.history[-1]["content"] == "Ji, hamara ERP aapke kaam aayega."
+    # Every turn is logged, the empty one included
+    assert crm.count() == 12
+    assert crm.outcomes("demo_scheduling") == {"demo_scheduled": 4}
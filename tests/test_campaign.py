@@ -0,0 +1,94 @@
+# test_campaign.py
+import asyncio
+import json
+
+import utils
+from call_session import AudioIO
+from campaign import CampaignRunner, lead_id, load_checkpoint, load_leads
+from fakes import FakeAsyncSpeechClient, FakeAsyncTTSClient
+
+
+class LeadAudioIO(AudioIO):
+    """One callee utterance, or a dropped line for a lead marked to fail"""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.utterances = ["ERP ki pricing kya hai?"]
+
+    async def capture(self):
+        if self.fail:
+            raise ConnectionError("line dropped")
+        if not self.utterances:
+            return None
+        await asyncio.sleep(0)
+        return self.utterances.pop(0).encode("utf-8")
+
+    async def play(self, audio_content):
+        pass
+
+
+def _run(monkeypatch, leads, results_path, failing=()):
+    # The runner drops the async clients when its loop closes, so each run gets fresh fakes
+    monkeypatch.setattr(utils, "async_speech_client", FakeAsyncSpeechClient(latency=0.01))
+    monkeypatch.setattr(utils, "async_tts_client", FakeAsyncTTSClient(latency=0.01))
+    runner = CampaignRunner(leads, results_path=str(results_path), workers=2,
+                            audio_factory=lambda lead: LeadAudioIO(fail=lead["id"] in failing))
+    return runner.run()
+
+
+def _records(results_path):
+    return [json.loads(line) for line in results_path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_load_leads_fills_in_ids_and_scenarios(tmp_path):
+    csv_path = tmp_path / "leads.csv"
+    csv_path.write_text("name,email,scenario\nAsha,Asha@Example.com ,\nRavi,ravi@example.com,bogus\n",
+                        encoding="utf-8")
+    jsonl_path = tmp_path / "leads.jsonl"
+    jsonl_path.write_text('{"id": 7, "email": "meera@example.com", "scenario": "payment_followup"}\n\n',
+                          encoding="utf-8")
+
+    asha, ravi = load_leads(str(csv_path))
+    (meera,) = load_leads(str(jsonl_path))
+
+    assert asha["email"] == "Asha@Example.com"
+    assert asha["scenario"] == ravi["scenario"] == "demo_scheduling"
+    # Ids are stable across runs and ignore case and stray whitespace in the email
+    assert asha["id"] == lead_id({"email": "asha@example.com", "scenario": "demo_scheduling"})
+    assert meera["id"] == "7"
+    assert meera["scenario"] == "payment_followup"
+
+
+def test_restart_skips_completed_leads_and_retries_failed_ones(offline_services, monkeypatch, tmp_path):
+    leads = [{"id": f"lead{index}", "name": f"Lead {index}", "email": f"lead{index}@example.com",
+              "scenario": "demo_scheduling"} for index in range(3)]
+    results_path = tmp_path / "results.jsonl"
+
+    first = _run(monkeypatch, leads, results_path, failing={"lead1"})
+
+    assert (first["completed"], first["failed"], first["skipped"]) == (2, 1, 0)
+    assert load_checkpoint(str(results_path)) == {"lead0", "lead2"}
+    failed = [record for record in _records(results_path) if record["status"] == "failed"]
+    assert [(record["lead_id"], record["error"]) for record in failed] == [("lead1", "line dropped")]
+
+    second = _run(monkeypatch, leads, results_path)
+
+    assert (second["completed"], second["failed"], second["skipped"]) == (1, 0, 2)
+    assert load_checkpoint(str(results_path)) == {"lead0", "lead1", "lead2"}
+    records = _records(results_path)
+    assert len(records) == 4
+    assert records[-1]["lead_id"] == "lead1" and records[-1]["turns"] == 1
+
+
+def test_torn_last_line_is_ignored_and_closed_off(offline_services, monkeypatch, tmp_path):
+    leads = [{"id": "lead0", "email": "lead0@example.com", "scenario": "demo_scheduling"}]
+    results_path = tmp_path / "results.jsonl"
+    results_path.write_text('{"lead_id": "lead0", "status": "compl', encoding="utf-8")
+
+    assert load_checkpoint(str(results_path)) == set()
+    summary = _run(monkeypatch, leads, results_path)
+
+    assert summary["completed"] == 1
+    lines = results_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1])["status"] == "completed"
+    assert load_checkpoint(str(results_path)) == {"lead0"}
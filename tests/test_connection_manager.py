@@ -0,0 +1,135 @@
+# test_connection_manager.py
+import time
+
+import pytest
+
+from connection_manager import ConnectionManager
+
+
+class FakeChannel:
+    """A gRPC channel that is either reachable or not"""
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeHTTPClient:
+    """Answers GET /models with a fixed status code and counts the requests"""
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.requests = []
+        self.closed = False
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers))
+        return FakeResponse(self.status_code)
+
+    def close(self):
+        self.closed = True
+
+
+def _idle_status():
+    return {"state": "IDLE", "checks": 0, "failures": 0, "reconnects": 0, "last_check_ms": None}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = ConnectionManager(health_check_interval=0.05, llm_api_key="sk-test")
+
+    def check_channel(name):
+        channel, _ = manager.channels[name]
+        if not channel.ready:
+            raise TimeoutError("channel not ready")
+        manager._on_state(name, "READY")
+
+    monkeypatch.setattr(manager, "_check_channel", check_channel)
+    yield manager
+    manager.close()
+
+
+def _add_channel(manager, name, ready=True):
+    channel = FakeChannel(ready)
+    manager.channels[name] = (channel, None)
+    manager.status[name] = _idle_status()
+    return channel
+
+
+def _add_llm(manager, status_code=200):
+    client = FakeHTTPClient(status_code)
+    manager._http_client = client
+    manager.status["llm"] = _idle_status()
+    return client
+
+
+def test_check_health_reports_each_connection(manager):
+    _add_channel(manager, "speech")
+    _add_channel(manager, "tts", ready=False)
+    client = _add_llm(manager)
+
+    assert manager.check_health() == {"speech": True, "tts": False, "llm": True}
+
+    stats = manager.stats()
+    assert stats["speech"]["state"] == "READY"
+    assert stats["tts"]["failures"] == 1
+    assert stats["llm"]["state"] == "READY"
+    assert all(status["checks"] == 1 for status in stats.values())
+    assert client.requests == [("https://api.openai.com/v1/models", {"Authorization": "Bearer sk-test"})]
+
+
+def test_llm_server_error_counts_as_a_failure(manager):
+    _add_llm(manager, status_code=503)
+
+    assert manager.check_health() == {"llm": False}
+    assert manager.stats()["llm"]["failures"] == 1
+    # A client error still proves the connection is open
+    manager._http_client.status_code = 401
+    assert manager.check_health() == {"llm": True}
+
+
+def test_reconnect_is_counted_after_a_failure(manager):
+    _add_channel(manager, "speech")
+    manager.check_health()
+
+    manager._on_state("speech", "TRANSIENT_FAILURE")
+    manager._on_state("speech", "READY")
+
+    status = manager.stats()["speech"]
+    assert status["state"] == "READY"
+    assert status["reconnects"] == 1
+
+
+def test_keepalive_thread_rechecks_until_closed(manager):
+    channel = _add_channel(manager, "speech")
+    client = _add_llm(manager)
+
+    manager.start_keepalive()
+    deadline = time.monotonic() + 2
+    while manager.stats()["speech"]["checks"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.stats()["speech"]["checks"] >= 3
+    assert len(client.requests) >= 3
+
+    manager.close()
+    assert channel.closed and client.closed
+    manager._keepalive_thread.join(1)
+    assert not manager._keepalive_thread.is_alive()
+
+
+def test_format_stats_lists_every_connection(manager):
+    _add_channel(manager, "speech")
+    _add_llm(manager)
+    manager.check_health()
+
+    text = manager.format_stats()
+
+    assert "speech" in text and "llm" in text
+    assert "open=0/10" in text
+    assert "last_check=" in text
@@ -0,0 +1,92 @@
+# test_conversation_memory.py
+import threading
+
+import utils
+from conversation_memory import ConversationMemory, estimate_tokens
+from fakes import FakeLLM
+
+
+def _fill(memory, turns, words=20):
+    for index in range(turns):
+        memory.add_turn(f"sawaal {index} " + "haan " * words, f"jawab {index} " + "ji " * words)
+
+
+def test_devanagari_costs_more_tokens_than_latin():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("नमस्ते जी") > estimate_tokens("namaste ji")
+
+
+def test_trimming_keeps_the_prompt_within_budget():
+    memory = ConversationMemory(token_budget=100, min_recent_messages=2)
+    _fill(memory, 10)
+
+    assert memory.prompt_tokens() <= 100
+    assert memory.recent[-1]["content"].startswith("jawab 9")
+    # No summarizer: older turns are forgotten
+    assert memory.folded_messages == 20 - len(memory.recent)
+    assert memory.summary == ""
+
+
+def test_the_newest_turn_is_kept_even_over_budget():
+    memory = ConversationMemory(token_budget=10, min_recent_messages=2)
+    memory.add_turn("haan " * 50, "ji " * 50)
+    assert len(memory.recent) == 2
+
+
+def test_evicted_turns_are_folded_into_a_summary():
+    seen = []
+
+    def summarizer(previous, messages):
+        seen.append(len(messages))
+        return (previous + " " if previous else "") + f"{len(messages)} purane messages"
+
+    memory = ConversationMemory(token_budget=120, summary_token_budget=30, summarizer=summarizer)
+    _fill(memory, 8)
+    assert memory.wait_for_summary(timeout=2)
+
+    assert memory.summary and sum(seen) == memory.folded_messages
+    assert memory.messages()[0]["role"] == "system"
+    assert memory.summary in memory.messages()[0]["content"]
+    assert estimate_tokens(memory.summary) <= 30
+    assert memory.prompt_tokens() <= 120
+
+
+def test_adding_a_turn_does_not_wait_for_the_summarizer():
+    release = threading.Event()
+
+    def slow_summarizer(previous, messages):
+        release.wait(2)
+        return "summary"
+
+    memory = ConversationMemory(token_budget=60, summarizer=slow_summarizer)
+    _fill(memory, 4)
+    # The summarizer is still blocked, yet the turns were added and trimmed
+    assert memory.pending and memory.prompt_tokens() <= 60
+    release.set()
+    assert memory.wait_for_summary(timeout=2)
+    assert memory.summary == "summary"
+
+
+def test_failed_summary_keeps_the_previous_one():
+    def broken(previous, messages):
+        raise ConnectionError("llm down")
+
+    memory = ConversationMemory(token_budget=60, summarizer=broken)
+    memory.summary = "pehle ka summary"
+    _fill(memory, 4)
+    assert memory.wait_for_summary(timeout=2)
+    assert memory.summary == "pehle ka summary"
+
+
+def test_revise_last_replaces_the_newest_message_of_a_role():
+    memory = ConversationMemory()
+    memory.add_turn("haan ji", "Hamara ERP bahut fast hai, aur sasta bhi")
+    assert memory.revise_last("assistant", "Hamara ERP")
+    assert memory.messages()[-1] == {"role": "assistant", "content": "Hamara ERP"}
+    assert not ConversationMemory().revise_last("assistant", "x")
+
+
+def test_utils_summarizer_uses_the_model(monkeypatch):
+    monkeypatch.setattr(utils, "llm", FakeLLM(replies=[" Customer ko demo chahiye. "]))
+    summary = utils.summarize_conversation("", [{"role": "user", "content": "demo chahiye"}])
+    assert summary == "Customer ko demo chahiye."
@@ -0,0 +1,46 @@
+# test_crm_store.py
+import pytest
+
+from crm_store import CRMStore
+
+LOG = (
+    "2024-01-05 10:15:00 - Potential Customer (a@example.com) - demo_scheduling: Q: haan ji, A: Namaste!\n"
+    "2024-01-05 10:16:00 - Customer (b@example.com) - payment_followup: Q: kal tak, A: Theek hai\n"
+    "second line of the same answer\n"
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CRMStore(str(tmp_path / "crm.sqlite3"), flush_interval=0.01)
+    yield store
+    store.close()
+
+
+def test_records_are_written_behind(store):
+    store.record("Customer", "a@example.com", "Q: haan, A: ji", "demo_scheduling", outcome="demo_scheduled")
+    store.flush()
+    assert store.count() == 1
+    assert store.outcomes("demo_scheduling") == {"demo_scheduled": 1}
+
+
+def test_importing_the_text_log_twice_adds_nothing(store, tmp_path):
+    log_path = tmp_path / "customer_interactions.txt"
+    log_path.write_text(LOG, encoding="utf-8")
+
+    assert store.import_text_log(str(log_path)) == 2
+    assert store.import_text_log(str(log_path)) == 0
+    assert store.count() == 2
+    assert store.interactions_for("b@example.com")[0]["interaction"].endswith("second line of the same answer")
+
+    with open(log_path, "a", encoding="utf-8") as log_file:
+        log_file.write("2024-01-06 09:00:00 - Candidate (c@example.com) - candidate_interviewing: Q: ji, A: ok\n")
+    assert store.import_text_log(str(log_path)) == 1
+    assert store.count() == 3
+
+
+def test_record_after_close_raises(store):
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.record("Customer", "a@example.com", "late", "demo_scheduling")
+    store.flush()
@@ -0,0 +1,62 @@
+# test_hedging.py
+import asyncio
+
+from fakes import FakeLLM
+from hedging import HedgePolicy, ahedged_stream, hedged_stream, parse_ms
+
+MESSAGES = [{"role": "user", "content": "haan ji"}]
+
+
+def test_parse_ms():
+    assert parse_ms("2000,demo_scheduling=1500") == (2.0, {"demo_scheduling": 1.5})
+    assert parse_ms("", default_ms=800) == (0.8, {})
+
+
+def test_hedge_after_defaults_to_half_the_slo():
+    policy = HedgePolicy(slo=2.0, scenario_slos={"payment_followup": 1.0},
+                         scenario_hedge_after={"demo_scheduling": 0.3})
+    assert policy.hedge_after_for("candidate_interviewing") == 1.0
+    assert policy.hedge_after_for("payment_followup") == 0.5
+    assert policy.hedge_after_for("demo_scheduling") == 0.3
+
+
+def test_fast_primary_is_not_hedged():
+    primary = FakeLLM(replies=["primary reply"])
+    fallback = FakeLLM(replies=["fallback reply"])
+    policy = HedgePolicy(hedge_after=0.5)
+
+    assert "".join(hedged_stream(primary, fallback, MESSAGES, policy, "demo_scheduling")) == "primary reply"
+    assert fallback.calls == 0
+    assert policy.stats()["demo_scheduling"]["hedged"] == 0
+
+
+def test_slow_primary_loses_to_the_fallback():
+    primary = FakeLLM(replies=["primary reply"], first_token_latency=1.0)
+    fallback = FakeLLM(replies=["fallback reply"])
+    policy = HedgePolicy(hedge_after=0.05, max_hedge_rate=1.0)
+
+    assert "".join(hedged_stream(primary, fallback, MESSAGES, policy, "demo_scheduling")) == "fallback reply"
+    stats = policy.stats()["demo_scheduling"]
+    assert stats["hedged"] == 1 and stats["fallback_wins"] == 1
+
+
+def test_hedge_budget_is_respected():
+    policy = HedgePolicy(hedge_after=0.05, max_hedge_rate=0.25)
+    policy.recent.extend([True] * 4)
+    primary = FakeLLM(replies=["primary reply"], first_token_latency=0.2)
+    fallback = FakeLLM(replies=["fallback reply"])
+
+    assert "".join(hedged_stream(primary, fallback, MESSAGES, policy, "demo_scheduling")) == "primary reply"
+    assert fallback.calls == 0
+    assert policy.stats()["demo_scheduling"]["skipped"] == 1
+
+
+def test_async_hedge_cancels_the_loser():
+    primary = FakeLLM(replies=["primary reply"], first_token_latency=1.0)
+    fallback = FakeLLM(replies=["fallback reply"])
+    policy = HedgePolicy(hedge_after=0.05, max_hedge_rate=1.0)
+
+    async def collect():
+        return "".join([token async for token in ahedged_stream(primary, fallback, MESSAGES, policy)])
+
+    assert asyncio.run(collect()) == "fallback reply"
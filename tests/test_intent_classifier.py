@@ -0,0 +1,65 @@
+# test_intent_classifier.py
+import pytest
+
+from intent_classifier import classify
+
+
+@pytest.mark.parametrize("text, name", [
+    ("kaun bol raha hai?", "who_is_calling"),
+    ("aap kaun bol rahe hain?", "who_is_calling"),
+    ("theek hai, demo schedule kar do", "schedule_request"),
+    ("baad mein call karo", "callback_later"),
+    ("abhi busy hoon, baad mein call karna", "callback_later"),
+    ("haan ji", "affirm"),
+    ("haan ji boliye", "affirm"),
+    ("कौन बोल रहा है", "who_is_calling"),
+    ("नहीं", "deny"),
+])
+def test_benchmark_fast_path_turns_are_confident(text, name):
+    intent = classify(text)
+    assert intent.name == name
+    assert intent.confident
+
+
+@pytest.mark.parametrize("text", [
+    "aapka ERP system kya kya karta hai?",
+    "price kitna hoga approximately?",
+    "humare paas already Tally hai, integration ho jayega?",
+    "koi aur question hai?",
+    "UPI se kar sakta hoon kya?",
+    "thoda discount mil sakta hai?",
+    "payment next week tak kar dunga",
+])
+def test_benchmark_content_turns_go_to_the_model(text):
+    assert not classify(text).confident
+
+
+def test_overlapping_phrases_cover_the_whole_utterance():
+    # "aap kaun" and "kaun bol rahe hain" overlap on "kaun"
+    assert classify("aap kaun bol rahe hain").confidence == 1.0
+
+
+def test_time_confirmation_extracts_the_slot():
+    intent = classify("kal 3 baje")
+    assert intent.name == "time_confirmation"
+    assert intent.slots == {"day_offset": 1, "hour": 15, "minute": 0}
+
+
+@pytest.mark.parametrize("text", [
+    "nahi ji, kal 3 baje",
+    "kal 3 baje nahi ji",
+    "नहीं, कल 3 बजे",
+    "demo book kar do, nahi nahi",
+])
+def test_negated_confirmations_never_book(text):
+    intent = classify(text)
+    assert intent.name not in ("schedule_request", "time_confirmation")
+    assert not intent.confident
+
+
+def test_filler_words_do_not_make_a_turn_confident():
+    # "ji" and "sir" must not pad out a partial match
+    assert not classify("ji sir kal 3 baje kuch aur").confident
+    assert classify("haan ji, kal 3 baje").name == "time_confirmation"
+    assert classify("haan ji, kal 3 baje").confident
+    assert classify("ji").confident
@@ -0,0 +1,39 @@
+# test_metrics.py
+import json
+import threading
+
+from metrics import MetricsRegistry
+
+
+def test_spans_are_logged_by_the_background_writer(tmp_path):
+    registry = MetricsRegistry()
+    log_path = tmp_path / "logs" / "turns.jsonl"
+    registry.configure(str(log_path))
+
+    with registry.turn("demo_scheduling"):
+        with registry.span("stt", mode="vad"):
+            pass
+    registry.configure(None)
+
+    records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert [record["stage"] for record in records] == ["stt", "turn"]
+    assert records[0]["mode"] == "vad" and records[0]["scenario"] == "demo_scheduling"
+    assert records[0]["turn_id"] == records[1]["turn_id"]
+
+
+def test_a_stalled_log_does_not_hold_the_registry_lock(tmp_path):
+    registry = MetricsRegistry()
+    registry.configure(str(tmp_path / "turns.jsonl"))
+    release = threading.Event()
+    writer = registry._writer
+    write = writer.file.writelines
+    writer.file.writelines = lambda lines: (release.wait(5), write(lines))
+
+    for _ in range(100):
+        registry.observe("llm", 0.2)
+    # The writer is blocked on the "disk", but observations and reads carry on
+    assert registry.summary()["llm"]["count"] == 100
+
+    release.set()
+    registry.configure(None)
+    assert len((tmp_path / "turns.jsonl").read_text().splitlines()) == 100
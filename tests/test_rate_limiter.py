@@ -0,0 +1,141 @@
+# test_rate_limiter.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+import rate_limiter
+import utils
+from fakes import FakeHttpError, FakeLLM
+from rate_limiter import ApiGuard, CircuitBreaker, CircuitOpenError, TokenBucket, classify
+
+# Shaped like speech_recognition.RequestError without importing the package
+SpeechRequestError = type("RequestError", (Exception,), {"__module__": "speech_recognition"})
+
+
+def test_bucket_spends_its_burst_then_paces():
+    bucket = TokenBucket(rate=10.0, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_bucket_aimd():
+    bucket = TokenBucket(rate=10.0, max_rate=11.0, increase=0.5, decrease_cooldown=60)
+    bucket.on_success()
+    assert bucket.rate == 10.5
+    assert bucket.on_throttle()
+    assert bucket.rate == 5.25
+    # Failures of requests already in flight do not cut the rate again
+    assert not bucket.on_throttle()
+    assert bucket.rate == 5.25
+
+
+@pytest.mark.parametrize("error, kind", [
+    (FakeHttpError(429), "throttled"),
+    (FakeHttpError(503), "server"),
+    (FakeHttpError(400), "client"),
+    (ConnectionError(), "server"),
+    (SpeechRequestError("recognition connection failed"), "server"),
+    (ValueError(), "other"),
+])
+def test_classify(error, kind):
+    assert classify(error) == kind
+
+
+def test_breaker_opens_and_probes_once():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_speech_request_errors_trip_the_stt_breaker():
+    guard = ApiGuard("stt", max_retries=1, failure_threshold=2, reset_timeout=60)
+
+    def recognize():
+        raise SpeechRequestError("recognition connection failed")
+
+    for _ in range(2):
+        with pytest.raises(SpeechRequestError):
+            guard.call(recognize)
+    with pytest.raises(CircuitOpenError):
+        guard.call(recognize)
+
+
+def test_cancelled_probe_frees_the_half_open_slot():
+    guard = ApiGuard("llm", max_retries=1, failure_threshold=1, reset_timeout=0.0)
+    guard.breaker.record_failure()
+    assert guard.breaker.state == "open"
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        probe = asyncio.ensure_future(guard.acall(hang))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert guard.breaker.state == "half_open"
+        return await guard.acall(ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert guard.breaker.state == "closed"
+
+
+def test_get_guard_uses_the_defaults():
+    guard = rate_limiter.get_guard("calendar")
+    assert guard is rate_limiter.get_guard("calendar")
+    assert guard.max_retries == 1
+
+
+def _cancel_soon(delay=0.05):
+    cancel = threading.Event()
+    threading.Timer(delay, cancel.set).start()
+    return cancel
+
+
+def test_cancel_cuts_a_retry_backoff_short():
+    guard = ApiGuard("tts", max_retries=3)
+    guard.backoff = lambda attempt: 5.0
+    calls = []
+
+    def synthesize():
+        calls.append(1)
+        raise FakeHttpError(503)
+
+    started = time.perf_counter()
+    with pytest.raises(FakeHttpError):
+        guard.call(synthesize, cancel=_cancel_soon())
+    assert time.perf_counter() - started < 1.0
+    assert len(calls) == 1
+
+
+def test_cancelled_llm_backoff_returns_none(monkeypatch):
+    class DownLLM(FakeLLM):
+        def invoke(self, messages):
+            raise FakeHttpError(503)
+
+    guard = rate_limiter._guards["llm"] = ApiGuard("llm", max_retries=3)
+    guard.backoff = lambda attempt: 5.0
+    monkeypatch.setattr(utils, "llm", DownLLM())
+    for name in ("response_cache", "hedge_policy", "fallback_llm"):
+        monkeypatch.setattr(utils, name, None)
+
+    started = time.perf_counter()
+    reply = utils.get_ai_response("ERP ki pricing kya hai?", cancel=_cancel_soon())
+    assert reply is None
+    assert time.perf_counter() - started < 1.0
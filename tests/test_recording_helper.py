@@ -0,0 +1,86 @@
+# test_recording_helper.py
+import numpy as np
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+import streaming_stt
+import utils
+from audio_capture import CaptureStream
+from fakes import FakeSpeechClient, fake_speech_types
+from recording_helper import RecordingHelper
+
+RATE = 16000
+
+
+def _tone(seconds, amplitude=3000, frequency=220):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+def _silence(seconds):
+    return np.zeros(int(RATE * seconds), dtype=np.int16)
+
+
+class _BatchRecognizer:
+    def __init__(self, text="batch transcript"):
+        self.text = text
+        self.calls = 0
+
+    def recognize_google(self, audio_data, language=None):
+        self.calls += 1
+        return self.text
+
+
+@pytest.fixture(autouse=True)
+def speech_types(monkeypatch):
+    monkeypatch.setattr(streaming_stt, "speech", fake_speech_types)
+
+
+def _helper(monkeypatch, client):
+    monkeypatch.setattr(utils, "speech_client", client)
+    capture = CaptureStream(sample_rate=RATE)
+    # Already captured: silence, one second of speech, then enough silence to end the turn
+    capture.write(np.concatenate([_silence(0.5), _tone(1.0), _silence(2.0)]))
+    helper = RecordingHelper(streaming=True, auto_endpoint=True, capture=capture, no_speech_timeout=5.0)
+    helper.recognizer = _BatchRecognizer()
+    return helper
+
+
+def test_auto_endpoint_streams_the_gated_turn(monkeypatch):
+    client = FakeSpeechClient(transcript="kal teen baje", frames_per_word=1)
+    helper = _helper(monkeypatch, client)
+    interims = []
+    helper.on_interim = lambda text, stability: interims.append(text)
+
+    text, error = helper.listen(timeout=5.0, origin=0)
+
+    assert (text, error) == ("kal teen baje", None)
+    assert helper.recognizer.calls == 0
+    assert client.calls == 1
+    # Streaming starts at speech start (less 300 ms of padding), not at the leading silence
+    assert client.frames_received == 33
+    assert interims[-1] == "kal teen baje"
+
+
+def test_failed_stream_falls_back_to_batch_recognition(monkeypatch):
+    class BrokenClient:
+        def streaming_recognize(self, config, requests):
+            raise ConnectionError("stream reset")
+            yield
+
+    helper = _helper(monkeypatch, BrokenClient())
+
+    text, error = helper.listen(timeout=5.0, origin=0)
+
+    assert (text, error) == ("batch transcript", None)
+    assert helper.recognizer.calls == 1
+
+
+def test_streamed_frames_stop_at_the_end_of_turn(monkeypatch):
+    helper = _helper(monkeypatch, FakeSpeechClient())
+    helper._stream_end = 8000 + 1234
+
+    sent = b"".join(helper._gated_frames(helper.get_capture(), 8000))
+
+    assert len(sent) == 1234 * 2
@@ -0,0 +1,45 @@
+# test_response_cache.py
+import pytest
+
+from response_cache import ResponseCache
+
+make_key = ResponseCache.make_key
+
+
+@pytest.mark.parametrize("devanagari, latin", [
+    ("नहीं", "nahi"),
+    ("नहीं", "nahin"),
+    ("मीटिंग फिक्स कर दो", "meeting fix kar do"),
+    ("कौन बोल रहा है", "Kaun bol raha hai?"),
+    ("हाँ जी, ठीक है", "haan theek hai"),
+    ("अभी टाइम नहीं है", "abhi time nahi hai"),
+    ("फ़ोन रखता हूँ", "phone rakhta hoon"),
+])
+def test_scripts_fold_to_one_key(devanagari, latin):
+    assert make_key("demo_scheduling", devanagari) == make_key("demo_scheduling", latin)
+
+
+def test_earlier_caller_turns_are_normalized_too():
+    opening = {"role": "assistant", "content": "Namaste!"}
+    key = make_key("demo_scheduling", "price?", [opening, {"role": "user", "content": "हाँ जी"}])
+    assert key == make_key("demo_scheduling", "Price", [opening, {"role": "user", "content": "haan"}])
+
+
+def test_scenario_and_context_separate_keys():
+    assert make_key("demo_scheduling", "nahi") != make_key("payment_followup", "nahi")
+    assert make_key("demo_scheduling", "nahi") != make_key(
+        "demo_scheduling", "nahi", [{"role": "user", "content": "haan"}])
+
+
+def test_lru_eviction_and_ttl():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+
+    cache.entries["a"] = ("A", cache.entries["a"][1] - 120)
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
@@ -0,0 +1,112 @@
+# test_slot_finder.py
+import time
+
+from fakes import FakeCalendarService
+from slot_finder import SlotFinder
+
+
+class FailingCalendarService(FakeCalendarService):
+    """Every freebusy query fails like an unreachable Calendar API"""
+    def _query(self, body):
+        raise ConnectionError("calendar unreachable")
+
+
+def test_warm_cache_serves_slots_without_a_query():
+    service = FakeCalendarService()
+    finder = SlotFinder(service)
+    finder.refresh()
+    assert len(service.freebusy_queries) == 1
+
+    slots = finder.next_free_slots(3)
+
+    assert len(slots) == 3
+    assert len(service.freebusy_queries) == 1
+
+
+def test_cold_cache_returns_no_slots_and_fills_in_the_background():
+    service = FakeCalendarService(latency=0.3)
+    finder = SlotFinder(service)
+
+    started = time.perf_counter()
+    assert finder.next_free_slots(3) == []
+    assert time.perf_counter() - started < 0.1
+
+    finder.refresh_in_background().join(2)
+    assert len(finder.next_free_slots(3)) == 3
+
+
+def test_stale_cache_is_refreshed_off_the_reply_path():
+    service = FakeCalendarService()
+    finder = SlotFinder(service, ttl_seconds=60)
+    finder.refresh()
+    cached = finder.next_free_slots(3)
+    finder.fetched_at -= 120
+    service.latency = 0.3
+
+    started = time.perf_counter()
+    slots = finder.next_free_slots(3)
+    elapsed = time.perf_counter() - started
+
+    # The old snapshot is served at once while the refresh runs
+    assert slots == cached
+    assert elapsed < 0.1
+    finder.refresh_in_background().join(2)
+    assert len(service.freebusy_queries) == 2
+    assert time.monotonic() - finder.fetched_at < 5
+
+
+def test_failing_calendar_gives_no_slots_without_raising():
+    finder = SlotFinder(FailingCalendarService())
+
+    assert finder.next_free_slots(3) == []
+    finder.refresh_in_background().join(2)
+    assert finder.next_free_slots(3) == []
+    assert finder.fetched_at is None
+
+
+def _first_free(finder):
+    return finder.next_free_slots(1)[0]
+
+
+def test_local_holds_survive_a_full_refresh():
+    service = FakeCalendarService()
+    finder = SlotFinder(service)
+    finder.refresh()
+    start, end = _first_free(finder)
+
+    finder.mark_busy(start, end)
+    finder.refresh(force=True)
+
+    # Calendar does not show the booking yet, so the hold still keeps the slot out
+    assert _first_free(finder)[0] >= end
+    assert len(finder.holds) == 1
+
+
+def test_hold_is_dropped_once_calendar_shows_the_booking():
+    service = FakeCalendarService()
+    finder = SlotFinder(service)
+    finder.refresh()
+    start, end = _first_free(finder)
+    finder.mark_busy(start, end)
+
+    service.events().insert(calendarId="primary", body={
+        "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()},
+    }).execute()
+    finder.refresh(force=True)
+
+    assert finder.holds == []
+    assert _first_free(finder)[0] >= end
+
+
+def test_released_and_expired_holds_free_the_slot():
+    finder = SlotFinder(FakeCalendarService(), hold_seconds=60)
+    finder.refresh()
+    start, end = _first_free(finder)
+
+    finder.mark_busy(start, end)
+    finder.release(start, end)
+    assert _first_free(finder) == (start, end)
+
+    finder.mark_busy(start, end)
+    finder.holds = [(hold_start, hold_end, time.monotonic() - 1) for hold_start, hold_end, _ in finder.holds]
+    assert _first_free(finder) == (start, end)
@@ -0,0 +1,87 @@
+# test_speculation.py
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import utils
+from crm_store import CRMStore
+from fakes import FakeLLM
+from response_cache import ResponseCache
+from speculation import SpeculativeTurn
+
+SCENARIO = "candidate_interviewing"
+
+
+@pytest.fixture
+def services(monkeypatch, tmp_path):
+    store = CRMStore(str(tmp_path / "crm.sqlite3"))
+    monkeypatch.setattr(utils, "llm", FakeLLM(replies=["Achha, aur batayiye."], first_token_latency=0.05))
+    monkeypatch.setattr(utils, "fallback_llm", None)
+    monkeypatch.setattr(utils, "response_cache", ResponseCache())
+    monkeypatch.setattr(utils, "crm_store", store)
+    yield utils
+    store.close()
+
+
+def test_diverged_speculation_leaves_the_cache_untouched(services):
+    turn = SpeculativeTurn(SCENARIO)
+    turn.on_interim("mera last project", stability=None)
+    speculation = turn.current
+    speculation.done.wait(2)
+
+    reply = turn.respond("candidate@example.com", "mera last project NLP par tha")
+
+    assert reply == "Achha, aur batayiye."
+    # Only the reply for the final transcript is cached, not the partial one
+    assert speculation.deferred_cache
+    assert len(services.response_cache.entries) == 1
+
+
+def test_committed_speculation_is_cached(services):
+    turn = SpeculativeTurn(SCENARIO)
+    turn.on_interim("maine B.Tech kiya hai", stability=None)
+    turn.current.done.wait(2)
+    assert len(services.response_cache.entries) == 0
+
+    reply = turn.respond("candidate@example.com", "maine B.Tech kiya hai")
+
+    assert reply == "Achha, aur batayiye."
+    assert services.llm.calls == 1
+    assert len(services.response_cache.entries) == 1
+
+
+def test_cancelled_turn_returns_none(services):
+    cancel = threading.Event()
+    cancel.set()
+    turn = SpeculativeTurn(SCENARIO)
+    assert turn.respond("candidate@example.com", "salary expectation 8 lakh hai", cancel=cancel) is None
+
+
+class FlakyLLM(FakeLLM):
+    """The first stream breaks after two words; later ones work"""
+    def stream(self, messages):
+        if self.calls:
+            yield from super().stream(messages)
+            return
+        self.calls += 1
+        yield SimpleNamespace(content="Sorry, ")
+        yield SimpleNamespace(content="network ")
+        time.sleep(0.1)
+        raise ConnectionError("stream reset")
+
+
+def test_failed_speculation_is_discarded_not_replayed(services, monkeypatch):
+    monkeypatch.setattr(utils, "llm", FlakyLLM(replies=["Achha, aur batayiye."]))
+    turn = SpeculativeTurn(SCENARIO)
+    turn.on_interim("maine MBA kiya hai", stability=None)
+    spoken = []
+
+    # Committed while the speculative stream is still running; it then fails
+    reply = turn.respond("candidate@example.com", "maine MBA kiya hai", on_token=spoken.append)
+
+    assert reply == "Achha, aur batayiye."
+    # Only the fallback reply is spoken, once
+    assert "".join(spoken) == "Achha, aur batayiye."
+    assert services.llm.calls == 2
@@ -0,0 +1,89 @@
+# test_startup.py
+import sys
+import threading
+import time
+
+import pytest
+
+import startup
+from startup import LazyModule, StartupReport, WarmUp
+
+
+@pytest.fixture
+def fresh_report(monkeypatch):
+    report = StartupReport()
+    monkeypatch.setattr(startup, "report", report)
+    return report
+
+
+def test_lazy_module_imports_on_first_attribute_access(tmp_path, monkeypatch, fresh_report):
+    (tmp_path / "heavy_sdk_for_test.py").write_text("LOADED = True\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "heavy_sdk_for_test", raising=False)
+
+    module = LazyModule("heavy_sdk_for_test")
+    assert "heavy_sdk_for_test" not in sys.modules
+    assert "not loaded" in repr(module)
+
+    assert module.LOADED is True
+    assert "heavy_sdk_for_test" in sys.modules
+    assert "heavy_sdk_for_test" in fresh_report.imports
+
+
+def test_missing_module_fails_only_when_used(fresh_report):
+    module = LazyModule("no_such_sdk_installed")
+    with pytest.raises(ImportError):
+        module.Client
+
+
+def test_independent_steps_run_in_parallel(fresh_report):
+    warmup = WarmUp()
+    for name in ("speech", "tts", "llm"):
+        warmup.add(name, lambda: time.sleep(0.2))
+
+    started = time.perf_counter()
+    assert warmup.wait(timeout=2)
+    assert time.perf_counter() - started < 0.5
+    assert set(fresh_report.steps) == {"speech", "tts", "llm"}
+    assert "services_ready" in fresh_report.milestones
+
+
+def test_dependent_step_waits_for_its_dependency(fresh_report):
+    order = []
+    warmup = WarmUp()
+    warmup.add("client", lambda: (time.sleep(0.1), order.append("client")))
+    warmup.add("prerender", lambda: order.append("prerender"), after=("client",), required=False)
+
+    assert warmup.wait(timeout=2)
+    assert warmup.wait_optional("prerender", timeout=2)
+    assert order == ["client", "prerender"]
+
+
+def test_failures_are_reported_and_only_required_steps_fail_wait(fresh_report):
+    def broken():
+        raise RuntimeError("no credentials")
+
+    warmup = WarmUp()
+    warmup.add("calendar", broken, required=False)
+    warmup.add("slots", lambda: None, after=("calendar",), required=False)
+    assert warmup.wait(timeout=2)
+    assert not warmup.wait_optional("slots", timeout=2)
+    assert fresh_report.errors == {"calendar": "no credentials"}
+
+    warmup = WarmUp()
+    warmup.add("speech", broken)
+    assert not warmup.wait(timeout=2)
+
+
+def test_optional_steps_do_not_hold_up_wait(fresh_report):
+    release = threading.Event()
+    warmup = WarmUp()
+    warmup.add("speech", lambda: None)
+    warmup.add("prerender", lambda: release.wait(2), required=False)
+
+    started = time.perf_counter()
+    assert warmup.wait(timeout=2)
+    assert time.perf_counter() - started < 0.5
+    assert not warmup.done()
+    release.set()
+    assert warmup.wait_optional("prerender", timeout=2)
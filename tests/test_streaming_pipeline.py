@@ -0,0 +1,81 @@
+# test_streaming_pipeline.py
+import time
+
+import pytest
+
+import utils
+from audio_player import Clip
+from streaming_pipeline import INTERRUPTED_NOTE, SentenceChunker, StreamingSpeaker
+
+
+def _stream(chunker, text):
+    chunks = []
+    for word in text.split(" "):
+        chunks += chunker.feed(word + " ")
+    return chunks + chunker.flush()
+
+
+def test_chunker_cuts_at_sentence_ends_and_dandas():
+    chunks = _stream(SentenceChunker(), "Namaste ji. Main Rahul bol raha hoon। Kya aap free hain?")
+    assert chunks == ["Namaste ji.", "Main Rahul bol raha hoon।", "Kya aap free hain?"]
+
+
+def test_chunker_does_not_cut_after_an_abbreviation():
+    chunks = _stream(SentenceChunker(), "Price Rs. 5000 hai. Theek?")
+    assert chunks == ["Price Rs. 5000 hai.", "Theek?"]
+
+
+def test_first_clause_is_cut_early_and_later_ones_wait():
+    chunker = SentenceChunker(min_clause_chars=40, first_clause_chars=20)
+    chunks = _stream(chunker, "Ji bilkul sahi baat hai, aapka ERP, kal dikhate hain")
+    assert chunks == ["Ji bilkul sahi baat hai,", "aapka ERP, kal dikhate hain"]
+
+
+def test_long_text_without_punctuation_breaks_on_a_space():
+    chunks = SentenceChunker(max_chunk_chars=30).feed("ek do teen char paanch chhe saat aath nau das ")
+    assert chunks and all(len(chunk) <= 30 for chunk in chunks)
+    assert not chunks[0].endswith(" ")
+
+
+@pytest.fixture
+def audio(monkeypatch):
+    """Synthesis returns the chunk's text; playback records it and reports it fully heard"""
+    played = []
+    monkeypatch.setattr(utils, "synthesize_audio", lambda text, language_code="hi-IN": text.encode("utf-8"))
+
+    def play(audio_bytes):
+        played.append(audio_bytes.decode("utf-8"))
+        return Clip(bytes(4800), 24000)
+
+    monkeypatch.setattr(utils, "play_audio", play)
+    return played
+
+
+def test_speaker_plays_chunks_in_reply_order(audio, monkeypatch):
+    # Later chunks finish synthesizing first; playback order must not change
+    delays = {"Pehla sentence.": 0.1}
+    monkeypatch.setattr(utils, "synthesize_audio",
+                        lambda text, language_code="hi-IN": time.sleep(delays.get(text, 0)) or text.encode("utf-8"))
+    speaker = StreamingSpeaker(synthesis_workers=3)
+    for token in ["Pehla ", "sentence. ", "Doosra ", "sentence. ", "Teesra"]:
+        speaker.feed(token)
+
+    assert speaker.finish() is not None
+    assert audio == ["Pehla sentence.", "Doosra sentence.", "Teesra"]
+    assert speaker.heard_reply() == "Pehla sentence. Doosra sentence. Teesra"
+
+
+def test_cancelled_speaker_drops_what_was_not_played(audio):
+    speaker = StreamingSpeaker()
+    speaker.cancel()
+    speaker.speak("Yeh kabhi nahi bola jayega.")
+    speaker.finish()
+    assert audio == []
+
+
+def test_heard_reply_is_cut_where_playback_stopped():
+    speaker = StreamingSpeaker()
+    speaker.finish()
+    speaker.interrupted = True
+    speaker.played = [("Namaste ji.", 1.0, 1.0), ("Hamara ERP bahut fast hai", 0.5, 1.0)]
+    assert speaker.heard_reply() == "Namaste ji. Hamara ERP" + INTERRUPTED_NOTE
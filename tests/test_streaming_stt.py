@@ -0,0 +1,71 @@
+# test_streaming_stt.py
+import pytest
+
+import streaming_stt
+from fakes import FakeSpeechClient, fake_speech_types
+from streaming_stt import StreamingRecognizer
+
+
+@pytest.fixture(autouse=True)
+def speech_types(monkeypatch):
+    monkeypatch.setattr(streaming_stt, "speech", fake_speech_types)
+
+
+def _frames(count):
+    return (bytes(640) for _ in range(count))
+
+
+def test_interim_then_final_transcripts():
+    client = FakeSpeechClient(transcript="kal teen baje theek hai", frames_per_word=2)
+    seen = []
+    recognizer = StreamingRecognizer(client=client, on_transcript=seen.append)
+
+    updates = list(recognizer.recognize(_frames(20)))
+
+    interim = [update.text for update in updates if not update.is_final]
+    assert interim == ["kal", "kal teen", "kal teen baje", "kal teen baje theek", "kal teen baje theek hai"]
+    assert updates[-1].is_final and updates[-1].text == "kal teen baje theek hai"
+    assert seen == updates
+    assert recognizer.finalization_latency is not None
+
+
+def test_server_endpointing_stops_sending_audio():
+    client = FakeSpeechClient(transcript="haan ji", frames_per_word=2, end_after_frames=6)
+    recognizer = StreamingRecognizer(client=client)
+
+    assert recognizer.recognize_final(_frames(1000)) == "haan ji"
+    assert client.frames_received == 6
+
+
+def test_stream_failure_counts_against_the_stt_guard():
+    class BrokenClient:
+        def streaming_recognize(self, config, requests):
+            raise ConnectionError("stream reset")
+            yield
+
+    recognizer = StreamingRecognizer(client=BrokenClient())
+    with pytest.raises(ConnectionError):
+        recognizer.recognize_final(_frames(5))
+    assert streaming_stt.rate_limiter.get_guard("stt").breaker.failures == 1
+
+
+def test_stream_closed_before_a_final_is_not_a_success():
+    guard = streaming_stt.rate_limiter.get_guard("stt")
+    guard.breaker.failures = 2
+    recognizer = StreamingRecognizer(client=FakeSpeechClient(transcript="haan ji", frames_per_word=1))
+
+    updates = recognizer.recognize(_frames(10))
+    assert not next(updates).is_final
+    updates.close()
+
+    assert guard.breaker.failures == 2
+    assert not guard.breaker._probing
+
+
+def test_final_result_records_a_success():
+    guard = streaming_stt.rate_limiter.get_guard("stt")
+    guard.breaker.failures = 2
+    recognizer = StreamingRecognizer(client=FakeSpeechClient(transcript="haan ji", frames_per_word=1))
+
+    assert recognizer.recognize_final(_frames(4)) == "haan ji"
+    assert guard.breaker.failures == 0
@@ -0,0 +1,74 @@
+# test_tts_cache.py
+import os
+
+import utils
+from fakes import FakeTTSClient, fake_tts_types
+from tts_cache import TTSCache
+
+
+def _key(text, gender="MALE"):
+    return TTSCache.make_key(text, "hi-IN", gender, "LINEAR16_24000")
+
+
+def test_key_covers_every_synthesis_setting():
+    assert _key("Namaste") == _key("Namaste")
+    assert _key("Namaste") != _key("Namaste", gender="FEMALE")
+    assert _key("Namaste") != TTSCache.make_key("Namaste", "en-IN", "MALE", "LINEAR16_24000")
+
+
+def test_audio_survives_a_restart_from_disk(tmp_path):
+    cache = TTSCache(str(tmp_path))
+    cache.put(_key("Namaste"), b"audio-1")
+    assert cache.get(_key("Namaste")) == b"audio-1"
+
+    reopened = TTSCache(str(tmp_path))
+    assert reopened.memory == {}
+    assert reopened.get(_key("Namaste")) == b"audio-1"
+    assert reopened.get(_key("Alvida")) is None
+    assert reopened.stats()["hits"] == 1 and reopened.stats()["misses"] == 1
+
+
+def test_disk_tier_evicts_the_least_recently_used(tmp_path):
+    cache = TTSCache(str(tmp_path), max_disk_bytes=20, max_memory_bytes=0)
+    cache.put(_key("a"), bytes(8))
+    cache.put(_key("b"), bytes(8))
+    cache.get(_key("a"))  # "b" is now the oldest
+    cache.put(_key("c"), bytes(8))
+
+    assert cache.get(_key("b")) is None
+    assert cache.get(_key("a")) == bytes(8)
+    assert sorted(os.listdir(tmp_path)) == sorted([_key("a"), _key("c")])
+    assert cache.stats()["disk_bytes"] == 16
+
+
+def test_memory_tier_is_bounded(tmp_path):
+    cache = TTSCache(str(tmp_path), max_memory_bytes=10)
+    cache.put(_key("a"), bytes(6))
+    cache.put(_key("b"), bytes(6))
+    assert list(cache.memory) == [_key("b")]
+    # Too large for memory, still kept on disk
+    cache.put(_key("big"), bytes(50))
+    assert _key("big") not in cache.memory
+    assert cache.get(_key("big")) == bytes(50)
+
+
+def test_stale_index_entry_and_leftover_temp_files(tmp_path):
+    (tmp_path / "half-written.123.tmp").write_bytes(b"x")
+    cache = TTSCache(str(tmp_path), max_memory_bytes=0)
+    assert not (tmp_path / "half-written.123.tmp").exists()
+
+    cache.put(_key("a"), b"audio")
+    os.remove(tmp_path / _key("a"))
+    assert cache.get(_key("a")) is None
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_synthesize_audio_calls_tts_once_per_phrase(tmp_path, monkeypatch):
+    client = FakeTTSClient()
+    monkeypatch.setattr(utils, "texttospeech", fake_tts_types)
+    monkeypatch.setattr(utils, "tts_client", client)
+    monkeypatch.setattr(utils, "tts_cache", TTSCache(str(tmp_path)))
+
+    first = utils.synthesize_audio("Kal milte hain")
+    assert utils.synthesize_audio("Kal milte hain") == first
+    assert client.calls == 1
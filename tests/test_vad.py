@@ -0,0 +1,56 @@
+# test_vad.py
+import numpy as np
+
+from vad import VADEvent, VoiceActivityDetector, settings_for_scenario
+
+RATE = 16000
+
+
+def _tone(seconds, amplitude=3000, frequency=220):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16).tobytes()
+
+
+def _silence(seconds, amplitude=20, seed=0):
+    noise = np.random.default_rng(seed).normal(0, amplitude, int(RATE * seconds))
+    return noise.astype(np.int16).tobytes()
+
+
+def test_speech_start_and_end_of_turn():
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=300)
+    events = vad.process(_silence(0.5) + _tone(1.0) + _silence(0.6))
+
+    assert [event.kind for event in events] == [VADEvent.SPEECH_START, VADEvent.END_OF_TURN]
+    start, end = events
+    assert abs(start.stream_time - 0.5) < 0.05
+    assert abs(end.stream_time - 1.5) < 0.05
+
+
+def test_short_pause_does_not_end_the_turn():
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=700)
+    events = vad.process(_tone(0.5) + _silence(0.3) + _tone(0.5))
+    assert [event.kind for event in events] == [VADEvent.SPEECH_START]
+
+
+def test_frames_split_across_chunks():
+    audio = _silence(0.2) + _tone(0.5) + _silence(0.5)
+    vad = VoiceActivityDetector(sample_rate=RATE, hangover_ms=300)
+    events = []
+    # Odd-sized chunks leave partial frames between calls
+    for offset in range(0, len(audio), 1234):
+        events += vad.process(audio[offset:offset + 1234])
+    assert [event.kind for event in events] == [VADEvent.SPEECH_START, VADEvent.END_OF_TURN]
+
+
+def test_noise_floor_adapts_to_background():
+    vad = VoiceActivityDetector(sample_rate=RATE, min_energy=10.0)
+    before = vad.noise_floor
+    vad.process(_silence(1.0, amplitude=5))
+    assert vad.noise_floor != before
+    assert vad.process(_silence(0.5, amplitude=5)) == []
+
+
+def test_interviews_wait_longer_before_ending_a_turn():
+    assert settings_for_scenario("candidate_interviewing")["hangover_ms"] > \
+        settings_for_scenario("demo_scheduling")["hangover_ms"]
+    assert settings_for_scenario("demo_scheduling", hangover_ms=500) == {"hangover_ms": 500}
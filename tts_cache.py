@@ -0,0 +1,148 @@
+# tts_cache.py
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class TTSCache:
+    """
+    Content-addressed cache for synthesized speech.
+
+    Audio is keyed on (text, language_code, voice gender, encoding) and kept in
+    two tiers: a small in-memory LRU for hot phrases and an on-disk directory
+    bounded by total size, evicting the least recently used files first.
+    """
+    def __init__(self, cache_dir="tts_cache", max_disk_bytes=200 * 1024 * 1024,
+                 max_memory_bytes=16 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.disk = OrderedDict()
+        self.disk_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_disk_index()
+
+    @staticmethod
+    def make_key(text, language_code, voice_gender, encoding):
+        """Build the content address for a synthesis request"""
+        raw = "\x1f".join([text, language_code, str(voice_gender), str(encoding)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return cached audio bytes, or None on a miss"""
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                if key in self.disk:
+                    self.disk.move_to_end(key)
+                self.hits += 1
+                return audio
+
+            if key not in self.disk:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, "rb") as cached_file:
+                    audio = cached_file.read()
+                # Touch the file so recency survives a restart
+                os.utime(path, None)
+            except OSError:
+                self.disk_bytes -= self.disk.pop(key)
+                self.misses += 1
+                return None
+
+            self.disk.move_to_end(key)
+            self._remember(key, audio)
+            self.hits += 1
+            return audio
+
+    def put(self, key, audio):
+        """Store audio bytes in both tiers"""
+        with self.lock:
+            self._remember(key, audio)
+            if key in self.disk:
+                self.disk.move_to_end(key)
+                return
+
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as cached_file:
+                    cached_file.write(audio)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing TTS cache entry: {e}")
+                return
+
+            self.disk[key] = len(audio)
+            self.disk_bytes += len(audio)
+            self._evict_disk()
+
+    def stats(self):
+        """Return hit/miss counters and tier sizes"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_bytes,
+                "disk_entries": len(self.disk),
+                "disk_bytes": self.disk_bytes,
+            }
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _remember(self, key, audio):
+        if len(audio) > self.max_memory_bytes:
+            return
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            key, size = self.disk.popitem(last=False)
+            self.disk_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _load_disk_index(self):
+        # Rebuild LRU order from file modification times
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = self._path(name)
+            if name.endswith(".tmp"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self.disk[name] = size
+            self.disk_bytes += size
+        self._evict_disk()
@@ -1,22 +1,58 @@
-import os
 import time
-import speech_recognition as sr
+import asyncio
 from datetime import datetime, timedelta
-from google.cloud import speech, texttospeech
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
-import pygame
-from pygame import mixer
-import platform
-import subprocess
+import threading
 
-from system_prompts import SYSTEM_PROMPTS
+import metrics
+import rate_limiter
+import hedging
+from startup import lazy_module
+from crm_store import CRMStore
+from slot_finder import format_slots
+from booking_queue import BookingQueue
+from intent_classifier import classify, resolve_start, BOOKING_INTENTS
+from system_prompts import SYSTEM_PROMPTS, INITIAL_GREETINGS, DEFAULT_GREETING, FIXED_RESPONSES, INTENT_REPLIES
+
+# Heavy SDKs are imported on first use (or by the startup warm-up) to keep launch fast
+sr = lazy_module("speech_recognition")
+speech = lazy_module("google.cloud.speech")
+texttospeech = lazy_module("google.cloud.texttospeech")
+pygame = lazy_module("pygame")
+audio_capture = lazy_module("audio_capture")
+audio_player_module = lazy_module("audio_player")
 
 # Global variables to be initialized in main.py
 speech_client = None
 tts_client = None
 calendar_service = None
 llm = None
+# Faster model raced against llm when its first token is late (see hedging.py)
+fallback_llm = None
+hedge_policy = None
+# Start replies from stable interim transcripts (see speculation.py)
+speculation_enabled = False
+# Send the turn's audio to StreamingRecognize while the callee talks (see streaming_stt.py)
+streaming_stt_enabled = False
+tts_cache = None
+response_cache = None
+crm_store = None
+slot_finder = None
+booking_queue = None
+connection_manager = None
+audio_player = None
+_crm_store_lock = threading.Lock()
+_booking_queue_lock = threading.Lock()
+_audio_player_lock = threading.Lock()
+
+# Async clients, created by call_session.CallEngine inside its event loop
+async_speech_client = None
+async_tts_client = None
+
+# Speech is synthesized as raw LINEAR16 so it can be played from memory without an MP3 decode
+TTS_SAMPLE_RATE = 24000
+
+# Utterances that end the conversation
+EXIT_COMMANDS = ["exit", "quit", "stop", "बंद", "बंद करो"]
 
 def recognize_speech_from_mic(language_code="hi-IN"):
     
@@ -30,7 +66,8 @@ def recognize_speech_from_mic(language_code="hi-IN"):
         audio = recognizer.listen(source)
 
     try:
-        text = recognizer.recognize_google(audio, language=language_code)
+        with metrics.span("stt"):
+            text = rate_limiter.get_guard("stt").call(recognizer.recognize_google, audio, language=language_code)
         print(f"✅ Recognized Speech: {text}")
         return text
 
@@ -56,9 +93,10 @@ def recognize_speech_with_manual_control(language_code="hi-IN"):
     font = pygame.font.Font(None, 36)
     
     recognizer = sr.Recognizer()
-    microphone = sr.Microphone()
+    capture = audio_capture.get_shared_capture()
     
     recording = False
+    recording_start = None
     audio = None
     
     print("Press SPACE to start recording, press SPACE again to stop.")
@@ -81,9 +119,8 @@ def recognize_speech_with_manual_control(language_code="hi-IN"):
                         screen.blit(text, (75, 40))
                         pygame.display.flip()
                         
-                        with microphone as source:
-                            recognizer.adjust_for_ambient_noise(source)
-                            audio = recognizer.listen(source, phrase_time_limit=None)
+                        # The capture stream is already running; just remember where the turn starts
+                        recording_start = capture.cursor
                     else:
                         # Stop recording
                         print("⏹️ Recording stopped. Processing...")
@@ -94,6 +131,22 @@ def recognize_speech_with_manual_control(language_code="hi-IN"):
                         screen.blit(text, (75, 40))
                         pygame.display.flip()
                         
+                        recording_end = capture.cursor
+                        # A turn longer than the capture ring keeps only what is still held (less a second of margin)
+                        earliest = recording_end - capture.capacity + capture.sample_rate
+                        if recording_start < earliest:
+                            print(f"⚠️ Recording longer than the {capture.capacity // capture.sample_rate} s "
+                                  "capture buffer; only its end is recognized.")
+                            recording_start = earliest
+                        if recording_end > recording_start:
+                            try:
+                                audio = sr.AudioData(
+                                    capture.slice_bytes(recording_start, recording_end),
+                                    capture.sample_rate, capture.sample_width
+                                )
+                            except ValueError as e:
+                                print(f"❌ Could not read the recording: {e}")
+                        
                         # Process audio and exit the loop
                         running = False
         
@@ -108,7 +161,8 @@ def recognize_speech_with_manual_control(language_code="hi-IN"):
     
     if audio:
         try:
-            text = recognizer.recognize_google(audio, language=language_code)
+            with metrics.span("stt"):
+                text = rate_limiter.get_guard("stt").call(recognizer.recognize_google, audio, language=language_code)
             print(f"✅ Recognized Speech: {text}")
             return text
         except sr.UnknownValueError:
@@ -139,13 +193,15 @@ def recognize_speech_from_file(audio_path, language_code="hi-IN"):
             language_code=language_code
         )
         
-        response = speech_client.recognize(config=config, audio=audio)
+        with metrics.span("stt"):
+            response = rate_limiter.get_guard("stt").call(speech_client.recognize, config=config, audio=audio)
         return response.results[0].alternatives[0].transcript if response.results else ""
     except Exception as e:
         print(f"Error recognizing speech from file: {e}")
         return ""
 
-def get_ai_response(text, scenario="demo_scheduling", max_retries=3):
+def get_ai_response(text, scenario="demo_scheduling", max_retries=3, on_token=None, memory=None,
+                    cancel=None, remember=True, deferred_cache=None):
     """
     Gets AI response from OpenAI model with retry logic
     
@@ -153,51 +209,376 @@ def get_ai_response(text, scenario="demo_scheduling", max_retries=3):
         text (str): User input text
         scenario (str): One of 'demo_scheduling', 'candidate_interviewing', or 'payment_followup'
         max_retries (int): Maximum number of retry attempts
+        on_token (callable): Optional callback receiving the reply as it streams in.
+            When given, the model output is consumed with llm.stream so the caller
+            can start speaking before the full reply has been generated.
+        memory (ConversationMemory): Optional per-call history; earlier turns are sent
+            with the request and this turn is recorded once answered.
+        cancel (threading.Event): Optional; once set, streaming stops at the next token
+            and None is returned without caching or recording anything.
+        remember (bool): Record the turn in memory and the response cache. Speculative
+            runs pass False and record it themselves if they are committed; for them
+            a stream that fails part-way raises instead of returning the partial reply.
+        deferred_cache (list): With remember=False, receives the (cache key, reply)
+            a committed run should store with store_cached_reply.
+    
+    Short turns the local intent classifier is confident about are answered
+    from a template without calling the model, and replies to utterances already
+    answered in the same conversation context come from the response cache.
+    Model calls go through the shared "llm" guard (rate limit, jittered backoff,
+    circuit breaker); while the breaker is open a stock line is returned at once.
+    With a fallback model configured, a late first token is hedged (hedging.py).
     """
     global llm
     if not text:
-        return "I didn't catch that. Please try again."
+        return _deliver(FIXED_RESPONSES["no_input"], on_token)
+    
+    record = memory if remember else None
+    reply = fast_path_reply(text, scenario)
+    if reply is not None:
+        return _remember(record, text, _deliver(reply, on_token))
     
+    messages = _build_messages(text, scenario, memory)
+    cache_key, cached_reply = _cached_reply(text, scenario, messages)
+    if cached_reply is not None:
+        return _remember(record, text, _deliver(cached_reply, on_token))
+    
+    guard = rate_limiter.get_guard("llm")
+    for attempt in range(max_retries):
+        if cancel is not None and cancel.is_set():
+            return None
+        streamed = []
+        try:
+            guard.admit()
+        except (rate_limiter.CircuitOpenError, rate_limiter.RateLimited) as e:
+            print(f"LLM request not sent: {e}")
+            return _deliver(FIXED_RESPONSES["service_unavailable"], on_token)
+        try:
+            with metrics.span("llm", attempt=attempt + 1, mode="invoke" if on_token is None else "stream") as span:
+                if on_token is None and not _hedging_enabled():
+                    reply = llm.invoke(messages).content
+                else:
+                    started = time.perf_counter()
+                    tokens = _llm_tokens(messages, scenario)
+                    for token in tokens:
+                        if cancel is not None and cancel.is_set():
+                            # Closing the stream ends the HTTP request (and any hedge)
+                            tokens.close()
+                            span["outcome"] = "cancelled"
+                            guard.breaker.release()
+                            return None
+                        if not streamed:
+                            metrics.observe("llm_first_token", time.perf_counter() - started)
+                        streamed.append(token)
+                        if on_token is not None:
+                            on_token(token)
+                    reply = "".join(streamed)
+                span["outcome"] = "ok"
+            guard.record_success()
+            if cancel is not None and cancel.is_set():
+                return None
+            if not remember:
+                if deferred_cache is not None and cache_key is not None:
+                    deferred_cache.append((cache_key, reply))
+                return reply
+            return _remember(record, text, _cache_reply(cache_key, reply))
+        except Exception as e:
+            print(f"Error getting AI response (attempt {attempt+1}/{max_retries}): {e}")
+            retryable = guard.record_failure(e)
+            if streamed and on_token is not None:
+                if not remember:
+                    raise  # Speculative: nothing was spoken, so the turn is answered afresh
+                # Part of the reply is already being spoken, so retrying would repeat it
+                return _remember(record, text, "".join(streamed))
+            if retryable and attempt < max_retries - 1:
+                delay = guard.backoff(attempt)
+                print(f"Retrying in {delay:.1f} seconds...")
+                with metrics.span("llm_backoff"):
+                    if cancel is not None:
+                        # A turn cancelled during the backoff ends now, not after it
+                        if cancel.wait(delay):
+                            return None
+                    else:
+                        time.sleep(delay)
+            else:
+                return _deliver(FIXED_RESPONSES["service_error"], on_token)
+
+def fast_path_reply(text, scenario):
+    """
+    Returns a templated reply when the local intent classifier is confident
+    about a turn it can answer on its own, else None (the turn goes to the model)
+    """
+    with metrics.span("intent") as span:
+        reply = _fast_path_reply(text, scenario)
+        span["outcome"] = "miss" if reply is None else "hit"
+    return reply
+
+def _fast_path_reply(text, scenario):
+    intent = classify(text)
+    if not intent.confident:
+        return None
+    template = INTENT_REPLIES.get(scenario, {}).get(intent.name)
+    if template is None:
+        return None
+    if "{when}" in template:
+        start = _intent_start(intent)
+        if start is None:
+            return None
+        return template.format(when=format_slots([(start, start)], now=datetime.now()))
+    return template
+
+def _intent_start(intent):
+    # Demo start for a booking intent: the time the caller named if it is free,
+    # otherwise (no time named) the first free slot. None leaves the turn to the model.
+    if "hour" not in intent.slots:
+        return _demo_start() if intent.name == "schedule_request" else None
+    start = resolve_start(intent)
+    if start <= datetime.now():
+        return None
+    if slot_finder is not None:
+        requested = slot_finder.tz.localize(start)
+        free_slots = slot_finder.next_free_slots(1, after=requested)
+        if not free_slots or free_slots[0][0] != requested:
+            return None
+    return start
+
+def _build_messages(text, scenario, memory=None):
+    # System prompt, then any remembered conversation, then the new utterance
     system_prompt = SYSTEM_PROMPTS.get(scenario, SYSTEM_PROMPTS["demo_scheduling"])
+    messages = [{"role": "system", "content": system_prompt}]
+    if scenario == "demo_scheduling" and slot_finder is not None:
+        # Served from the local availability cache, no Calendar round trip
+        free_slots = format_slots(slot_finder.next_free_slots(3))
+        if free_slots:
+            messages.append({"role": "system", "content": f"Demo ke liye available slots: {free_slots}. Inhi mein se time suggest karein."})
+    if memory is not None:
+        messages.extend(memory.messages())
+    messages.append({"role": "user", "content": text})
+    return messages
+
+def _cached_reply(text, scenario, messages):
+    # Looks the turn up in the response cache; the system prompt is implied by the scenario
+    if response_cache is None:
+        return None, None
+    with metrics.span("response_cache") as span:
+        cache_key = response_cache.make_key(scenario, text, messages[1:-1])
+        cached_reply = response_cache.get(cache_key)
+        span["outcome"] = "miss" if cached_reply is None else "hit"
+    return cache_key, cached_reply
+
+def _cache_reply(cache_key, ai_response):
+    # Stores a complete model reply for later identical turns
+    if cache_key is not None and ai_response:
+        response_cache.put(cache_key, ai_response)
+    return ai_response
+
+def store_cached_reply(cache_key, ai_response):
+    """
+    Stores a reply whose cache write was deferred (a committed speculative run)
+    """
+    if response_cache is not None:
+        _cache_reply(cache_key, ai_response)
+
+def _remember(memory, text, ai_response):
+    # Records the answered turn in the conversation memory
+    if memory is not None:
+        memory.add_turn(text, ai_response)
+    return ai_response
+
+def summarize_conversation(previous_summary, messages):
+    """
+    Folds older conversation turns into a short running summary.
+    Used by ConversationMemory off the hot path.
+    """
+    global llm
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = [
+        {"role": "system", "content": (
+            "Aap ek sales call ka running summary maintain karte hain. Purane summary mein naye turns "
+            "jodkar 80 words se kam ka Hinglish summary likhiye. Customer ki details, concerns, "
+            "commitments aur agreed times zaroor rakhiye."
+        )},
+        {"role": "user", "content": f"Purana summary: {previous_summary or '(none)'}\n\nNaye turns:\n{transcript}"}
+    ]
+    with metrics.span("summary"):
+        return llm.invoke(prompt).content.strip()
+
+def _hedging_enabled():
+    return fallback_llm is not None and hedge_policy is not None
+
+def _llm_tokens(messages, scenario):
+    # Reply text as it streams, raced against the fallback model when hedging is set up
+    if _hedging_enabled():
+        return hedging.hedged_stream(llm, fallback_llm, messages, hedge_policy, scenario)
+    return (chunk.content for chunk in llm.stream(messages) if chunk.content)
+
+async def _allm_tokens(messages, scenario):
+    if _hedging_enabled():
+        async for token in hedging.ahedged_stream(llm, fallback_llm, messages, hedge_policy, scenario):
+            yield token
+    else:
+        async for chunk in llm.astream(messages):
+            if chunk.content:
+                yield chunk.content
+
+def _deliver(message, on_token=None):
+    # Returns a fixed reply, passing it through the token callback when streaming
+    if on_token is not None:
+        on_token(message)
+    return message
+
+async def aget_ai_response(text, scenario="demo_scheduling", max_retries=3, on_token=None, memory=None):
+    """
+    Async variant of get_ai_response for the call-session engine.
+    Backoff uses asyncio.sleep so other sessions keep running while this one waits.
+    """
+    global llm
+    if not text:
+        return _deliver(FIXED_RESPONSES["no_input"], on_token)
     
+    reply = fast_path_reply(text, scenario)
+    if reply is not None:
+        return _remember(memory, text, _deliver(reply, on_token))
+    
+    messages = _build_messages(text, scenario, memory)
+    cache_key, cached_reply = _cached_reply(text, scenario, messages)
+    if cached_reply is not None:
+        return _remember(memory, text, _deliver(cached_reply, on_token))
+    
+    guard = rate_limiter.get_guard("llm")
     for attempt in range(max_retries):
+        streamed = []
         try:
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ]
-            
-            response = llm.invoke(messages)
-            return response.content
+            await guard.aadmit()
+        except (rate_limiter.CircuitOpenError, rate_limiter.RateLimited) as e:
+            print(f"LLM request not sent: {e}")
+            return _deliver(FIXED_RESPONSES["service_unavailable"], on_token)
+        try:
+            with metrics.span("llm", attempt=attempt + 1, mode="invoke" if on_token is None else "stream") as span:
+                if on_token is None and not _hedging_enabled():
+                    reply = (await llm.ainvoke(messages)).content
+                else:
+                    started = time.perf_counter()
+                    async for token in _allm_tokens(messages, scenario):
+                        if not streamed:
+                            metrics.observe("llm_first_token", time.perf_counter() - started)
+                        streamed.append(token)
+                        if on_token is not None:
+                            on_token(token)
+                    reply = "".join(streamed)
+                span["outcome"] = "ok"
+            guard.record_success()
+            return _remember(memory, text, _cache_reply(cache_key, reply))
         except Exception as e:
             print(f"Error getting AI response (attempt {attempt+1}/{max_retries}): {e}")
-            if attempt < max_retries - 1:
-                print(f"Retrying in {2**attempt} seconds...")
-                time.sleep(2**attempt)
+            retryable = guard.record_failure(e)
+            if streamed and on_token is not None:
+                return _remember(memory, text, "".join(streamed))
+            if retryable and attempt < max_retries - 1:
+                with metrics.span("llm_backoff"):
+                    await asyncio.sleep(guard.backoff(attempt))
             else:
-                return "I'm having trouble processing your request right now. Please try again later."
+                return _deliver(FIXED_RESPONSES["service_error"], on_token)
+        except BaseException:
+            # Session cancelled mid-request
+            guard.breaker.release()
+            raise
 
-def synthesize_speech(text, output_path="response.mp3", language_code="hi-IN"):
+async def arecognize_speech(content, language_code="hi-IN"):
     """
-    Converts text to speech and saves to a file
+    Recognizes speech from WAV/LINEAR16 bytes using the async Speech client
     """
-    global tts_client
+    global async_speech_client
     try:
-        synthesis_input = texttospeech.SynthesisInput(text=text)
-        voice = texttospeech.VoiceSelectionParams(
-            language_code=language_code, 
-            ssml_gender=texttospeech.SsmlVoiceGender.MALE
-        )
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3
+        audio = speech.RecognitionAudio(content=content)
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            language_code=language_code
         )
         
-        response = tts_client.synthesize_speech(
-            input=synthesis_input, voice=voice, audio_config=audio_config
+        with metrics.span("stt"):
+            response = await rate_limiter.get_guard("stt").acall(async_speech_client.recognize, config=config, audio=audio)
+        return response.results[0].alternatives[0].transcript if response.results else ""
+    except Exception as e:
+        print(f"Error recognizing speech: {e}")
+        return ""
+
+async def asynthesize_audio(text, language_code="hi-IN"):
+    """
+    Async variant of synthesize_audio using the async Text-to-Speech client
+    """
+    global async_tts_client, tts_cache
+    voice_gender = texttospeech.SsmlVoiceGender.MALE
+    audio_encoding = texttospeech.AudioEncoding.LINEAR16
+    
+    cache_key = None
+    if tts_cache is not None:
+        cache_key = tts_cache.make_key(text, language_code, voice_gender.name, f"{audio_encoding.name}_{TTS_SAMPLE_RATE}")
+        cached_audio = tts_cache.get(cache_key)
+        if cached_audio is not None:
+            metrics.observe("tts", 0.0, cache="hit")
+            return cached_audio
+    
+    try:
+        with metrics.span("tts", cache="miss"):
+            response = await rate_limiter.get_guard("tts").acall(
+                async_tts_client.synthesize_speech,
+                input=texttospeech.SynthesisInput(text=text),
+                voice=texttospeech.VoiceSelectionParams(language_code=language_code, ssml_gender=voice_gender),
+                audio_config=texttospeech.AudioConfig(audio_encoding=audio_encoding, sample_rate_hertz=TTS_SAMPLE_RATE)
+            )
+    except Exception as e:
+        print(f"Error synthesizing speech: {e}")
+        return None
+    
+    if cache_key is not None:
+        tts_cache.put(cache_key, response.audio_content)
+    return response.audio_content
+
+def synthesize_audio(text, language_code="hi-IN"):
+    """
+    Returns synthesized LINEAR16 (WAV) bytes for the text, served from the TTS cache when possible
+    """
+    global tts_client, tts_cache
+    voice_gender = texttospeech.SsmlVoiceGender.MALE
+    audio_encoding = texttospeech.AudioEncoding.LINEAR16
+    
+    cache_key = None
+    if tts_cache is not None:
+        cache_key = tts_cache.make_key(text, language_code, voice_gender.name, f"{audio_encoding.name}_{TTS_SAMPLE_RATE}")
+        cached_audio = tts_cache.get(cache_key)
+        if cached_audio is not None:
+            metrics.observe("tts", 0.0, cache="hit")
+            return cached_audio
+    
+    synthesis_input = texttospeech.SynthesisInput(text=text)
+    voice = texttospeech.VoiceSelectionParams(
+        language_code=language_code, 
+        ssml_gender=voice_gender
+    )
+    audio_config = texttospeech.AudioConfig(
+        audio_encoding=audio_encoding,
+        sample_rate_hertz=TTS_SAMPLE_RATE
+    )
+    
+    with metrics.span("tts", cache="miss"):
+        response = rate_limiter.get_guard("tts").call(
+            tts_client.synthesize_speech, input=synthesis_input, voice=voice, audio_config=audio_config
         )
+    
+    if cache_key is not None:
+        tts_cache.put(cache_key, response.audio_content)
+    return response.audio_content
+
+def synthesize_speech(text, output_path="response.wav", language_code="hi-IN"):
+    """
+    Converts text to speech and saves to a WAV file; playback uses synthesize_audio bytes directly
+    """
+    try:
+        audio_content = synthesize_audio(text, language_code=language_code)
         
         with open(output_path, "wb") as out:
-            out.write(response.audio_content)
+            out.write(audio_content)
             
         print(f"Speech synthesized and saved to {output_path}")
         return output_path
@@ -205,112 +586,257 @@ def synthesize_speech(text, output_path="response.mp3", language_code="hi-IN"):
         print(f"Error synthesizing speech: {e}")
         return None
 
+def prerender_fixed_lines(language_code="hi-IN"):
+    """
+    Fills the TTS cache with the greetings and stock replies so call openings
+    never wait on a synthesis round trip
+    """
+    lines = list(INITIAL_GREETINGS.values()) + [DEFAULT_GREETING] + list(FIXED_RESPONSES.values())
+    lines += [reply for replies in INTENT_REPLIES.values() for reply in replies.values() if "{" not in reply]
+    rendered = 0
+    for line in lines:
+        try:
+            synthesize_audio(line, language_code=language_code)
+            rendered += 1
+        except Exception as e:
+            print(f"Error pre-rendering '{line[:30]}...': {e}")
+    print(f"Pre-rendered {rendered}/{len(lines)} fixed lines into the TTS cache")
+    return rendered
+
+def _demo_start(date_time=None):
+    # Requested time, else the first free slot from the cached free/busy data, else tomorrow 15:00
+    if not date_time and slot_finder is not None:
+        free_slots = slot_finder.next_free_slots(1)
+        if free_slots:
+            date_time = free_slots[0][0].replace(tzinfo=None).isoformat()
+    if not date_time:
+        tomorrow = datetime.now() + timedelta(days=1)
+        date_time = tomorrow.replace(hour=15, minute=0, second=0).isoformat()
+    
+    return datetime.fromisoformat(date_time.replace('Z', '+00:00').replace('T', ' '))
+
+def build_demo_event(user_email, start_dt, end_dt):
+    """
+    Returns the Calendar event body for a demo session
+    """
+    return {
+        'summary': 'AI Demo Session',
+        'description': 'Demo session for our ERP system product.',
+        'start': {'dateTime': start_dt.isoformat(), 'timeZone': 'Asia/Kolkata'},
+        'end': {'dateTime': end_dt.isoformat(), 'timeZone': 'Asia/Kolkata'},
+        'attendees': [{'email': user_email}],
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'email', 'minutes': 24 * 60},
+                {'method': 'popup', 'minutes': 30},
+            ],
+        },
+    }
+
 def schedule_demo(user_email, date_time=None, duration_hours=1):
     # Schedules a demo in Google Calendar
     
-    global calendar_service
+    global calendar_service, slot_finder
     try:
-        if not date_time:
-            tomorrow = datetime.now() + timedelta(days=1)
-            date_time = tomorrow.replace(hour=15, minute=0, second=0).isoformat()
-        
-        start_dt = datetime.fromisoformat(date_time.replace('Z', '+00:00').replace('T', ' '))
+        start_dt = _demo_start(date_time)
         end_dt = start_dt + timedelta(hours=duration_hours)
         
-        event = {
-            'summary': 'AI Demo Session',
-            'description': 'Demo session for our ERP system product.',
-            'start': {'dateTime': start_dt.isoformat(), 'timeZone': 'Asia/Kolkata'},
-            'end': {'dateTime': end_dt.isoformat(), 'timeZone': 'Asia/Kolkata'},
-            'attendees': [{'email': user_email}],
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'email', 'minutes': 24 * 60},
-                    {'method': 'popup', 'minutes': 30},
-                ],
-            },
-        }
+        event = build_demo_event(user_email, start_dt, end_dt)
         
-        event = calendar_service.events().insert(calendarId='primary', body=event).execute()
+        with metrics.span("calendar", operation="insert"):
+            request = calendar_service.events().insert(calendarId='primary', body=event)
+            event = rate_limiter.get_guard("calendar").call(request.execute)
+        if slot_finder is not None:
+            slot_finder.mark_busy(start_dt, end_dt)
         return f"Demo scheduled successfully! Details: {event.get('htmlLink')}"
     except Exception as e:
         print(f"Error scheduling demo: {e}")
         return f"Failed to schedule demo: {str(e)}"
 
-def track_customer(name, email, interaction, scenario):
-   # Logs customer interaction to a file-based CRM
- 
+def request_demo_booking(user_email, date_time=None, duration_hours=1, on_result=None):
+    """
+    Queues a demo booking without waiting on Google Calendar.
+    The result is passed to on_result (a BookingResult) once the batch insert completes.
+    Returns the booking's idempotency key, or None if it could not be queued.
+    """
     try:
-        os.makedirs("crm_data", exist_ok=True)
+        start_dt = _demo_start(date_time)
+        end_dt = start_dt + timedelta(hours=duration_hours)
+        finder = slot_finder
+        report = on_result or _report_booking
         
-        file_path = os.path.join("crm_data", "customer_interactions.txt")
+        def on_booking_result(result):
+            # A failed booking frees its slot for the next caller
+            if not result.ok and finder is not None:
+                finder.release(start_dt, end_dt)
+            report(result)
         
-        with open(file_path, "a", encoding="utf-8") as crm_file:
-            crm_file.write(f"{datetime.now()} - {name} ({email}) - {scenario}: {interaction}\n")
+        # Hold the slot locally so it is not offered to the next caller
+        if finder is not None:
+            finder.mark_busy(start_dt, end_dt)
+        return get_booking_queue().submit(
+            user_email, start_dt, build_demo_event(user_email, start_dt, end_dt), callback=on_booking_result
+        )
+    except Exception as e:
+        print(f"Error queueing demo booking: {e}")
+        return None
+
+def _report_booking(result):
+    # Default booking callback: print the outcome and record failures in the CRM
+    if result.ok:
+        print(f"Demo scheduled successfully for {result.user_email}! Details: {result.link}")
+    else:
+        print(f"Failed to schedule demo for {result.user_email}: {result.error}")
+        track_customer("Potential Customer", result.user_email, f"Booking failed: {result.error}",
+                       "demo_scheduling", outcome="demo_booking_failed")
+
+def get_booking_queue():
+    """
+    Returns the calendar booking queue, starting it on first use
+    """
+    global booking_queue
+    with _booking_queue_lock:
+        if booking_queue is None:
+            booking_queue = BookingQueue(calendar_service)
+        return booking_queue
+
+def track_customer(name, email, interaction, scenario, outcome=None):
+   # Logs customer interaction to the CRM store; the write happens on a background thread
+ 
+    try:
+        get_crm_store().record(name, email, interaction, scenario, outcome=outcome)
         
         return "Customer interaction logged successfully."
     except Exception as e:
         print(f"Error logging customer interaction: {e}")
         return f"Failed to log customer interaction: {str(e)}"
 
-def handle_demo_scheduling(user_email, user_input):
+def get_crm_store():
+    """
+    Returns the CRM store, opening it on first use
+    """
+    global crm_store
+    with _crm_store_lock:
+        if crm_store is None:
+            crm_store = CRMStore()
+        return crm_store
+
+def handle_demo_scheduling(user_email, user_input, on_token=None, memory=None, cancel=None):
    # Handles demo scheduling based on user input
     
-    ai_response = get_ai_response(user_input, scenario="demo_scheduling")
+    ai_response = get_ai_response(user_input, scenario="demo_scheduling", on_token=on_token, memory=memory,
+                                  cancel=cancel)
+    if ai_response is None:
+        return None  # Cancelled: no side effects
+    
+    return complete_demo_scheduling(user_email, user_input, ai_response)
+
+def complete_demo_scheduling(user_email, user_input, ai_response, on_booking=None):
+    # Queues the demo booking if the caller asked for one (or the model did) and logs the turn;
+    # the reply is spoken without waiting on Google Calendar
 
-    if "स्केड्यूलिंग मीटिंग" in ai_response or "Scheduling Meeting" in ai_response:
-        event_link = schedule_demo(user_email)
-        print(event_link)    
-    track_customer("Potential Customer", user_email, f"Q: {user_input}, A: {ai_response}", "demo_scheduling")
+    outcome = _intent_outcome(user_input)
+    intent = classify(user_input)
+    start = _intent_start(intent) if intent.confident and intent.name in BOOKING_INTENTS else None
+    if start is not None:
+        request_demo_booking(user_email, date_time=start.isoformat(), on_result=on_booking)
+        outcome = "demo_scheduled"
+    elif "स्केड्यूलिंग मीटिंग" in ai_response or "Scheduling Meeting" in ai_response:
+        request_demo_booking(user_email, on_result=on_booking)
+        outcome = "demo_scheduled"
+    track_customer("Potential Customer", user_email, f"Q: {user_input}, A: {ai_response}", "demo_scheduling", outcome=outcome)
     
     return ai_response
 
-def handle_candidate_interview(user_input):
+def handle_candidate_interview(user_input, on_token=None, memory=None, cancel=None):
     # Handles interview questions
     
-    ai_response = get_ai_response(user_input, scenario="candidate_interviewing")
+    ai_response = get_ai_response(user_input, scenario="candidate_interviewing", on_token=on_token, memory=memory,
+                                  cancel=cancel)
+    if ai_response is None:
+        return None  # Cancelled: no side effects
     
-    track_customer("Candidate", "candidate@example.com", f"Q: {user_input}, A: {ai_response}", "candidate_interviewing")
+    return complete_candidate_interview(user_input, ai_response)
+
+def complete_candidate_interview(user_input, ai_response):
+    # Logs the interview turn
+    
+    track_customer("Candidate", "candidate@example.com", f"Q: {user_input}, A: {ai_response}", "candidate_interviewing",
+                   outcome=_intent_outcome(user_input))
     
     return ai_response
 
-def handle_payment_followup(user_email, user_input):
+def handle_payment_followup(user_email, user_input, on_token=None, memory=None, cancel=None):
     #Handles payment follow-up conversations
     
-    ai_response = get_ai_response(user_input, scenario="payment_followup")
+    ai_response = get_ai_response(user_input, scenario="payment_followup", on_token=on_token, memory=memory,
+                                  cancel=cancel)
+    if ai_response is None:
+        return None  # Cancelled: no side effects
+    
+    return complete_payment_followup(user_email, user_input, ai_response)
+
+def complete_payment_followup(user_email, user_input, ai_response):
+    # Logs the payment follow-up turn
     
-    track_customer("Customer", user_email, f"Q: {user_input}, A: {ai_response}", "payment_followup")
+    track_customer("Customer", user_email, f"Q: {user_input}, A: {ai_response}", "payment_followup",
+                   outcome=_intent_outcome(user_input))
     
     return ai_response
 
-def play_audio(file_path):
-   # Plays the audio file using platform-specific methods
+def _intent_outcome(user_input):
+    # CRM outcome implied by the caller's words alone
+    intent = classify(user_input)
+    if intent.confident and intent.name == "callback_later":
+        return "callback_requested"
+    return None
+
+def handle_turn(scenario, user_email, user_input, on_token=None, memory=None, cancel=None):
+    """
+    Runs the scenario handler for one user utterance and returns the AI response,
+    or None if `cancel` was set before the reply finished
+    """
+    if scenario == "demo_scheduling":
+        return handle_demo_scheduling(user_email, user_input, on_token=on_token, memory=memory, cancel=cancel)
+    elif scenario == "candidate_interviewing":
+        return handle_candidate_interview(user_input, on_token=on_token, memory=memory, cancel=cancel)
+    elif scenario == "payment_followup":
+        return handle_payment_followup(user_email, user_input, on_token=on_token, memory=memory, cancel=cancel)
+    return get_ai_response(user_input, on_token=on_token, memory=memory, cancel=cancel)
+
+def complete_turn(scenario, user_email, user_input, ai_response, on_booking=None):
+    """
+    Runs the scenario side effects (booking, CRM logging) for an already generated response
+    """
+    if scenario == "demo_scheduling":
+        return complete_demo_scheduling(user_email, user_input, ai_response, on_booking=on_booking)
+    elif scenario == "candidate_interviewing":
+        return complete_candidate_interview(user_input, ai_response)
+    elif scenario == "payment_followup":
+        return complete_payment_followup(user_email, user_input, ai_response)
+    return ai_response
+
+def get_audio_player():
+    """
+    Returns the audio player, opening the output device on first use
+    """
+    global audio_player
+    with _audio_player_lock:
+        if audio_player is None:
+            audio_player = audio_player_module.AudioPlayer(sample_rate=TTS_SAMPLE_RATE).start()
+        return audio_player
+
+def play_audio(audio):
+    # Plays synthesized LINEAR16/WAV bytes (or a WAV file path) on the shared output stream
     
     try:
-        if platform.system() == "Windows":
-            mixer.init()
-            mixer.music.load(file_path)
-            mixer.music.play()
-            while mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-            mixer.music.unload()
-        elif platform.system() == "Darwin":
-            subprocess.call(["afplay", file_path])
-        else:
-            if os.system("which mpg123 > /dev/null") == 0:
-                subprocess.call(["mpg123", file_path])
-            elif os.system("which mpg321 > /dev/null") == 0:
-                subprocess.call(["mpg321", file_path])
-            else:
-                # Fallback to pygame
-                mixer.init()
-                mixer.music.load(file_path)
-                mixer.music.play()
-                while mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                mixer.music.unload()
-        return True
+        if isinstance(audio, str):
+            with open(audio, "rb") as audio_file:
+                audio = audio_file.read()
+        with metrics.span("playback"):
+            # The returned clip says how much was heard if playback was cut short
+            return get_audio_player().play(audio)
     except Exception as e:
         print(f"Error playing audio: {e}")
         return False
\ No newline at end of file
@@ -0,0 +1,129 @@
+# vad.py
+import time
+
+import numpy as np
+
+# End-of-turn tuning per scenario. Candidates pause to think mid-answer, so the
+# interview waits longer before deciding the turn is over.
+SCENARIO_VAD_SETTINGS = {
+    "demo_scheduling": {"hangover_ms": 700},
+    "candidate_interviewing": {"hangover_ms": 1200},
+    "payment_followup": {"hangover_ms": 800},
+}
+
+
+def settings_for_scenario(scenario, **overrides):
+    """Return VoiceActivityDetector keyword arguments for a scenario"""
+    settings = dict(SCENARIO_VAD_SETTINGS.get(scenario, {}))
+    settings.update(overrides)
+    return settings
+
+
+class VADEvent:
+    """A speech start or end-of-turn decision"""
+    SPEECH_START = "speech_start"
+    END_OF_TURN = "end_of_turn"
+
+    def __init__(self, kind, stream_time, latency=None):
+        self.kind = kind
+        # Position in the audio stream (seconds) where the event applies
+        self.stream_time = stream_time
+        # For END_OF_TURN: wall-clock seconds from receiving the last speech frame to the decision
+        self.latency = latency
+
+    def __repr__(self):
+        return f"VADEvent({self.kind}, t={self.stream_time:.2f}s)"
+
+
+class VoiceActivityDetector:
+    """
+    Energy / zero-crossing voice activity detector working on raw 16-bit PCM.
+
+    Frames are analysed in bulk with NumPy. A frame counts as speech when its RMS
+    energy is well above the adaptive noise floor and it is not dominated by the
+    high zero-crossing rate typical of hiss. Speech starts after `start_ms` of
+    consecutive speech and the turn ends after `hangover_ms` of silence.
+    """
+    def __init__(self, sample_rate=16000, frame_ms=20, energy_ratio=3.0, min_energy=200.0,
+                 max_zcr=0.25, start_ms=120, hangover_ms=700, noise_floor=None, noise_adapt=0.05):
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_seconds = self.frame_samples / sample_rate
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.max_zcr = max_zcr
+        self.start_frames = max(1, int(start_ms / frame_ms))
+        self.hangover_frames = max(1, int(hangover_ms / frame_ms))
+        self.noise_adapt = noise_adapt
+        self.noise_floor = noise_floor if noise_floor is not None else min_energy / energy_ratio
+        self.reset()
+
+    def reset(self):
+        """Forget any in-progress utterance"""
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self.frames_seen = 0
+        self.speech_start_frame = None
+        self.last_speech_wall_time = None
+        self.end_of_turn_latency = None
+        self._leftover = np.zeros(0, dtype=np.int16)
+
+    @property
+    def threshold(self):
+        return max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+    def classify_frames(self, samples):
+        """
+        Split int16 samples into whole frames and return (is_speech, rms) arrays.
+        Trailing samples that do not fill a frame are returned as the third value.
+        """
+        n_frames = len(samples) // self.frame_samples
+        used = n_frames * self.frame_samples
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.float32), samples
+
+        frames = samples[:used].reshape(n_frames, self.frame_samples).astype(np.float32)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        threshold = self.threshold
+        # Loud frames count as speech even with a high ZCR (fricatives like "s", "sh")
+        is_speech = (rms > threshold) & ((zcr < self.max_zcr) | (rms > 2 * threshold))
+        return is_speech, rms, samples[used:]
+
+    def process(self, pcm_bytes):
+        """Feed raw PCM bytes and return the list of VADEvents they trigger"""
+        now = time.perf_counter()
+        samples = np.frombuffer(pcm_bytes, dtype=np.int16)
+        if len(self._leftover):
+            samples = np.concatenate((self._leftover, samples))
+        is_speech, rms, self._leftover = self.classify_frames(samples)
+
+        # Slowly track the background level on non-speech frames
+        quiet = rms[~is_speech]
+        if len(quiet) and not self.in_speech:
+            self.noise_floor += self.noise_adapt * (float(np.median(quiet)) - self.noise_floor)
+
+        events = []
+        for speech_frame in is_speech:
+            if speech_frame:
+                self.speech_run += 1
+                self.silence_run = 0
+                self.last_speech_wall_time = now
+                if not self.in_speech and self.speech_run >= self.start_frames:
+                    self.in_speech = True
+                    self.speech_start_frame = self.frames_seen - self.speech_run + 1
+                    events.append(VADEvent(VADEvent.SPEECH_START, self.speech_start_frame * self.frame_seconds))
+            else:
+                self.speech_run = 0
+                self.silence_run += 1
+                if self.in_speech and self.silence_run >= self.hangover_frames:
+                    self.in_speech = False
+                    self.end_of_turn_latency = now - self.last_speech_wall_time
+                    end_frame = self.frames_seen - self.silence_run + 1
+                    events.append(VADEvent(VADEvent.END_OF_TURN, end_frame * self.frame_seconds,
+                                           latency=self.end_of_turn_latency))
+            self.frames_seen += 1
+        return events